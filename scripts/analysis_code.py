@@ -12,52 +12,159 @@
 # __status__ = Production
 # __date__ = 30/09/2025
 
-# Required libraries and custom styles:
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-import seaborn as sns
+# Required libraries:
+from functools import partial
 import pandas as pd
 import numpy as np
-import scipy as sp
-from scipy.stats import shapiro
 import os
 
+from storage import read_dataset, write_dataset, dataset_fingerprint
+from correlations import correlate
+from missingness import profile_missing, profile_cells, select_groups
+from resampling import correlation_intervals, cagr_intervals, WORKERS
+from figures import FigureRenderer, figure_spec, FIGURE_WORKERS
+from stages import run_stages, open_stage_cache
+from panel import Panel
+from instrument import Instrument
+from http_cache import sha256_bytes, sha256_file
+from backends import cell_aggregates, require_backend, BACKEND, SUM_SUFFIX
+from options import analysis_parser
+import backends
+import correlations
+import missingness
+import panel as panel_module
+import resampling
+import storage
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-FONT_PATH = os.path.join(BASE_DIR, '..', 'assets', 'fonts', 'Ubuntu-Regular.ttf')
-STYLE_PATH = os.path.join(BASE_DIR, 'custom.mplstyle')
-FIGURES_PATH = os.path.join(BASE_DIR, '..', 'figures')
 DATA_PATH = os.path.join(BASE_DIR, '..', 'data')
 
+# Analysis scope
+NACE_CODE = "G-N"
+ANALYSIS_COLUMNS = ['nace_r2', 'geo', 'time', 'pers2_FTE_RSE', 'pers2_FTE_TOTAL', 'exp2_MIO_EUR', 'fem2_FTE_RSE']
+
+# Stored columns -> analysed variables
+RENAME = {"pers2_FTE_RSE": "FTE Researcher",
+          "pers2_FTE_TOTAL": "FTE All",
+          "fem2_FTE_RSE" : "FTE Researcher Fem",
+          "exp2_MIO_EUR": "GDE Euro"}
+
+# Repeated (country, year) rows: None fails the run, 'mean' or 'sum' combines them
+CELL_AGGREGATE = None
+
+# Ratio metrics per country and year: sum(numerator) / sum(denominator)
+METRICS = {
+    'SpendEff': {'numerator': 'GDE Euro', 'denominator': 'FTE Researcher', 'nan_policy': 'any'},
+    'LaborInt': {'numerator': 'FTE Researcher', 'denominator': 'GDE Euro', 'nan_policy': 'any'},
+    'FemShare': {'numerator': 'FTE Researcher Fem', 'denominator': 'FTE Researcher', 'nan_policy': 'any'}}
+
+# Growth rates: CAGR label -> metric column, and the analysed window
+CAGR_METRICS = {'Res': 'FTE Researcher', 'Fem Res': 'FTE Researcher Fem', 'SpendEff': 'SpendEff', 'FemShare': 'FemShare'}
+CAGR_WINDOW = (2009, 2021)
+
+# Countries are kept when no metric misses more than this share of entries [%]
+# (and, if set, has no longer run of years without data)
+MISSING_COLUMNS = ['GDE Euro', 'FTE All', 'FTE Researcher', 'FTE Researcher Fem']
+MISSING_GROUPINGS = {'country': ['Country', 'geo'], 'year': ['Year']}
+NAN_THRESHOLD = 20
+MAX_LONGEST_GAP = None
+
+# Metric pairs (x, y) screened for within-country correlation
+CORRELATION_PAIRS = [('FemShare', 'SpendEff')]
+
+# Bootstrap / permutation iterations behind the confidence intervals
+RESAMPLES = 10000
+RESAMPLE_SEED = 20261017
+
 pd.options.display.precision = 3
-plt.style.use(STYLE_PATH)
-full_palette = plt.rcParams["axes.prop_cycle"].by_key()["color"]
-
-if os.path.exists(FONT_PATH):
-    fe = fm.FontEntry(
-        fname = FONT_PATH,
-        name = 'ProjectUbuntu'
-    )
-    fm.fontManager.ttflist.insert(0, fe)
-    plt.rcParams['font.family'] = fe.name
-else:
-    print("Warning: Font file not found. Falling back to sans-serif.")
-    plt.rcParams['font.family'] = 'sans-serif'
 
 # Functions
-def filter_countries(row):
-    """Filter countries based on predefined set"""
-    global set_of_countries
-    if row['geo'] in set_of_countries:
-        return 'in'
-    else: 
-        return 'out'
-
-def load_datasets():
+def country_mask(df, codes, column = 'geo'):
+    """Boolean mask of the rows whose country code is one of ``codes``"""
+    geo = df[column]
+    if not isinstance(geo.dtype, pd.CategoricalDtype):
+        geo = geo.astype('category')
+    keep = np.append(geo.cat.categories.isin(list(codes)), False)
+    return pd.Series(keep[geo.cat.codes.to_numpy()], index = df.index)
+
+def select_countries(df, codes, column = 'geo'):
+    """Rows of ``df`` whose country code is one of ``codes``"""
+    return df[country_mask(df, codes, column)]
+
+def compute_metrics(panel, metrics = METRICS):
+    """Add ratio metrics to the panel, computed on whole country × year arrays.
+
+    Each metric divides the cell value of its numerator by that of its
+    denominator. With the 'any' NaN policy a cell with any missing input row
+    yields NaN; with 'skip' missing rows are ignored.
+    """
+    arrays = {}
+    for name, spec in metrics.items():
+        num, den = spec['numerator'], spec['denominator']
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            value = panel[num] / panel[den]
+        if spec['nan_policy'] == 'any':
+            value = np.where(panel.valid(num) & panel.valid(den), value, np.nan)
+        arrays[name] = value
+    return panel.add_metrics(arrays)
+
+def rolling_windows(first, last, length):
+    """(start, end) year windows of ``length`` years sliding by one year between first and last"""
+    return [(start, start + length - 1) for start in range(first, last - length + 2)]
+
+def window_bounds(values, years, window):
+    """Grid positions of the first and last valid year inside a window, and whether they span growth"""
+    n_years = values.shape[1]
+    positions = np.arange(n_years)
+    start = min(np.searchsorted(years, window[0], side = 'left'), n_years - 1)
+    end = max(np.searchsorted(years, window[1], side = 'right') - 1, 0)
+
+    # Index of the next / previous year holding a valid observation
+    has = ~np.isnan(values)
+    next_valid = np.minimum.accumulate(np.where(has, positions, n_years)[:, ::-1], axis = 1)[:, ::-1]
+    prev_valid = np.maximum.accumulate(np.where(has, positions, -1), axis = 1)
+
+    i, j = next_valid[:, start], prev_valid[:, end]
+    ok = j > i
+    return np.where(ok, i, 0), np.where(ok, j, 0), ok
+
+def compute_cagr(panel, metrics = CAGR_METRICS, windows = (CAGR_WINDOW,),
+                 intervals = False, iterations = RESAMPLES, seed = RESAMPLE_SEED, workers = WORKERS):
+    """Compound annual growth rates of several metrics over several year windows.
+
+    Works on the country × year arrays of the panel. Within a window the
+    growth runs from the first valid year at or after its start to the last
+    valid one at or before its end, compounded over the yearly intervals
+    between them. Returns one row per country and a
+    '<label> CAGR <start>_<end>' column per metric and window, each followed
+    by bootstrap 'CI low' / 'CI high' columns when ``intervals`` is set.
+    """
+    years = panel.year_numbers()
+    rows = np.arange(len(panel.countries))
+
+    result = {}
+    for label, column in metrics.items():
+        values = panel[column]
+        for window in windows:
+            i, j, ok = window_bounds(values, years, window)
+            periods = years[j] - years[i]
+            growth = values[rows, j] / values[rows, i]
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                cagr = np.where(ok, growth ** (1 / periods) - 1, np.nan)
+            name = f"{label} CAGR {window[0]}_{window[1]}"
+            result[name] = cagr
+            if intervals:
+                result[f"{name} CI low"], result[f"{name} CI high"] = cagr_intervals(
+                    values, values, i, j, ok, periods, iterations = iterations, seed = seed, workers = workers)
+
+    return pd.DataFrame(result, index = panel.countries)
+
+def load_datasets(nace = NACE_CODE):
     print("---- O1.1 Loading datasets...")
     
-    df_path = os.path.join(DATA_PATH, 'scraper_data.csv')
-    df = pd.read_csv(df_path)
+    nace_filter = ('nace_r2', 'in', list(nace)) if isinstance(nace, (list, tuple)) else ('nace_r2', '==', nace)
+    df = read_dataset('scraper_data', columns = ANALYSIS_COLUMNS, filters = [nace_filter])
     print(f"✓ Main dataset loaded: {len(df):,} records")
 
     mdf_path = os.path.join(DATA_PATH, 'scraper_metadata.csv')
@@ -71,7 +178,25 @@ def load_datasets():
     return df, mdf, euefta
 
 
-def filter_and_rename_variables(df, euefta):
+def query_cells(backend, nace = NACE_CODE):
+    print("---- O1.1 Loading datasets...")
+
+    mdf = pd.read_csv(os.path.join(DATA_PATH, 'scraper_metadata.csv'))
+    print(f"✓ Metadata loaded: {len(mdf):,} records")
+    euefta = pd.read_csv(os.path.join(DATA_PATH, 'eu_efta_countries.csv'))
+    print(f"✓ EU + EFTA countries loaded: {len(euefta):,} countries\n")
+
+    print(f"---- O1.2 Filtering and reducing variables ({backend} query plan):")
+    print(f"• Scan scraper_data → NACE {nace} → EU + EFTA countries → rename → country × year cells")
+    cells = cell_aggregates(backend, nace, euefta, RENAME)
+    cells['Year'] = pd.to_datetime(cells['Year'], format = '%Y', errors = 'coerce')
+    print(f"• {cells['rows'].sum():,} records reduced to {len(cells):,} cells "
+          f"of {cells['Country'].nunique()} EU + EFTA countries")
+    print()
+
+    return cells, mdf, euefta
+
+def filter_and_rename_variables(df, euefta, nace = NACE_CODE):
     print("---- O1.2 Filtering and renaming variables:")
     
     print("• Converting time to datetime format")
@@ -81,376 +206,253 @@ def filter_and_rename_variables(df, euefta):
     print(f"• Year conversion: {nan_pct:.0f}% values converted to NaT")
 
     print("• Filtering by NACE classification")
-    df = df[df['nace_r2'] == "G-N"]
+    df = df[df['nace_r2'] == nace]
     print(f"• NACE type included: {df.nace_r2.unique()}")
 
     print("• Filtering by EU + EFTA countries")
-    global set_of_countries
-    set_of_countries = euefta['geo'].values
-    df['geo_euefta'] = df.apply(filter_countries, axis = 1)
-    df = df[df['geo_euefta'] == 'in']
+    df['geo'] = df['geo'].astype('category')
+    df = select_countries(df, euefta['geo'])
     print(f"• Countries included: {len(df.geo.unique())} EU + EFTA countries")
     df = pd.merge(df, euefta, on = ['geo'], how = 'left') 
 
     print("• Renaming columns for clarity")
-    df = df.rename(columns = {"pers2_FTE_RSE": "FTE Researcher",
-                              "pers2_FTE_TOTAL": "FTE All",
-                              "fem2_FTE_RSE" : "FTE Researcher Fem",
-                              "exp2_MIO_EUR": "GDE Euro"})
+    df = df.rename(columns = RENAME)
 
     print("• Removing unused columns")
-    df = df.drop(['pers2_HC_RSE', 'pers2_HC_TOTAL', 'exp2_PC_TOT', 'nace_r2', 'geo_euefta', 'time'], axis = 1)
+    df = df.drop(['pers2_HC_RSE', 'pers2_HC_TOTAL', 'exp2_PC_TOT', 'nace_r2', 'time'], axis = 1, 
+                 errors = 'ignore')
     df = df[['Country', 'geo', 'Year', 'GDE Euro', 'FTE All', 'FTE Researcher', 'FTE Researcher Fem']]
 
     print(f"Pre-processed Dataset Preview:")
     print(f"• Shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
     print("• Sample data:")
-    print(df.sample(3))
+    print(df.sample(min(3, len(df))))
     print()
     
     return df
 
-def review_missing_data(df):
-    print("---- O1.3 Missing data analysis:")
-
-    nan_count = df.isna().sum()
-    all_count = df.iloc[:,0].count()
-    prc = (nan_count * 100)/all_count
+def report_missing(profile, figures, nan_threshold = NAN_THRESHOLD, max_longest_gap = MAX_LONGEST_GAP):
+    """Print and plot a missingness profile; returns the (country, geo) groups passing the selection rule"""
     print("Missing Data by Column:")
-    for col, pct in prc.items():
+    for col, pct in profile['overall'].items():
         if pct > 0:
             print(f"• {col}: {pct:.0f}% missing")
     print()
 
     # The percentage of data entry gaps per country:
-    df_nans = df.groupby('Country')[['GDE Euro','FTE All', 'FTE Researcher', 'FTE Researcher Fem']].apply(
-    lambda x: (x.isna().sum() * 100 / len(x) )).sort_values(by = 'Country')
-    df_nans = df_nans.stack().reset_index().rename(columns={'level_1': 'metrics', 0: 'value'})
-
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-
-    metrics = df_nans['metrics'].unique()
-    num_rows = len(metrics)
+    df_nans = profile['country'].droplevel('geo').stack().reset_index().rename(columns={'level_1': 'metrics', 0: 'value'})
 
-    fig, axes = plt.subplots(num_rows, 1, figsize = (9, 3 * num_rows), sharey = True)
-    if num_rows == 1: axes = [axes]
-    for i, metric in enumerate(metrics):
-        data_subset = df_nans[df_nans['metrics'] == metric]
-
-        sns.barplot(data = data_subset, x = 'Country', y = 'value', ax = axes[i])
-
-        axes[i].set_title(f"Metric: {metric}")
-        axes[i].set_ylabel("NaN entries [%]")
-        axes[i].set_xlabel("Country")
-
-        axes[i].set_ylim(0, 100)
-        axes[i].set_yticks([0, 20, 40, 60, 80, 100])
-
-        axes[i].tick_params(axis = 'x', rotation = 90)
-
-    plt.suptitle('The percentage of NaN values per country', y = 1.005)
-    plt.tight_layout()
-
-    file_name = 'Fig1.3.1 The percentage of NaN values per country.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig1.3.1 The percentage of NaN values per country")
+    n_metrics = df_nans['metrics'].nunique()
+    figures.submit(figure_spec('nan_panels', 'Fig1.3.1 The percentage of NaN values per country', df_nans,
+                               figsize = (9, 3 * n_metrics),
+                               title = 'The percentage of NaN values per country'))
 
     # The percentage of data entry gaps across years:
-    df_nans = df.groupby(
-    'Year')[['GDE Euro','FTE All', 'FTE Researcher', 'FTE Researcher Fem']].apply(
-    lambda x: (x.isna().sum() * 100 / len(x) )).sort_values(by = 'Year')
-    df_nans = df_nans.stack().reset_index().rename(columns={'level_1': 'metrics', 0: 'value'})
-
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-    plt.rcParams.update({
-        'figure.figsize': (7,4)})
-
-    ax = sns.lineplot(data = df_nans, x = 'Year', y = 'value', hue = 'metrics', linewidth = 2)
+    df_nans = profile['year'].stack().reset_index().rename(columns={'level_1': 'metrics', 0: 'value'})
+
+    figures.submit(figure_spec('line', 'Fig1.3.2 The percentage of data entry gaps across years', df_nans,
+                               x = 'Year', y = 'value', hue = 'metrics', plot_kws = {'linewidth': 2},
+                               title = 'The percentage of NaN values per year',
+                               xlabel = "Year", ylabel = "Percentage of NaN entries [%]",
+                               legend = {'title': "Metrics", 'loc': 'upper left', 'bbox_to_anchor': (1.01, 0.98)},
+                               yticks = ([0,10,20,30,40,50,60,70,80,90,100],
+                                         ['0','10','20','30','40','50','60','70','80','90','100'])))
+
+    # Longest runs of consecutive years without data:
+    longest = profile['gaps'].xs('longest gap', axis = 1, level = 1)
+    print("Longest Data Gaps [years]:")
+    for col in MISSING_COLUMNS:
+        print(f"• {col}: up to {longest[col].max()} years ({(profile['gaps'][(col, 'gaps')] > 0).sum()} countries with gaps)")
+    print()
 
-    plt.title('The percentage of NaN values per year', loc = 'center')
-    plt.xlabel("Year")
-    plt.ylabel("Percentage of NaN entries [%]")
+    # Choosing countries with the least data entry gaps.
+    print("Filtering Countries by Data Quality:")
+    return select_groups(profile, 'country', max_missing = nan_threshold, max_longest_gap = max_longest_gap)
 
-    plt.legend(title = "Metrics", loc = 'upper left', bbox_to_anchor=(1.01, 0.98))
+def review_missing_data(df, figures, nan_threshold = NAN_THRESHOLD, max_longest_gap = MAX_LONGEST_GAP):
+    print("---- O1.3 Missing data analysis:")
 
-    plt.yticks([0,10,20,30,40,50,60,70,80,90,100], ['0','10','20','30','40','50','60','70','80','90','100'])
-    
-    plt.tight_layout()
-    
-    file_name = 'Fig1.3.2 The percentage of data entry gaps across years.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig1.3.2 The percentage of data entry gaps across years")
+    profile = profile_missing(df, MISSING_COLUMNS, MISSING_GROUPINGS)
+    selected = report_missing(profile, figures, nan_threshold, max_longest_gap)
 
-    # Choosing countries with the least data entry gaps.
-    print("Filtering Countries by Data Quality:")
-    df_nans = df.groupby(['Country','geo'])[['GDE Euro','FTE All', 'FTE Researcher', 'FTE Researcher Fem']].apply(
-        lambda x: (x.isna().sum() * 100 / len(x) )).sort_values(by = 'Country')
-    df_nans = df_nans[(df_nans['FTE Researcher'] <= 20) & (df_nans['FTE Researcher Fem'] <= 20) & (df_nans['FTE All'] <= 20) & (df_nans['GDE Euro'] <= 20)]
-    df_nans.reset_index(inplace = True)
-
-    global set_of_countries
-    set_of_countries = df_nans.geo.unique()
-    df['geo_nan'] = df.apply(filter_countries, axis = 1)
-    df = df[df['geo_nan'] == "in"]
+    mask = country_mask(df, selected.get_level_values('geo'))
+    df['geo_nan'] = np.where(mask, 'in', 'out')
+    df = df[mask]
     print(f"• Countries selected for analysis: {len(df.Country.unique())} countries")
     print(f"• Selected countries: {df.Country.unique()}")
     print()
     
     return df
 
-def calculate_efficiency_metrics(df):
-    print("---- O2 Efficiency and Labor Intensity analysis:")
+def review_missing_cells(cells, figures, nan_threshold = NAN_THRESHOLD, max_longest_gap = MAX_LONGEST_GAP):
+    print("---- O1.3 Missing data analysis:")
 
-    print("• O2.1 Calculating Annual Spending Efficiency")
-    efficiency_calc = df.groupby(['Country', 'Year'])[['GDE Euro','FTE Researcher']].apply(
-        lambda x: pd.Series({
-            'SpendEff': x['GDE Euro'].sum() / x['FTE Researcher'].sum() 
-                if not (x['GDE Euro'].isna().any() or x['FTE Researcher'].isna().any()) 
-                else float('nan')})).reset_index()
-    df = df.merge(efficiency_calc, on=['Country', 'Year'], how = 'left')
-    nan_pct = df['SpendEff'].isnull().sum()*100/len(df['SpendEff'])
-    print(f"• SpendEff: {nan_pct:.0f}% values converted to NaN")
+    keys = list(dict.fromkeys([k for grouping in MISSING_GROUPINGS.values() for k in grouping]))
+    profile = profile_cells(cells.set_index(keys)[MISSING_COLUMNS + ['rows']], MISSING_COLUMNS, MISSING_GROUPINGS)
+    selected = report_missing(profile, figures, nan_threshold, max_longest_gap)
 
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-    plt.rcParams.update({
-        'figure.figsize': (7,4)})
+    mask = country_mask(cells, selected.get_level_values('geo'))
+    cells['geo_nan'] = np.where(mask, 'in', 'out')
+    cells = cells[mask]
+    print(f"• Countries selected for analysis: {len(cells.Country.unique())} countries")
+    print(f"• Selected countries: {cells.Country.unique()}")
+    print()
 
-    ax = sns.lineplot(data = df, x = 'Year', y = 'SpendEff', hue = 'Country', linewidth = 2)
+    return cells
 
-    plt.legend(title = "Country", loc = 'upper left', bbox_to_anchor=(1.01, 0.98))
+def build_panel(df, aggregate = CELL_AGGREGATE):
+    print("---- O1.4 Building the country × year panel:")
 
-    plt.xlabel("Calendar year")
-    plt.ylabel("Spending Efficiency [MIO € / 1 Reearcher FTE]")
-    plt.title(f"Annual Spending Efficiency per a Researcher (FTE)", loc = 'center')
+    panel = Panel.from_frame(df, MISSING_COLUMNS, attributes = ['geo', 'geo_nan'], aggregate = aggregate)
+    n_countries, n_years, n_metrics = panel.values.shape
+    print(f"• {len(df):,} rows reduced to {n_countries} countries × {n_years} years × {n_metrics} metrics "
+          f"({panel.nbytes / 1024:.0f} KiB)")
+    print()
 
-    plt.tight_layout()
+    return panel
 
-    file_name = 'Fig2.1 Annual Spending Efficiency per a Researcher FTE.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig2.1 Annual Spending Efficiency per a Researcher FTE")
+def build_cell_panel(cells, aggregate = CELL_AGGREGATE):
+    print("---- O1.4 Building the country × year panel:")
 
-    print("\n• O2.2 Calculating Annual Labor Intensity")
-    labour_calc = df.groupby(['Country', 'Year'])[['GDE Euro','FTE Researcher']].apply(
-        lambda x: pd.Series({
-            'LaborInt': x['FTE Researcher'].sum() / (x['GDE Euro'].sum())
-                if not (x['GDE Euro'].isna().any() or x['FTE Researcher'].isna().any()) 
-                else float('nan')})).reset_index()
-    nan_pct = labour_calc['LaborInt'].isnull().sum()*100/len(labour_calc['LaborInt'])
-    print(f"• LaborInt: {nan_pct:.0f}% values converted to NaN")
-    df = df.merge(labour_calc, on=['Country', 'Year'], how = 'left')
+    panel = Panel.from_cells(cells, MISSING_COLUMNS, attributes = ['geo', 'geo_nan'], suffix = SUM_SUFFIX,
+                             aggregate = aggregate)
+    n_countries, n_years, n_metrics = panel.values.shape
+    print(f"• {len(cells):,} cells reduced to {n_countries} countries × {n_years} years × {n_metrics} metrics "
+          f"({panel.nbytes / 1024:.0f} KiB)")
+    print()
 
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-    plt.rcParams.update({
-        'figure.figsize': (7,4)})
+    return panel
 
-    ax = sns.lineplot(x = 'Year', y = 'LaborInt', data = df, hue = 'Country', errorbar = None)
+def calculate_efficiency_metrics(panel, figures):
+    print("---- O2 Efficiency and Labor Intensity analysis:")
 
-    plt.title('Annual Labor Intensity per 1 MIO €', loc = 'center')
-    plt.xlabel("Calendar year")
-    plt.ylabel("Labor Intensity [Researcher FTE / 1 MIO €]")
+    print(f"• Calculating registered metrics: {', '.join(METRICS)}")
+    panel = compute_metrics(panel, METRICS)
+    df = panel.to_frame(['SpendEff', 'LaborInt'])
 
-    plt.legend(title = "Country", loc = 'upper left', bbox_to_anchor = (1.01, 0.98))
+    print("• O2.1 Annual Spending Efficiency")
+    nan_pct = df['SpendEff'].isnull().sum()*100/len(df['SpendEff'])
+    print(f"• SpendEff: {nan_pct:.0f}% values converted to NaN")
+
+    figures.submit(figure_spec('line', 'Fig2.1 Annual Spending Efficiency per a Researcher FTE',
+                               df[['Year', 'SpendEff', 'Country']],
+                               x = 'Year', y = 'SpendEff', hue = 'Country', plot_kws = {'linewidth': 2},
+                               title = "Annual Spending Efficiency per a Researcher (FTE)",
+                               xlabel = "Calendar year", ylabel = "Spending Efficiency [MIO € / 1 Reearcher FTE]",
+                               legend = {'title': "Country", 'loc': 'upper left', 'bbox_to_anchor': (1.01, 0.98)}))
 
-    plt.tight_layout()
+    print("\n• O2.2 Annual Labor Intensity")
+    nan_pct = df['LaborInt'].isnull().sum()*100/len(df['LaborInt'])
+    print(f"• LaborInt: {nan_pct:.0f}% values converted to NaN")
 
-    file_name = 'Fig2.2 Annual Labor Intensity per million euro.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig2.2 Annual Labor Intensity per million euro")
+    figures.submit(figure_spec('line', 'Fig2.2 Annual Labor Intensity per million euro',
+                               df[['Year', 'LaborInt', 'Country']],
+                               x = 'Year', y = 'LaborInt', hue = 'Country', plot_kws = {'errorbar': None},
+                               title = 'Annual Labor Intensity per 1 MIO €',
+                               xlabel = "Calendar year", ylabel = "Labor Intensity [Researcher FTE / 1 MIO €]",
+                               legend = {'title': "Country", 'loc': 'upper left', 'bbox_to_anchor': (1.01, 0.98)}))
     print()
     
-    return df
+    return panel
 
-def calculate_female_share(df):
+def calculate_female_share(panel, figures):
     print("---- O3.1 Female researcher share analysis:")
 
-    print("• Calculating Female Share of Researcher FTEs")
-    femshare_calc = df.groupby(
-        ['Country', 'Year'])[['FTE Researcher', 'FTE Researcher Fem']].apply(
-        lambda x: pd.Series({
-            'FemShare': x['FTE Researcher Fem'].sum() / (x['FTE Researcher'].sum())
-                if not (x['FTE Researcher Fem'].isna().any() or x['FTE Researcher'].isna().any()) 
-               else float('nan')})).reset_index()
-    nan_pct = femshare_calc['FemShare'].isnull().sum()*100/len(femshare_calc['FemShare'])
+    print("• Female Share of Researcher FTEs")
+    if 'FemShare' not in panel:
+        panel = compute_metrics(panel, {'FemShare': METRICS['FemShare']})
+    df = panel.to_frame(['FemShare'])
+    nan_pct = df['FemShare'].isnull().sum()*100/len(df['FemShare'])
     print(f"• FemShare: {nan_pct:.0f}% values converted to NaN")
-    df = df.merge(femshare_calc, on=['Country', 'Year'], how = 'left')
-
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-    plt.rcParams.update({
-        'figure.figsize': (7,4)})
 
-    ax = sns.lineplot(data = df, x = 'Year', y = 'FemShare', hue = 'Country', linewidth = 2)
-
-    plt.legend(title = "Country", loc = 'upper left', bbox_to_anchor=(1.01, 0.95))
-
-    plt.xlabel("Calendar year")
-    plt.ylabel("Female Share of Researchers")
-    plt.title(f"Annual Female Share of Researchers (FTEs)", loc = 'center')
-
-    plt.tight_layout()
-
-    file_name = 'Fig3.1 Annual Female Share of Researchers.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig3.1 Annual Female Share of Researchers")
+    figures.submit(figure_spec('line', 'Fig3.1 Annual Female Share of Researchers',
+                               df[['Year', 'FemShare', 'Country']],
+                               x = 'Year', y = 'FemShare', hue = 'Country', plot_kws = {'linewidth': 2},
+                               title = "Annual Female Share of Researchers (FTEs)",
+                               xlabel = "Calendar year", ylabel = "Female Share of Researchers",
+                               legend = {'title': "Country", 'loc': 'upper left', 'bbox_to_anchor': (1.01, 0.95)}))
     print()
     
-    return df
+    return panel
 
-def calculate_correlations(df):
+def calculate_correlations(panel, figures, workers = WORKERS):
     print("---- O3.2 Relationship between Spending Efficiency and Female Share")
 
     print("• Preparing data for correlation analysis")
+    df = panel.to_frame(['FemShare', 'SpendEff'])
     new_df = df[df['FemShare'].notna() & df['SpendEff'].notna()]
     print(f"• Valid data points: {len(new_df):,} observations")
     
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-    plt.rcParams.update({
-        'figure.figsize': (7,4)})
-
-    fig, ax = plt.subplots()
-
-    sns.scatterplot(data = new_df, x = 'FemShare', y = 'SpendEff', hue = 'Country', ax = ax, s = 20)
-
     print('Correlation test (CT): coefficients and statistical significance\n')
 
-    countries = new_df['Country'].unique()
-    for c in countries:
-        mask = new_df['Country'] == c
-        x = new_df[mask]['FemShare']
-        y = new_df[mask]['SpendEff']
-
-        sh_x = shapiro(x)
-        sh_y = shapiro(y)
-        
-        m, b = np.polyfit(x, y, 1)
-        x_lims = ax.get_xlim()
-        X_plot = np.linspace(x_lims[0] + 0.05, x_lims[1] - 0.05, 100)
-        
-        if (sh_x[1] <= 0.05) or (sh_y[1] <= 0.05):
-            stat, p = sp.stats.spearmanr(a = x, b = y)
-            dist_type = "Normality violation"
-        else:  
-            stat, p = sp.stats.pearsonr(x = x, y = y)
-            dist_type = "Normal distribution"
-            
-        print(f"  - {c}: {dist_type} - Stat = {stat:.2f}, p = {p:.2E}")
-
-        line_style = '-' if p <= 0.05 else ':'
-        ax.plot(X_plot, m * X_plot + b, linestyle = line_style)
-
-    ax.set_title('Female Share vs. Spending Efficiency')
-    ax.set_xlabel('Female Share of Researchers')
-    ax.set_ylabel('Spending Efficiency [MIO € / 1 Researcher FTE]')
-
-    ax.legend(title = 'Country', bbox_to_anchor = (1.001, 1), loc = 'upper left')
-
-    plt.tight_layout()
-
-    file_name = 'Fig3.2 Female Share vs Spending Efficiency.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig3.2 Female Share vs Spending Efficiency")
+    corr = correlate(new_df, CORRELATION_PAIRS)
+    corr = correlation_intervals(new_df, corr, iterations = RESAMPLES, seed = RESAMPLE_SEED, workers = workers)
+    for row in corr.itertuples():
+        dist_type = "Normal distribution" if row.test == 'pearson' else "Normality violation"
+        print(f"  - {row.Country}: {dist_type} - Stat = {row.stat:.2f} "
+              f"[{row.ci_low:.2f}, {row.ci_high:.2f}], p = {row.p:.2E}, permutation p = {row.p_perm:.2E}")
+
+    figures.submit(figure_spec('scatter_fit', 'Fig3.2 Female Share vs Spending Efficiency',
+                               new_df[['FemShare', 'SpendEff', 'Country']], fits = corr[['slope', 'intercept', 'p']],
+                               x = 'FemShare', y = 'SpendEff', hue = 'Country',
+                               title = 'Female Share vs. Spending Efficiency',
+                               xlabel = 'Female Share of Researchers',
+                               ylabel = 'Spending Efficiency [MIO € / 1 Researcher FTE]',
+                               legend = {'title': 'Country', 'bbox_to_anchor': (1.001, 1), 'loc': 'upper left'}))
     print()
     
-    return df
-
-def calculate_growth_rates(df):
-    print("---- O3.3 Growth Rate analysis (2009-2021):")
-
-    print("• Calculating Researcher FTE CAGR")
-    res_cagr_calc = df.query("(Year >= '2009') and (Year <= '2021')").sort_values(
-        ['Country', 'Year']).groupby(
-        ['Country'])[['FTE Researcher']].apply(
-        lambda x: pd.Series({
-            'Res CAGR 2009_2021': ((x.iloc[-1,].item() / x.iloc[0,].item())**(1/13) - 1)
-                  if not (x.iloc[0,].isna().any())
-                  else float('nan')})).reset_index()
-    nan_pct = res_cagr_calc['Res CAGR 2009_2021'].isnull().sum()*100/len(res_cagr_calc['Res CAGR 2009_2021'])
-    print(f"  - Res CAGR: {nan_pct:.0f}% values converted to NaN")
-    df = df.merge(res_cagr_calc, on=['Country'], how = 'left')
-
-    print("• Calculating Female Researcher FTE CAGR")
-    fem_res_cagr_calc = df.query("(Year >= '2009') and (Year <= '2021')").sort_values(
-        ['Country', 'Year']).groupby(
-        ['Country'])[['FTE Researcher Fem']].apply(
-        lambda x: pd.Series({
-            'Fem Res CAGR 2009_2021': ((x.iloc[-1,].item() / x.iloc[0,].item())**(1/13) - 1)
-                  if not (x.iloc[0,].isna().any())
-                  else float('nan')})).reset_index()
-    nan_pct = fem_res_cagr_calc['Fem Res CAGR 2009_2021'].isnull().sum()*100/len(fem_res_cagr_calc['Fem Res CAGR 2009_2021'])
-    print(f"  - Fem Res CAGR: {nan_pct:.0f}% values converted to NaN")
-    df = df.merge(fem_res_cagr_calc, on=['Country'], how = 'left')
-
-    print("• Calculating Spending Efficiency CAGR")
-    cagr_calc = df.query("(Year >= '2009') and (Year <= '2021')").sort_values(
-        ['Country', 'Year']).groupby(
-        ['Country'])[['SpendEff']].apply(
-        lambda x: pd.Series({
-            'SpendEff CAGR 2009_2021': ((x.iloc[-1,].item() / x.iloc[0,].item())**(1/13) - 1)
-                  if not (x.iloc[0,].isna().any())
-                  else float('nan')})).reset_index()
-    nan_pct = cagr_calc['SpendEff CAGR 2009_2021'].isnull().sum()*100/len(cagr_calc['SpendEff CAGR 2009_2021'])
-    print(f"  - SpendEff CAGR: {nan_pct:.0f}% values converted to NaN")
-    df = df.merge(cagr_calc, on=['Country'], how = 'left')
-
-    print("• Calculating Female Share CAGR")
-    femshare_cagr_calc = df.query("(Year >= '2009') and (Year <= '2021')").sort_values(
-        ['Country', 'Year']).groupby(
-        ['Country'])[['FemShare']].apply(
-        lambda x: pd.Series({
-            'FemShare CAGR 2009_2021': ((x.iloc[-1,].item() / x.iloc[0,].item())**(1/13) - 1)
-                  if not (x.iloc[0,].isna().any())
-                  else float('nan')})).reset_index()
-    nan_pct = femshare_cagr_calc['FemShare CAGR 2009_2021'].isnull().sum()*100/len(femshare_cagr_calc['FemShare CAGR 2009_2021'])
-    print(f"  - FemShare CAGR: {nan_pct:.0f}% values converted to NaN")
-    df = df.merge(femshare_cagr_calc, on=['Country'], how = 'left')
+    return panel, corr
+
+def cagr_table(panel, points):
+    """Long CAGR table (one row per CAGR type, country and year) from the panel's country aggregates"""
+    n_countries, n_years, n_points = len(panel.countries), len(panel.years), len(points)
+    country_codes = np.tile(np.repeat(np.arange(n_countries), n_years), n_points)
+    table = pd.DataFrame({
+        panel.key: pd.Categorical.from_codes(country_codes, categories = panel.countries.categories),
+        'geo': panel.attributes['geo'].to_numpy()[country_codes],
+        panel.time: np.tile(panel.years.to_numpy(), n_countries * n_points),
+        'CAGR types': pd.Categorical(np.repeat(points, n_countries * n_years), categories = points)})
+    for column, suffix in [('CAGR value', ''), ('CAGR CI low', ' CI low'), ('CAGR CI high', ' CI high')]:
+        values = panel.aggregates[[f"{p}{suffix}" for p in points]].to_numpy()
+        table[column] = np.repeat(values, n_years, axis = 0).ravel(order = 'F')
+    return table
+
+def calculate_growth_rates(panel, figures, window = CAGR_WINDOW, workers = WORKERS):
+    first, last = window
+    print(f"---- O3.3 Growth Rate analysis ({first}-{last}):")
+
+    print(f"• Calculating {', '.join(CAGR_METRICS)} CAGRs")
+    cagr_calc = compute_cagr(panel, CAGR_METRICS, [window], intervals = True, workers = workers)
+    points = [f"{label} CAGR {first}_{last}" for label in CAGR_METRICS]
+    for label, column in zip(CAGR_METRICS, points):
+        nan_pct = cagr_calc[column].isnull().sum()*100/len(cagr_calc[column])
+        print(f"  - {label} CAGR: {nan_pct:.0f}% values converted to NaN")
+    panel.aggregates = panel.aggregates.drop(columns = cagr_calc.columns, errors = 'ignore').join(cagr_calc)
 
     print("• Preparing CAGR data for visualization")
-    df_cagr = df.melt(id_vars = ['Country','geo', 'Year'],
-                      value_vars = df.columns[11:15], 
-                      var_name = 'CAGR types', 
-                      value_name = 'CAGR value').drop_duplicates()
-    df_cagr = df_cagr[['Country', 'geo', 'Year', 'CAGR types', 'CAGR value']]
-
-    plt.close('all') 
-    plt.style.use(STYLE_PATH)
-    plt.rcParams.update({
-        'figure.figsize': (10,4)})
-
-    ax = sns.barplot(data = df_cagr, x = 'Country', y = 'CAGR value', hue = 'CAGR types')
-
-    plt.title('Compound Annual Growth Rates between 2009 and 2021')
-    plt.xlabel("Country")
-    plt.ylabel("CAGRs")
-
-    plt.legend(title = 'CAGR types', loc = 'upper left', bbox_to_anchor = (0.95, 0.99), ncol = 1)
-
-    plt.tight_layout()
-
-    file_name = 'Fig3.3 CAGRs between 2009 and 2021.png'
-    save_path = os.path.join(FIGURES_PATH, file_name)
-    plt.savefig(save_path)
-    plt.show()
-    print("✓ Saved: Fig3.3 CAGRs between 2009 and 2021")
+    df_cagr = cagr_table(panel, points)
+
+    figures.submit(figure_spec('bar', f'Fig3.3 CAGRs between {first} and {last}',
+                               df_cagr.drop_duplicates(['Country', 'CAGR types'])[['Country', 'CAGR value', 'CAGR types']],
+                               figsize = (10,4),
+                               x = 'Country', y = 'CAGR value', hue = 'CAGR types',
+                               title = f'Compound Annual Growth Rates between {first} and {last}',
+                               xlabel = "Country", ylabel = "CAGRs",
+                               legend = {'title': 'CAGR types', 'loc': 'upper left',
+                                         'bbox_to_anchor': (0.95, 0.99), 'ncol': 1}))
     print()
     
-    return df, df_cagr
+    return panel, df_cagr
+
+def analysis_frame(panel):
+    """The analysed panel as a long frame with one row per country and year, country aggregates repeated per year"""
+    df = panel.to_frame()
+    metrics = [m for m in panel.metrics if m not in MISSING_COLUMNS]
+    df = df[[panel.key, 'geo', panel.time] + MISSING_COLUMNS + ['geo_nan'] + metrics]
+    codes = df[panel.key].cat.codes.to_numpy()
+    for column in panel.aggregates.columns:
+        df[column] = panel.aggregates[column].to_numpy()[codes]
+    return df
 
 def display_metadata(mdf):
     print("Source metadata:")
@@ -461,52 +463,101 @@ def display_metadata(mdf):
         print(f"     Last updated: {mdf.dataset_last_updated[i]}")
     print()
 
-def save_preprocessed_datasets(df, df_cagr):
+def save_preprocessed_datasets(panel, df_cagr, df_corr):
     print("Saving analysis results:")
     
-    file_name = 'analysis_data.csv'
-    save_path = os.path.join(DATA_PATH, file_name)
-    df.to_csv(save_path, encoding='utf-8', index=False)
+    df = analysis_frame(panel)
+    write_dataset(df, 'analysis_data')
     print(f"✓ Main analysis dataset saved: ../data/analysis_data.csv ({df.shape[0]:,} rows)")
     
-    file_name = 'cagr_analysis_data.csv'
-    save_path = os.path.join(DATA_PATH, file_name)
-    df_cagr.to_csv(save_path, encoding='utf-8', index=False)
+    write_dataset(df_cagr, 'cagr_analysis_data')
     print(f"✓ CAGR analysis dataset saved: ../data/cagr_analysis_data.csv ({df_cagr.shape[0]:,} rows)")
 
-def main():
+    write_dataset(df_corr, 'correlation_data')
+    print(f"✓ Correlation dataset saved: ../data/correlation_data.csv ({df_corr.shape[0]:,} rows)")
+
+def input_fingerprint():
+    """Hash of the files the analysis reads"""
+    files = [dataset_fingerprint('scraper_data'),
+             sha256_file(os.path.join(DATA_PATH, 'scraper_metadata.csv')),
+             sha256_file(os.path.join(DATA_PATH, 'eu_efta_countries.csv'))]
+    return sha256_bytes("".join(files).encode('utf-8'))
+
+# Analysis phases as cached stages: state inputs/outputs, code they depend on and parameters
+STAGES = [
+    {'name': 'load', 'func': load_datasets, 'inputs': [], 'outputs': ['df', 'mdf', 'euefta'],
+     'deps': [storage], 'params': {'NACE_CODE': NACE_CODE, 'ANALYSIS_COLUMNS': ANALYSIS_COLUMNS}},
+    {'name': 'filter', 'func': filter_and_rename_variables, 'inputs': ['df', 'euefta'], 'outputs': ['df'],
+     'deps': [country_mask, select_countries], 'params': {'NACE_CODE': NACE_CODE}},
+    {'name': 'missing', 'func': review_missing_data, 'inputs': ['df'], 'outputs': ['df'], 'figures': True,
+     'deps': [country_mask, report_missing, missingness],
+     'params': {'MISSING_COLUMNS': MISSING_COLUMNS, 'NAN_THRESHOLD': NAN_THRESHOLD, 'MAX_LONGEST_GAP': MAX_LONGEST_GAP}},
+    {'name': 'panel', 'func': build_panel, 'inputs': ['df'], 'outputs': ['panel'],
+     'deps': [panel_module], 'params': {'MISSING_COLUMNS': MISSING_COLUMNS}},
+    {'name': 'efficiency', 'func': calculate_efficiency_metrics, 'inputs': ['panel'], 'outputs': ['panel'],
+     'figures': True, 'deps': [compute_metrics], 'params': {'METRICS': METRICS}},
+    {'name': 'female_share', 'func': calculate_female_share, 'inputs': ['panel'], 'outputs': ['panel'],
+     'figures': True, 'deps': [compute_metrics], 'params': {'METRICS': METRICS}},
+    {'name': 'correlations', 'func': calculate_correlations, 'inputs': ['panel'], 'outputs': ['panel', 'df_corr'],
+     'figures': True, 'deps': [correlations, resampling],
+     'params': {'CORRELATION_PAIRS': CORRELATION_PAIRS, 'RESAMPLES': RESAMPLES, 'RESAMPLE_SEED': RESAMPLE_SEED}},
+    {'name': 'growth', 'func': calculate_growth_rates, 'inputs': ['panel'], 'outputs': ['panel', 'df_cagr'],
+     'figures': True, 'deps': [compute_cagr, window_bounds, cagr_table, resampling],
+     'params': {'CAGR_METRICS': CAGR_METRICS, 'CAGR_WINDOW': CAGR_WINDOW,
+                'RESAMPLES': RESAMPLES, 'RESAMPLE_SEED': RESAMPLE_SEED}}]
+
+def analysis_stages(backend = BACKEND, aggregate = CELL_AGGREGATE):
+    """Stages of a backend: lazy backends replace loading, filtering and the panel reduction with one query plan.
+
+    ``aggregate`` combines repeated (country, year) rows when building the panel.
+    """
+    if backend == 'pandas':
+        stages = STAGES
+    else:
+        stages = [
+            {'name': 'query', 'func': partial(query_cells, backend), 'inputs': [], 'outputs': ['cells', 'mdf', 'euefta'],
+             'deps': [backends, storage],
+             'params': {'BACKEND': backend, 'NACE_CODE': NACE_CODE, 'RENAME': RENAME, 'MISSING_COLUMNS': MISSING_COLUMNS}},
+            {'name': 'missing', 'func': review_missing_cells, 'inputs': ['cells'], 'outputs': ['cells'], 'figures': True,
+             'deps': [country_mask, report_missing, missingness],
+             'params': {'MISSING_COLUMNS': MISSING_COLUMNS, 'NAN_THRESHOLD': NAN_THRESHOLD, 'MAX_LONGEST_GAP': MAX_LONGEST_GAP}},
+            {'name': 'panel', 'func': build_cell_panel, 'inputs': ['cells'], 'outputs': ['panel'],
+             'deps': [panel_module], 'params': {'MISSING_COLUMNS': MISSING_COLUMNS}}] + STAGES[4:]
+    if aggregate is None:
+        return stages
+    return [dict(stage, func = partial(stage['func'], aggregate = aggregate)) if stage['name'] == 'panel' else stage
+            for stage in stages]
+
+def main(figures = True, figure_workers = FIGURE_WORKERS, cache = True, metrics = None, profile = None, save = True,
+         backend = BACKEND, aggregate = CELL_AGGREGATE):
+    require_backend(backend)
     print("=" * 60)
     print("Efficiency and Diversity of R&D in Knowledge‑Intensive Services (2005‑2023)")
     print("Data Analysis Pipeline")
     print("=" * 60)
     print()
     
-    # Phase 1: Loading datasets
-    df, mdf, euefta = load_datasets()
-    
-    # Phase 2: Filtering and renaming variables
-    df = filter_and_rename_variables(df, euefta)
-    
-    # Phase 3: Analyzing missing data
-    df = review_missing_data(df)
-    
-    # Phase 4: Calculating efficiency metrics
-    df = calculate_efficiency_metrics(df)
-    
-    # Phase 5: Analyzing female researchers
-    df = calculate_female_share(df)
-    
-    # Phase 6: Correlation analysis
-    df = calculate_correlations(df)
-    
-    # Phase 7: Growth rate analysis
-    df, df_cagr = calculate_growth_rates(df)
-    
-    # Phase 8: Display data sources
-    display_metadata(mdf)
-    
-    # Phase 9: Save results
-    save_preprocessed_datasets(df, df_cagr)
+    with Instrument('analysis', metrics, profile) as run, \
+            FigureRenderer(workers = figure_workers, enabled = figures) as renderer:
+        # Phases 1-7: loading, filtering, missing data, panel, metrics, correlations and growth rates
+        state = run_stages(analysis_stages(backend, aggregate), input_fingerprint(), renderer,
+                           open_stage_cache() if cache else None)
+        
+        # Phase 8: Display data sources
+        run.call('display_metadata', display_metadata, state['mdf'])
+        
+        # Phase 9: Save results
+        if save:
+            run.call('save_preprocessed_datasets', save_preprocessed_datasets,
+                     state['panel'], state['df_cagr'], state['df_corr'])
+
+def cli(argv = None, prog = None):
+    parser = analysis_parser(prog)
+    parser.set_defaults(figure_workers = FIGURE_WORKERS, backend = BACKEND, aggregate = CELL_AGGREGATE)
+    args = parser.parse_args(argv)
+    main(figures = not args.no_figures, figure_workers = args.figure_workers, cache = not args.no_cache,
+         metrics = args.metrics, profile = args.profile, save = not args.no_save, backend = args.backend,
+         aggregate = args.aggregate)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
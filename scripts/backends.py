@@ -0,0 +1,154 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from importlib import import_module
+import os
+
+import pandas as pd
+
+from storage import DATA_PATH, SCHEMAS, dataset_path
+from options import BACKENDS
+
+# Execution backend of the loading, filtering and cell reduction phases (one of BACKENDS)
+BACKEND = 'pandas'
+
+# Lazy engine limits: worker threads (None = all cores), DuckDB memory before
+# it spills to SPILL_PATH, and Polars' streaming (out-of-core) engine
+THREADS = None
+MEMORY_LIMIT = None
+SPILL_PATH = os.path.join(DATA_PATH, 'spill')
+POLARS_ENGINE = 'streaming'
+
+# Column names used inside the query plans
+ROW_NUMBER = '__row'
+SUM_SUFFIX = ' sum'
+
+# Stored column dtypes -> engine types
+DUCKDB_TYPES = {'category': 'VARCHAR', 'int32': 'INTEGER', 'float64': 'DOUBLE'}
+POLARS_TYPES = {'category': 'String', 'int32': 'Int32', 'float64': 'Float64'}
+
+# Functions
+def backend_available(name):
+    if name == 'pandas':
+        return True
+    try:
+        import_module(name)
+    except ImportError:
+        return False
+    return True
+
+def require_backend(name):
+    """Fail early, with the install hint, when a lazy backend's engine is missing"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}' (expected one of {BACKENDS})")
+    if not backend_available(name):
+        raise ImportError(f"The '{name}' backend needs the {name} package: pip install {name}")
+
+def scan_source(name, path = DATA_PATH):
+    """Files a plan scans for a stored dataset: the Parquet store when present, else the CSV export"""
+    store = dataset_path(name, 'parquet', path)
+    if os.path.isdir(store):
+        return os.path.join(store, '**', '*.parquet'), 'parquet'
+    return dataset_path(name, 'csv', path), 'csv'
+
+def sql_string(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def nace_codes(nace):
+    return [nace] if isinstance(nace, str) else list(nace)
+
+def duckdb_cells(files, fmt, nace, countries, columns, key, time, types):
+    """Cell aggregates of the stored rows, planned and run by DuckDB"""
+    import duckdb
+
+    con = duckdb.connect()
+    if THREADS:
+        con.execute(f"SET threads = {int(THREADS)}")
+    if MEMORY_LIMIT:
+        con.execute(f"SET memory_limit = {sql_string(MEMORY_LIMIT)}")
+    con.execute(f"SET temp_directory = {sql_string(SPILL_PATH)}")
+    con.register('countries', countries)
+
+    if fmt == 'parquet':
+        scan = f"read_parquet({sql_string(files)}, hive_partitioning = true)"
+    else:
+        column_types = ", ".join(f"{sql_string(col)}: {sql_string(DUCKDB_TYPES[dtype])}" for col, dtype in types.items())
+        scan = f"read_csv({sql_string(files)}, header = true, types = {{{column_types}}})"
+
+    # Sums are ordered by source row so they add up exactly as the pandas path does
+    measures = []
+    for source, metric in columns.items():
+        value = f"nullif(CAST(s.\"{source}\" AS DOUBLE), 'NaN'::DOUBLE)"
+        measures += [f"count(*) - count({value}) AS \"{metric}\"",
+                     f"sum({value} ORDER BY s.{ROW_NUMBER}) AS \"{metric}{SUM_SUFFIX}\""]
+    codes = nace_codes(nace)
+    query = f"""
+        WITH s AS (SELECT *, row_number() OVER () AS {ROW_NUMBER} FROM {scan})
+        SELECT c."{key}", CAST(s.geo AS VARCHAR) AS geo, CAST(s.time AS INTEGER) AS "{time}",
+               count(*) AS rows, {", ".join(measures)}
+        FROM s JOIN countries AS c ON CAST(s.geo AS VARCHAR) = c.geo
+        WHERE CAST(s.nace_r2 AS VARCHAR) IN ({", ".join("?" for _ in codes)})
+        GROUP BY ALL"""
+    try:
+        return con.execute(query, codes).df()
+    finally:
+        con.close()
+
+def polars_cells(files, fmt, nace, countries, columns, key, time, types):
+    """Cell aggregates of the stored rows, planned and run by Polars"""
+    if THREADS:
+        os.environ.setdefault('POLARS_MAX_THREADS', str(int(THREADS)))
+    import polars as pl
+
+    if fmt == 'parquet':
+        frame = pl.scan_parquet(files, hive_partitioning = True)
+    else:
+        frame = pl.scan_csv(files, schema_overrides = {col: getattr(pl, POLARS_TYPES[dtype])
+                                                       for col, dtype in types.items()})
+    frame = frame.with_row_index(ROW_NUMBER)
+
+    # Sums run sequentially in source-row order so they add up exactly as the pandas path does
+    measures = [pl.len().alias('rows')]
+    for source, metric in columns.items():
+        value = pl.col(source).cast(pl.Float64).fill_nan(None)
+        measures += [value.null_count().alias(metric),
+                     value.sort_by(ROW_NUMBER).drop_nulls().cum_sum().last().alias(f"{metric}{SUM_SUFFIX}")]
+    plan = (frame
+            .filter(pl.col('nace_r2').cast(pl.String).is_in(nace_codes(nace)))
+            .with_columns(pl.col('geo').cast(pl.String), pl.col('time').cast(pl.Int32).alias(time))
+            .join(pl.from_pandas(countries).lazy(), on = 'geo', how = 'inner')
+            .group_by([key, 'geo', time])
+            .agg(measures))
+    return plan.collect(engine = POLARS_ENGINE).to_pandas()
+
+PLANS = {'duckdb': duckdb_cells, 'polars': polars_cells}
+
+def cell_aggregates(backend, nace, countries, columns, key = 'Country', time = 'Year',
+                    name = 'scraper_data', path = DATA_PATH):
+    """Reduce a stored dataset to country × year cells with a lazy query plan.
+
+    The plan scans the stored files, keeps the ``nace`` rows of the
+    ``countries`` (a frame of ``key`` and geo codes), and aggregates every
+    (country, geo, year) cell: its row count ('rows') and, per source column
+    in ``columns`` (source name -> metric name), the null count and the sum
+    of the valid values. Only the cells are materialized. Returns them
+    sorted, with the year as an integer.
+    """
+    require_backend(backend)
+    files, fmt = scan_source(name, path)
+    countries = pd.DataFrame({key: countries[key].astype(str).to_numpy(), 'geo': countries['geo'].astype(str).to_numpy()})
+    cells = PLANS[backend](files, fmt, nace, countries, columns, key, time, SCHEMAS.get(name, {}))
+
+    counts = ['rows'] + list(columns.values())
+    cells = cells.astype({key: 'str', 'geo': 'str', time: 'int32', **{col: 'int64' for col in counts}})
+    cells = cells.sort_values([key, 'geo', time], ignore_index = True)
+    return cells[[key, 'geo', time] + counts + [f"{metric}{SUM_SUFFIX}" for metric in columns.values()]]
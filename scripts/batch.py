@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Scenario batch runs of the Efficiency and Diversity of R&D analysis
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import itertools
+import argparse
+import io
+import os
+
+import pandas as pd
+import numpy as np
+
+from storage import read_dataset, write_dataset
+from figures import FigureRenderer
+from panel import AGGREGATES
+import analysis_code as analysis
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS_PATH = os.path.join(BASE_DIR, '..', 'data', 'scenarios')
+
+BATCH_WORKERS = os.cpu_count() or 1
+
+# Named country sets (None keeps every EU + EFTA country)
+COUNTRY_SETS = {
+    'eu_efta': None,
+    'eu': ['AT', 'BE', 'BG', 'CY', 'CZ', 'DE', 'DK', 'EE', 'EL', 'ES', 'FI', 'FR', 'HR', 'HU',
+           'IE', 'IT', 'LT', 'LU', 'LV', 'MT', 'NL', 'PL', 'PT', 'RO', 'SE', 'SI', 'SK']}
+
+# Functions
+def scenario_grid(naces, country_sets, nan_thresholds, windows):
+    """Every combination of NACE code, country set, NaN threshold and CAGR window"""
+    return [{'id': f"{nace}_{countries}_nan{threshold:g}_{window[0]}_{window[1]}",
+             'nace': nace, 'countries': countries, 'nan_threshold': threshold, 'window': window}
+            for nace, countries, threshold, window in itertools.product(naces, country_sets, nan_thresholds, windows)]
+
+def summarise(scenario, status, df = None, df_corr = None, df_cagr = None):
+    """One summary row of a scenario run"""
+    row = {'Scenario': scenario['id'], 'NACE': scenario['nace'], 'Country set': scenario['countries'],
+           'NaN threshold': scenario['nan_threshold'], 'CAGR window': "{}_{}".format(*scenario['window']),
+           'Status': status}
+    if df is not None:
+        row.update({'Countries': df['Country'].nunique(), 'Rows': len(df)})
+        for metric in analysis.METRICS:
+            row[f"{metric} mean"] = df[metric].mean()
+    if df_corr is not None:
+        row['Significant correlations'] = int((df_corr['p'] <= 0.05).sum())
+        row['Correlations'] = len(df_corr)
+    if df_cagr is not None:
+        medians = df_cagr.groupby('CAGR types', observed = True)['CAGR value'].median()
+        for label in analysis.CAGR_METRICS:
+            row[f"{label} CAGR median"] = medians.get(f"{label} CAGR {row['CAGR window']}", np.nan)
+    return row
+
+def run_scenario(df, euefta, scenario, path = SCENARIOS_PATH, aggregate = analysis.CELL_AGGREGATE):
+    """Run the analysis phases of one scenario on its slice of the base data and store its outputs.
+
+    The phase printouts go to ``analysis_log.txt`` in the scenario directory;
+    the scenario's summary row is returned.
+    """
+    out_path = os.path.join(path, scenario['id'])
+    os.makedirs(out_path, exist_ok = True)
+    codes = COUNTRY_SETS.get(scenario['countries'], scenario['countries'])
+    if isinstance(codes, str):
+        codes = codes.split(',')
+    if codes is not None:
+        euefta = euefta[euefta['geo'].isin(codes)]
+
+    log = io.StringIO()
+    figures = FigureRenderer(enabled = False)
+    try:
+        with redirect_stdout(log):
+            df = analysis.filter_and_rename_variables(df, euefta, nace = scenario['nace'])
+            df = analysis.review_missing_data(df, figures, nan_threshold = scenario['nan_threshold'])
+            if df.empty:
+                return summarise(scenario, 'no countries selected')
+            panel = analysis.build_panel(df, aggregate = aggregate)
+            panel = analysis.calculate_efficiency_metrics(panel, figures)
+            panel = analysis.calculate_female_share(panel, figures)
+            panel, df_corr = analysis.calculate_correlations(panel, figures, workers = 1)
+            panel, df_cagr = analysis.calculate_growth_rates(panel, figures, window = scenario['window'], workers = 1)
+
+            df = analysis.analysis_frame(panel)
+            write_dataset(df, 'analysis_data', path = out_path)
+            write_dataset(df_cagr, 'cagr_analysis_data', path = out_path)
+            write_dataset(df_corr, 'correlation_data', path = out_path)
+        return summarise(scenario, 'ok', df, df_corr, df_cagr)
+    except Exception as e:
+        return summarise(scenario, f"failed: {type(e).__name__}: {e}")
+    finally:
+        with open(os.path.join(out_path, 'analysis_log.txt'), 'w', encoding = 'utf-8') as f:
+            f.write(log.getvalue())
+
+def run_batch(scenarios, workers = BATCH_WORKERS, path = SCENARIOS_PATH, aggregate = analysis.CELL_AGGREGATE):
+    """Load the base data once and fan the scenarios out across a process pool"""
+    naces = sorted({s['nace'] for s in scenarios})
+    df, _, euefta = analysis.load_datasets(nace = naces)
+    slices = {nace: df[df['nace_r2'] == nace] for nace in naces}
+
+    print(f"---- Running {len(scenarios)} scenarios on {workers} workers")
+    args = [(slices[s['nace']], euefta, s, path, aggregate) for s in scenarios]
+    if workers <= 1:
+        rows = [run_scenario(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            rows = list(executor.map(run_scenario, *zip(*args)))
+    for row in rows:
+        print(f"  - {row['Scenario']}: {row['Status']}")
+
+    summary = pd.DataFrame(rows)
+    counts = [col for col in ['Countries', 'Rows', 'Significant correlations', 'Correlations'] if col in summary]
+    summary[counts] = summary[counts].astype('Int64')
+    os.makedirs(path, exist_ok = True)
+    summary.to_csv(os.path.join(path, 'scenario_summary.csv'), encoding = 'utf-8', index = False)
+    print(f"✓ Scenario summary saved: ../data/scenarios/scenario_summary.csv ({len(summary):,} scenarios)")
+    return summary
+
+def parse_window(text):
+    first, last = text.replace('_', '-').split('-')
+    return int(first), int(last)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Run the analysis over a grid of scenarios")
+    parser.add_argument('--nace', nargs = '+', default = [analysis.NACE_CODE],
+                        help = "NACE codes to analyse ('all' for every code in scraper_data)")
+    parser.add_argument('--countries', nargs = '+', default = ['eu_efta'],
+                        help = f"country sets: {', '.join(COUNTRY_SETS)} or comma-separated geo codes")
+    parser.add_argument('--nan-threshold', nargs = '+', type = float, default = [analysis.NAN_THRESHOLD],
+                        help = "maximum share of missing entries per metric for a country to be kept [%%]")
+    parser.add_argument('--window', nargs = '+', type = parse_window, default = [analysis.CAGR_WINDOW],
+                        help = "CAGR windows as START-END")
+    parser.add_argument('--workers', type = int, default = BATCH_WORKERS,
+                        help = "processes running scenarios")
+    parser.add_argument('--aggregate', choices = AGGREGATES, default = analysis.CELL_AGGREGATE,
+                        help = "combine repeated (country, year) rows of the scraper data (by default they fail a scenario)")
+    args = parser.parse_args()
+    if args.nace == ['all']:
+        args.nace = sorted(read_dataset('scraper_data', columns = ['nace_r2'])['nace_r2'].unique())
+    run_batch(scenario_grid(args.nace, args.countries, args.nan_threshold, args.window), workers = args.workers,
+              aggregate = args.aggregate)
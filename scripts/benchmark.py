@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Benchmarks of the scraping and analysis phases on synthetic Eurostat-scale data
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import redirect_stdout
+import statistics
+import itertools
+import threading
+import tracemalloc
+import platform
+import tempfile
+import argparse
+import hashlib
+import string
+import copy
+import json
+import time
+import sys
+import gc
+import io
+import os
+
+import pandas as pd
+import numpy as np
+
+from figures import FigureRenderer
+from panel import Panel
+from storage import read_dataset, write_dataset
+from instrument import rows_of
+import analysis_code as analysis
+import scraper_code as scraper
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_PATH = os.path.join(BASE_DIR, '..', 'data', 'benchmarks')
+BASELINE_FILE = os.path.join(BENCHMARK_PATH, 'baseline.json')
+
+# Synthetic data sizes: countries × years × NACE codes
+SIZES = {'small': (10, 10, 3),
+         'eurostat': (45, 19, 30),
+         'large': (200, 40, 60)}
+FIRST_YEAR = 2005
+MISSING_SHARE = 0.05
+SEED = 20261017
+
+# Timing repeats and regression tolerances (relative to the baseline)
+REPEATS = 3
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+MIN_TIME_DELTA = 0.01
+DIGEST_DIGITS = 10
+
+# Units and positions of the synthetic JSON-stat cubes
+JSONSTAT_UNITS = {'htec_sti_exp2': {'unit': ['MIO_EUR', 'PC_TOT']},
+                  'htec_sti_pers2': {'unit': ['FTE', 'HC'], 'prof_pos': ['RSE', 'TOTAL']}}
+
+# Series of the DBnomics rd_p_bempoccr2 export, one column per series and country
+FEM2_EXPORT_SERIES = ['A.F.G-N.RSE.FTE', 'A.T.G-N.RSE.FTE', 'A.T.G-N.TOTAL.FTE', 'A.F.G-N.RSE.HC',
+                      'A.F.G-N.TOTAL.HC', 'A.T.G-N.RSE.HC', 'A.T.G-N.TOTAL.HC']
+
+# Functions
+def country_codes(n):
+    """``n`` distinct upper-case geo codes (two letters, three beyond 676 countries)"""
+    length = 2 if n <= 26 ** 2 else 3
+    return ["".join(c) for c in itertools.islice(itertools.product(string.ascii_uppercase, repeat = length), n)]
+
+def nace_codes(n):
+    """``n`` NACE codes, starting with the analysed one"""
+    return [analysis.NACE_CODE] + [f"S{i:02d}" for i in range(1, n)]
+
+def synthetic_jsonstat(code, n_countries, n_years, n_naces, missing = MISSING_SHARE, seed = SEED):
+    """Raw body of a JSON-stat 2.0 cube shaped like a Eurostat htec_sti_* dataset.
+
+    Values are sent as a sparse dict with ``missing`` of the cells left out,
+    as the Eurostat API does for unavailable observations.
+    """
+    rng = np.random.default_rng([seed, n_countries, n_years, n_naces, len(code)])
+    dimensions = {'freq': ['A'], **JSONSTAT_UNITS[code], 'nace_r2': nace_codes(n_naces),
+                  'geo': country_codes(n_countries),
+                  'time': [str(FIRST_YEAR + t) for t in range(n_years)]}
+    size = [len(codes) for codes in dimensions.values()]
+    n = int(np.prod(size))
+    values = np.round(rng.lognormal(7, 1.5, n), 1)
+    positions = np.flatnonzero(rng.random(n) >= missing)
+
+    payload = {
+        'version': '2.0', 'class': 'dataset', 'label': f"Synthetic {code}", 'source': 'ESTAT',
+        'updated': '2026-10-17T00:00:00+0200',
+        'id': list(dimensions), 'size': size,
+        'dimension': {dim: {'label': dim, 'category': {'index': {c: i for i, c in enumerate(codes)}}}
+                      for dim, codes in dimensions.items()},
+        'value': dict(zip(map(str, positions.tolist()), values[positions].tolist()))}
+    return json.dumps(payload).encode('utf-8')
+
+def synthetic_fem2(n_countries, n_years, missing = MISSING_SHARE, seed = SEED):
+    """DBnomics-style wide export of rd_p_bempoccr2: a period column and one column per series and country"""
+    rng = np.random.default_rng([seed, n_countries, n_years])
+    geos = country_codes(n_countries)
+    columns = [f"Annual – {series} – {geo} (Eurostat/rd_p_bempoccr2/{series}.{geo})"
+               for series in FEM2_EXPORT_SERIES for geo in geos]
+    values = np.round(rng.lognormal(6, 1.5, (n_years, len(columns))), 1)
+    values[rng.random(values.shape) < missing] = np.nan
+    data = pd.DataFrame(values, columns = columns)
+    data.insert(0, 'period', np.arange(FIRST_YEAR, FIRST_YEAR + n_years))
+    return data
+
+def synthetic_scraper_data(n_countries, n_years, n_naces, missing = MISSING_SHARE, seed = SEED):
+    """Panel shaped like scraper_data.csv and the matching EU + EFTA countries list"""
+    rng = np.random.default_rng([seed, n_countries, n_years, n_naces])
+    geos, naces = country_codes(n_countries), nace_codes(n_naces)
+    n = n_naces * n_countries * n_years
+    researchers = rng.lognormal(7, 1.5, n)
+    columns = {'pers2_FTE_RSE': researchers,
+               'pers2_FTE_TOTAL': researchers * rng.uniform(1.2, 2.5, n),
+               'pers2_HC_RSE': researchers * rng.uniform(1.0, 1.5, n),
+               'pers2_HC_TOTAL': researchers * rng.uniform(1.5, 3.0, n),
+               'exp2_MIO_EUR': researchers * rng.uniform(0.05, 0.2, n),
+               'exp2_PC_TOT': rng.uniform(0, 100, n),
+               'fem2_FTE_RSE': researchers * rng.uniform(0.1, 0.6, n)}
+
+    data = pd.DataFrame({
+        'nace_r2': pd.Categorical(np.repeat(naces, n_countries * n_years), categories = naces),
+        'geo': pd.Categorical(np.tile(np.repeat(geos, n_years), n_naces), categories = geos),
+        'time': np.tile(np.arange(FIRST_YEAR, FIRST_YEAR + n_years, dtype = np.int32), n_naces * n_countries)})
+    for name, values in columns.items():
+        values[rng.random(n) < missing] = np.nan
+        data[name] = np.round(values, 1)
+    euefta = pd.DataFrame({'Country': [f"Country {geo}" for geo in geos], 'geo': geos})
+    return data, euefta
+
+class FixtureServer:
+    """Local HTTP server answering every request for ``/<code>`` with a fixed body"""
+
+    def __init__(self, bodies):
+        bodies = {f"/{code}": body for code, body in bodies.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = bodies.get(self.path.split('?')[0])
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def rounded(values, digits = DIGEST_DIGITS):
+    """Floats rounded to ``digits`` significant digits, so digests ignore last-bit differences"""
+    values = np.asarray(values, dtype = np.float64)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        scale = 10.0 ** (digits - 1 - np.floor(np.log10(np.abs(values))))
+        return np.where(np.isfinite(scale), np.round(values * scale) / scale, values)
+
+def result_digest(result):
+    """Hash of a phase result: frames, panels, arrays, bytes and containers of them"""
+    h = hashlib.sha256()
+    if isinstance(result, pd.DataFrame):
+        h.update(repr(list(result.columns)).encode('utf-8'))
+        for name in result.columns:
+            column = result[name]
+            if pd.api.types.is_float_dtype(column):
+                column = pd.Series(rounded(column))
+            h.update(pd.util.hash_pandas_object(column, index = False).to_numpy().tobytes())
+    elif isinstance(result, Panel):
+        h.update(repr([list(result.countries), list(result.metrics)]).encode('utf-8'))
+        h.update(rounded(result.values).tobytes() + result.complete.tobytes())
+        h.update(result_digest(result.aggregates).encode('utf-8'))
+    elif isinstance(result, np.ndarray):
+        h.update(rounded(result).tobytes())
+    elif isinstance(result, bytes):
+        h.update(result)
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            h.update(f"{key}:{result_digest(value)}".encode('utf-8'))
+    elif isinstance(result, (tuple, list)):
+        for value in result:
+            h.update(result_digest(value).encode('utf-8'))
+    else:
+        h.update(repr(result).encode('utf-8'))
+    return h.hexdigest()
+
+def measure(func, args, repeats = REPEATS):
+    """Time ``func(*args)`` over several runs on fresh copies of ``args``, then trace its peak memory once.
+
+    The phase printouts are swallowed. Returns the last result and its
+    statistics: median and minimum wall time, peak traced allocation, rows in
+    and out, and a digest of the result.
+    """
+    times = []
+    for _ in range(repeats):
+        fresh = copy.deepcopy(args)
+        gc.collect()
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*fresh)
+            times.append(time.perf_counter() - start)
+
+    fresh = copy.deepcopy(args)
+    gc.collect()
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        func(*fresh)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, {'seconds': statistics.median(times), 'min_seconds': min(times), 'peak_bytes': peak,
+                    'rows_in': rows_of(args), 'rows_out': rows_of(result),
+                    'digest': result_digest(result)}
+
+def scraper_phases(size, work_path):
+    """Scraping phases on synthetic JSON-stat bodies served locally and a synthetic DBnomics export"""
+    n_countries, n_years, n_naces = size
+    bodies = {code: synthetic_jsonstat(code, n_countries, n_years, n_naces) for code in scraper.EUROSTAT_DATASETS}
+    fem2_path = os.path.join(work_path, 'rd_p_bempoccr2.csv')
+    synthetic_fem2(n_countries, n_years).to_csv(fem2_path, index = False)
+
+    with FixtureServer(bodies) as server:
+        yield 'fetch_datasets', lambda: scraper.fetch_datasets(base_url = server.url), ()
+    yield 'decode_datasets', scraper.decode_datasets, (bodies,)
+    datasets = scraper.decode_datasets(bodies)
+    yield 'extract_fem2_data', scraper.extract_fem2_data, (fem2_path,)
+    with redirect_stdout(io.StringIO()):
+        data_fem2 = scraper.extract_fem2_data(fem2_path)
+    yield 'process_datasets', scraper.process_datasets, (datasets['htec_sti_exp2'], datasets['htec_sti_pers2'])
+    with redirect_stdout(io.StringIO()):
+        wide = scraper.process_datasets(datasets['htec_sti_exp2'], datasets['htec_sti_pers2'])
+    yield 'merge_datasets', lambda *a: scraper.merge_datasets(*a, save = False), (*wide, data_fem2)
+
+def analysis_phases(size, work_path):
+    """Storage and analysis phases on a synthetic scraper_data panel"""
+    data, euefta = synthetic_scraper_data(*size)
+    figures = FigureRenderer(enabled = False)
+
+    yield 'write_dataset', lambda d: write_dataset(d, 'scraper_data', path = work_path), (data,)
+    write_dataset(data, 'scraper_data', path = work_path)
+    read = lambda: read_dataset('scraper_data', columns = analysis.ANALYSIS_COLUMNS,
+                                filters = [('nace_r2', '==', analysis.NACE_CODE)], path = work_path)
+    yield 'read_dataset', read, ()
+    df = read()
+
+    steps = [('filter_and_rename_variables', lambda d: analysis.filter_and_rename_variables(d, euefta)),
+             ('review_missing_data', lambda d: analysis.review_missing_data(d, figures)),
+             ('build_panel', analysis.build_panel),
+             ('calculate_efficiency_metrics', lambda p: analysis.calculate_efficiency_metrics(p, figures)),
+             ('calculate_female_share', lambda p: analysis.calculate_female_share(p, figures)),
+             ('calculate_correlations', lambda p: analysis.calculate_correlations(p, figures, workers = 1)[0]),
+             ('calculate_growth_rates', lambda p: analysis.calculate_growth_rates(p, figures, workers = 1))]
+    state = df
+    for name, func in steps:
+        yield name, func, (state,)
+        with redirect_stdout(io.StringIO()):
+            state = func(copy.deepcopy(state))
+        if isinstance(state, tuple):
+            state = state[0]
+
+def run_benchmarks(size, suites = ('scraper', 'analysis'), repeats = REPEATS):
+    """Measure every phase of the selected suites at one synthetic size"""
+    results = {}
+    with tempfile.TemporaryDirectory() as work_path:
+        for suite in suites:
+            phases = scraper_phases(size, work_path) if suite == 'scraper' else analysis_phases(size, work_path)
+            for name, func, args in phases:
+                _, stats = measure(func, args, repeats)
+                results[f"{suite}.{name}"] = stats
+                print(f"  - {suite}.{name}: {stats['seconds'] * 1000:,.1f} ms, "
+                      f"peak {stats['peak_bytes'] / 1024 ** 2:,.1f} MiB, rows {stats['rows_in'] or '–'} → {stats['rows_out'] or '–'}")
+    return results
+
+def compare(results, baseline, time_tolerance = TIME_TOLERANCE, memory_tolerance = MEMORY_TOLERANCE):
+    """Regression flags of every phase against its baseline measurement"""
+    flags = {}
+    for phase, stats in results.items():
+        base = baseline.get(phase)
+        if base is None:
+            continue
+        phase_flags = []
+        # The fastest run is the least noisy estimate of a phase's cost
+        if (stats['min_seconds'] > base['min_seconds'] * (1 + time_tolerance)
+                and stats['min_seconds'] - base['min_seconds'] > MIN_TIME_DELTA):
+            phase_flags.append(f"time {base['min_seconds'] * 1000:,.1f} → {stats['min_seconds'] * 1000:,.1f} ms")
+        if stats['peak_bytes'] > base['peak_bytes'] * (1 + memory_tolerance):
+            phase_flags.append(f"memory {base['peak_bytes'] / 1024 ** 2:,.1f} → {stats['peak_bytes'] / 1024 ** 2:,.1f} MiB")
+        if stats['digest'] != base['digest']:
+            phase_flags.append("result differs")
+        if phase_flags:
+            flags[phase] = phase_flags
+    return flags
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+def load_baselines(path = BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding = 'utf-8') as f:
+        return json.load(f)
+
+def save_baselines(baselines, path = BASELINE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, 'w', encoding = 'utf-8') as f:
+        json.dump(baselines, f, indent = 2)
+
+def parse_size(text):
+    """A named size or COUNTRIESxYEARSxNACES"""
+    if text in SIZES:
+        return text, SIZES[text]
+    return text, tuple(int(n) for n in text.lower().split('x'))
+
+def main(sizes = (parse_size('small'),), suites = ('scraper', 'analysis'), repeats = REPEATS, save_baseline = False,
+         baseline_path = BASELINE_FILE, time_tolerance = TIME_TOLERANCE, memory_tolerance = MEMORY_TOLERANCE):
+    baselines = load_baselines(baseline_path)
+    regressions = 0
+    for label, size in sizes:
+        print(f"---- Benchmark '{label}': {size[0]} countries × {size[1]} years × {size[2]} NACE codes")
+        results = run_benchmarks(size, suites, repeats)
+
+        baseline = baselines.get(label)
+        if save_baseline:
+            baselines[label] = {'size': list(size), 'environment': environment(), 'phases': results}
+            print("✓ Baseline saved")
+        elif baseline is None:
+            print("• No baseline stored for this size (run with --save-baseline)")
+        else:
+            flags = compare(results, baseline['phases'], time_tolerance, memory_tolerance)
+            for phase, phase_flags in flags.items():
+                print(f"  ✗ {phase}: {'; '.join(phase_flags)}")
+            if not flags:
+                print("✓ No regressions against the baseline")
+            regressions += len(flags)
+        print()
+
+    if save_baseline:
+        save_baselines(baselines, baseline_path)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the pipeline phases on synthetic data")
+    parser.add_argument('--size', nargs = '+', type = parse_size, default = [parse_size('small')],
+                        help = f"sizes: {', '.join(SIZES)} or COUNTRIESxYEARSxNACES")
+    parser.add_argument('--suite', nargs = '+', choices = ['scraper', 'analysis'], default = ['scraper', 'analysis'])
+    parser.add_argument('--repeats', type = int, default = REPEATS, help = "timed runs per phase")
+    parser.add_argument('--save-baseline', action = 'store_true', help = "store the results as the new baseline")
+    parser.add_argument('--baseline', default = BASELINE_FILE, help = "baseline file")
+    parser.add_argument('--time-tolerance', type = float, default = TIME_TOLERANCE,
+                        help = "relative slow-down flagged as a regression")
+    parser.add_argument('--memory-tolerance', type = float, default = MEMORY_TOLERANCE,
+                        help = "relative peak memory growth flagged as a regression")
+    args = parser.parse_args()
+    sys.exit(1 if main(args.size, args.suite, args.repeats, args.save_baseline, args.baseline,
+                       args.time_tolerance, args.memory_tolerance) else 0)
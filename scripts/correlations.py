@@ -0,0 +1,111 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import pandas as pd
+import numpy as np
+
+ALPHA = 0.05
+RESULT_COLUMNS = ['x', 'y', 'n', 'pearson_r', 'pearson_p', 'spearman_rho', 'spearman_p',
+                  'slope', 'intercept', 'normality_x_p', 'normality_y_p', 'test', 'stat', 'p']
+
+# Functions
+def padded_groups(df, key, columns):
+    """Group labels and a group × observation × column array padded with NaN"""
+    codes, groups = pd.factorize(df[key])
+    position = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    cube = np.full((len(groups), position.max() + 1 if len(position) else 0, len(columns)), np.nan)
+    cube[codes, position] = df[columns].to_numpy(dtype = np.float64)
+    return groups, cube
+
+def masked_moments(x, y):
+    """Row-wise count, means and centred sums of squares / products of NaN-padded arrays"""
+    mask = ~np.isnan(x)
+    n = mask.sum(axis = 1)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        mean_x = np.where(mask, x, 0).sum(axis = 1) / n
+        mean_y = np.where(mask, y, 0).sum(axis = 1) / n
+    dx = np.where(mask, x - mean_x[:, None], 0)
+    dy = np.where(mask, y - mean_y[:, None], 0)
+    return n, mean_x, mean_y, (dx * dx).sum(axis = 1), (dy * dy).sum(axis = 1), (dx * dy).sum(axis = 1)
+
+def correlation_pvalue(r, n):
+    """Two-sided p-value of a correlation coefficient under the t distribution"""
+    from scipy import stats
+    dof = n - 2
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        t = r * np.sqrt(dof / ((1 - r) * (1 + r)))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    return np.where(dof > 0, p, np.nan)
+
+def pearson(x, y):
+    """Row-wise Pearson r and p-value of NaN-padded arrays"""
+    n, _, _, sxx, syy, sxy = masked_moments(x, y)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        r = np.clip(sxy / np.sqrt(sxx * syy), -1, 1)
+    return r, correlation_pvalue(r, n)
+
+def ols(x, y):
+    """Row-wise least-squares slope and intercept of y on x"""
+    _, mean_x, mean_y, sxx, _, sxy = masked_moments(x, y)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        slope = sxy / sxx
+    return slope, mean_y - slope * mean_x
+
+def normality(x, min_size = 3):
+    """Row-wise Shapiro-Wilk p-values (NaN for rows with fewer than ``min_size`` values)"""
+    from scipy import stats
+    p = np.full(len(x), np.nan)
+    rows = (~np.isnan(x)).sum(axis = 1) >= min_size
+    if rows.any():
+        p[rows] = stats.shapiro(x[rows], axis = 1, nan_policy = 'omit').pvalue
+    return p
+
+def correlate(df, pairs, key = 'Country', alpha = ALPHA):
+    """Correlation screen of metric pairs within every group, in array operations.
+
+    For each (x, y) pair the rows where both are present are padded into a
+    group × observation matrix, from which Pearson r, Spearman rho (Pearson on
+    average ranks), the OLS fit of y on x and Shapiro-Wilk normality of both
+    metrics are computed for all groups at once. ``test`` names the test the
+    analysis reports: Spearman if either metric fails normality at ``alpha``,
+    Pearson otherwise. Returns one row per group and pair.
+    """
+    from scipy import stats
+    columns = list(dict.fromkeys(col for pair in pairs for col in pair))
+    groups, cube = padded_groups(df, key, columns)
+
+    results = []
+    for x_name, y_name in pairs:
+        x = cube[:, :, columns.index(x_name)]
+        y = cube[:, :, columns.index(y_name)]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x, y = np.where(valid, x, np.nan), np.where(valid, y, np.nan)
+        n = valid.sum(axis = 1)
+
+        pearson_r, pearson_p = pearson(x, y)
+        spearman_rho, spearman_p = pearson(stats.rankdata(x, axis = 1, nan_policy = 'omit'),
+                                           stats.rankdata(y, axis = 1, nan_policy = 'omit'))
+        slope, intercept = ols(x, y)
+        normality_x_p, normality_y_p = normality(x), normality(y)
+        normal = (normality_x_p > alpha) & (normality_y_p > alpha)
+
+        result = pd.DataFrame({key: groups, 'x': x_name, 'y': y_name, 'n': n,
+                               'pearson_r': pearson_r, 'pearson_p': pearson_p,
+                               'spearman_rho': spearman_rho, 'spearman_p': spearman_p,
+                               'slope': slope, 'intercept': intercept,
+                               'normality_x_p': normality_x_p, 'normality_y_p': normality_y_p,
+                               'test': np.where(normal, 'pearson', 'spearman'),
+                               'stat': np.where(normal, pearson_r, spearman_rho),
+                               'p': np.where(normal, pearson_p, spearman_p)})
+        results.append(result[n > 0])
+
+    return pd.concat(results, ignore_index = True)[[key] + RESULT_COLUMNS]
@@ -0,0 +1,125 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from urllib.parse import urlencode
+import json
+
+import pandas as pd
+import numpy as np
+
+# DBnomics API
+DBNOMICS_API_URL = "https://api.db.nomics.world/v22"
+PAGE_LIMIT = 1000
+
+# Series id at the end of a wide-export header: "... (<provider>/<dataset>/<series code>)"
+SERIES_PATTERN = r'\((?P<provider>[^/()]+)/(?P<dataset>[^/()]+)/(?P<series>[^/()]+)\)$'
+PERIOD_COLUMN = 'period'
+
+# Functions
+def parse_headers(columns, dimensions):
+    """Dimension codes of every series column of a DBnomics wide export, parsed in one pass.
+
+    Returns a frame indexed by column name with provider, dataset, series
+    code and one column per name in ``dimensions`` (the dot-separated parts
+    of the series code, in order). Columns without a series id (the period)
+    are left out.
+    """
+    headers = pd.Series(list(columns), index = list(columns))
+    parsed = headers.str.extract(SERIES_PATTERN).dropna()
+    parts = parsed['series'].str.split('.', expand = True)
+    if parts.shape[1] != len(dimensions):
+        raise ValueError(f"Series codes have {parts.shape[1]} parts, expected {len(dimensions)}: {dimensions}")
+    parts.columns = list(dimensions)
+    return pd.concat([parsed, parts], axis = 1)
+
+def select_series(series, select = None):
+    """Rows of a parsed header frame whose dimensions match ``select`` (dimension -> code or codes)"""
+    keep = pd.Series(True, index = series.index)
+    for dim, codes in (select or {}).items():
+        keep &= series[dim].isin([codes] if isinstance(codes, str) else list(codes))
+    return series[keep]
+
+def stack_block(periods, values, series, dimensions, dropna = True):
+    """Long frame of a periods × series value block, built by repeating and tiling the axes"""
+    n_periods, n_series = values.shape
+    values = values.reshape(-1)
+    keep = ~np.isnan(values) if dropna else np.ones(len(values), dtype = bool)
+    data = {dim: pd.Categorical(np.tile(series[dim].to_numpy(), n_periods)[keep]) for dim in dimensions}
+    data['time'] = np.repeat(np.asarray(periods).astype(str), n_series)[keep]
+    data['value'] = values[keep]
+    return pd.DataFrame(data)
+
+def read_wide_csv(path, dimensions, select = None, chunksize = None, dropna = True):
+    """Read a DBnomics wide CSV export into a long frame (dimensions, time, value).
+
+    The header is parsed once and only the columns of the selected series are
+    read, so series DBnomics adds or drops are picked up by code rather than
+    by position. With ``chunksize`` the periods are read in blocks of that
+    many rows.
+    """
+    columns = pd.read_csv(path, nrows = 0).columns
+    series = select_series(parse_headers(columns, dimensions), select)
+    usecols = [PERIOD_COLUMN] + list(series.index)
+    reader = pd.read_csv(path, usecols = usecols, chunksize = chunksize,
+                         dtype = {col: np.float64 for col in series.index})
+    chunks = reader if chunksize else [reader]
+    frames = [stack_block(chunk[PERIOD_COLUMN].to_numpy(), chunk[list(series.index)].to_numpy(),
+                          series, dimensions, dropna) for chunk in chunks]
+    return concat_long(frames, dimensions)
+
+def concat_long(frames, dimensions):
+    """Concatenate long frames, keeping the dimension columns categorical"""
+    if not frames:
+        return pd.DataFrame({**{dim: pd.Categorical([]) for dim in dimensions},
+                             'time': pd.Series([], dtype = object), 'value': pd.Series([], dtype = np.float64)})
+    data = pd.concat(frames, ignore_index = True)
+    return data.astype({dim: 'category' for dim in dimensions})
+
+def series_url(provider, dataset, select = None, base_url = DBNOMICS_API_URL, limit = PAGE_LIMIT, offset = 0):
+    """DBnomics API URL of one page of the series of a dataset, with their observations"""
+    params = [('observations', '1'), ('format', 'json'), ('limit', str(limit)), ('offset', str(offset))]
+    if select:
+        dims = {dim: [codes] if isinstance(codes, str) else sorted(codes) for dim, codes in select.items()}
+        params.append(('dimensions', json.dumps(dims, separators = (',', ':'), sort_keys = True)))
+    return f"{base_url}/series/{provider}/{dataset}?{urlencode(params)}"
+
+def fetch_series_pages(session, provider, dataset, select = None, base_url = DBNOMICS_API_URL,
+                       limit = PAGE_LIMIT, timeout = None):
+    """Download every page of a DBnomics series query as raw JSON bodies"""
+    pages, offset = [], 0
+    while True:
+        response = session.get(series_url(provider, dataset, select, base_url, limit, offset), timeout = timeout)
+        response.raise_for_status()
+        pages.append(response.content)
+        found = json.loads(response.content)['series']
+        offset += limit
+        if offset >= found['num_found'] or not found['docs']:
+            return pages
+
+def decode_series_pages(pages, dimensions, dropna = True):
+    """Long frame (dimensions, time, value) of the series in DBnomics API JSON pages"""
+    docs = [doc for page in pages for doc in json.loads(page)['series']['docs']]
+    if not docs:
+        return concat_long([], dimensions)
+    lengths = np.array([len(doc['period']) for doc in docs])
+    owner = np.repeat(np.arange(len(docs)), lengths)
+    values = pd.to_numeric(pd.Series([v for doc in docs for v in doc['value']], dtype = object),
+                           errors = 'coerce').to_numpy(dtype = np.float64)
+    keep = ~np.isnan(values) if dropna else np.ones(len(values), dtype = bool)
+
+    data = {}
+    for dim in dimensions:
+        codes = np.array([doc['dimensions'][dim] for doc in docs], dtype = object)
+        data[dim] = pd.Categorical(codes[owner][keep])
+    data['time'] = np.array([p for doc in docs for p in doc['period']], dtype = object)[keep]
+    data['value'] = values[keep]
+    return pd.DataFrame(data)
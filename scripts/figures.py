@@ -0,0 +1,162 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_PATH = os.path.join(BASE_DIR, '..', 'assets', 'fonts', 'Ubuntu-Regular.ttf')
+STYLE_PATH = os.path.join(BASE_DIR, 'custom.mplstyle')
+FIGURES_PATH = os.path.join(BASE_DIR, '..', 'figures')
+
+FIGURE_WORKERS = min(4, os.cpu_count() or 1)
+
+# Functions
+def figure_spec(kind, name, data, figsize = (7,4), **options):
+    """Lightweight, picklable description of one figure: what to draw from which data"""
+    return {'kind': kind, 'name': name, 'data': data, 'figsize': figsize, 'options': options}
+
+def setup_style(style_path = STYLE_PATH, font_path = FONT_PATH):
+    """Switch matplotlib to Agg and load the project style and Ubuntu font (once per process)"""
+    import matplotlib
+    matplotlib.use('Agg', force = True)
+    import matplotlib.pyplot as plt
+    import matplotlib.font_manager as fm
+
+    plt.style.use(style_path)
+    if os.path.exists(font_path):
+        fe = fm.FontEntry(
+            fname = font_path,
+            name = 'ProjectUbuntu'
+        )
+        fm.fontManager.ttflist.insert(0, fe)
+        plt.rcParams['font.family'] = fe.name
+    else:
+        print("Warning: Font file not found. Falling back to sans-serif.")
+        plt.rcParams['font.family'] = 'sans-serif'
+
+def draw_line(ax, data, x, y, hue, title, xlabel, ylabel, legend, title_loc = 'center',
+              plot_kws = None, yticks = None):
+    import seaborn as sns
+    plot_kws = plot_kws or {}
+    sns.lineplot(data = data, x = x, y = y, hue = hue, ax = ax, **plot_kws)
+    ax.set_title(title, loc = title_loc)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.legend(**legend)
+    if yticks is not None:
+        ax.set_yticks(*yticks)
+
+def draw_bar(ax, data, x, y, hue, title, xlabel, ylabel, legend):
+    import seaborn as sns
+    sns.barplot(data = data, x = x, y = y, hue = hue, ax = ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.legend(**legend)
+
+def draw_nan_panels(axes, data, title):
+    """One bar panel of NaN percentages per country for every metric"""
+    import seaborn as sns
+    for ax, metric in zip(axes, data['metrics'].unique()):
+        sns.barplot(data = data[data['metrics'] == metric], x = 'Country', y = 'value', ax = ax)
+
+        ax.set_title(f"Metric: {metric}")
+        ax.set_ylabel("NaN entries [%]")
+        ax.set_xlabel("Country")
+
+        ax.set_ylim(0, 100)
+        ax.set_yticks([0, 20, 40, 60, 80, 100])
+
+        ax.tick_params(axis = 'x', rotation = 90)
+    axes[0].figure.suptitle(title, y = 1.005)
+
+def draw_scatter_fit(ax, data, fits, x, y, hue, title, xlabel, ylabel, legend, alpha = 0.05):
+    """Scatter of two metrics with one fitted line per group (dotted when not significant)"""
+    import seaborn as sns
+    sns.scatterplot(data = data, x = x, y = y, hue = hue, ax = ax, s = 20)
+    for row in fits.itertuples():
+        x_lims = ax.get_xlim()
+        X_plot = np.linspace(x_lims[0] + 0.05, x_lims[1] - 0.05, 100)
+        line_style = '-' if row.p <= alpha else ':'
+        ax.plot(X_plot, row.slope * X_plot + row.intercept, linestyle = line_style)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.legend(**legend)
+
+def render_figure(spec, path = FIGURES_PATH):
+    """Draw one figure spec and save it as ``<name>.png``"""
+    import matplotlib.pyplot as plt
+
+    plt.close('all')
+    options = dict(spec['options'])
+    if spec['kind'] == 'nan_panels':
+        n_panels = spec['data']['metrics'].nunique()
+        fig, axes = plt.subplots(n_panels, 1, figsize = spec['figsize'], sharey = True, squeeze = False)
+        draw_nan_panels(list(axes[:, 0]), spec['data'], **options)
+    else:
+        fig, ax = plt.subplots(figsize = spec['figsize'])
+        RENDERERS[spec['kind']](ax, spec['data'], **options)
+
+    fig.tight_layout()
+    fig.savefig(os.path.join(path, f"{spec['name']}.png"))
+    plt.close(fig)
+    return spec['name']
+
+RENDERERS = {'line': draw_line, 'bar': draw_bar, 'scatter_fit': draw_scatter_fit}
+
+class FigureRenderer:
+    """Renders figure specs as the analysis phases emit them.
+
+    With several workers the figures are drawn in a process pool whose workers
+    load the style and font once; with one worker they are drawn in-process.
+    A disabled renderer drops every spec, for runs that only need the data.
+    """
+
+    def __init__(self, path = FIGURES_PATH, workers = FIGURE_WORKERS, enabled = True):
+        self.path = path
+        self.workers = workers
+        self.enabled = enabled
+        self.executor = None
+        self.pending = []
+        self.styled = False
+
+    def submit(self, spec):
+        if not self.enabled:
+            return
+        if self.workers > 1:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers = self.workers, initializer = setup_style)
+            self.pending.append(self.executor.submit(render_figure, spec, self.path))
+        else:
+            if not self.styled:
+                setup_style()
+                self.styled = True
+            print(f"✓ Saved: {render_figure(spec, self.path)}")
+
+    def close(self):
+        """Wait for the submitted figures and report them in submission order"""
+        for future in self.pending:
+            print(f"✓ Saved: {future.result()}")
+        self.pending = []
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,151 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import threading
+import hashlib
+import json
+import time
+import os
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(BASE_DIR, '..', 'data', 'http_cache')
+CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+# Functions
+def sha256_bytes(body):
+    return hashlib.sha256(body).hexdigest()
+
+def sha256_file(path, chunk_size = 1024 ** 2):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResponseCache:
+    """Content-addressed on-disk store of HTTP response bodies with their validators.
+
+    Bodies live in ``objects/<sha256>``, and ``index.json`` maps each URL to the
+    object hash, its ETag / Last-Modified headers and the last access time.
+    Once the stored objects exceed ``max_bytes`` the least recently used
+    entries are evicted. Markers record which inputs a derived file was built
+    from, so unchanged runs can skip rebuilding it.
+    """
+
+    def __init__(self, path = CACHE_PATH, max_bytes = CACHE_MAX_BYTES):
+        self.path = path
+        self.objects_path = os.path.join(path, 'objects')
+        self.index_path = os.path.join(path, 'index.json')
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.objects_path, exist_ok = True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding = 'utf-8') as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'entries': {}, 'markers': {}}
+
+    def _object_path(self, sha):
+        return os.path.join(self.objects_path, sha)
+
+    def entry(self, url):
+        with self.lock:
+            return self.index['entries'].get(url)
+
+    def validators(self, url):
+        """Conditional-GET headers for a cached URL"""
+        entry = self.entry(url)
+        if entry is None or not os.path.exists(self._object_path(entry['sha256'])):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get(self, url):
+        with self.lock:
+            entry = self.index['entries'].get(url)
+            if entry is None:
+                return None
+            entry['accessed'] = time.time()
+            sha = entry['sha256']
+        try:
+            with open(self._object_path(sha), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, body, etag = None, last_modified = None):
+        """Store a response body and return True if it differs from the cached one"""
+        sha = sha256_bytes(body)
+        object_path = self._object_path(sha)
+        if not os.path.exists(object_path):
+            tmp_path = f"{object_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, object_path)
+
+        with self.lock:
+            previous = self.index['entries'].get(url)
+            self.index['entries'][url] = {'sha256': sha,
+                                          'etag': etag,
+                                          'last_modified': last_modified,
+                                          'size': len(body),
+                                          'accessed': time.time()}
+            self._evict(keep = url)
+        return previous is None or previous['sha256'] != sha
+
+    def _evict(self, keep = None):
+        entries = self.index['entries']
+        sizes = {e['sha256']: e['size'] for e in entries.values()}
+        total = sum(sizes.values())
+        for url in sorted(entries, key = lambda u: entries[u]['accessed']):
+            if total <= self.max_bytes:
+                break
+            if url == keep:
+                continue
+            sha = entries.pop(url)['sha256']
+            if all(e['sha256'] != sha for e in entries.values()):
+                total -= sizes[sha]
+                try:
+                    os.remove(self._object_path(sha))
+                except FileNotFoundError:
+                    pass
+
+    def marker(self, name):
+        with self.lock:
+            return self.index['markers'].get(name)
+
+    def set_marker(self, name, value):
+        with self.lock:
+            self.index['markers'][name] = value
+
+    def stage_marker(self, name, value):
+        """Remember a marker that only becomes current once commit_marker() is called"""
+        with self.lock:
+            self.index.setdefault('staged', {})[name] = value
+
+    def commit_marker(self, name):
+        with self.lock:
+            value = self.index.setdefault('staged', {}).pop(name, None)
+            if value is not None:
+                self.index['markers'][name] = value
+
+    def save(self):
+        with self.lock:
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding = 'utf-8') as f:
+                json.dump(self.index, f, indent = 1)
+            os.replace(tmp_path, self.index_path)
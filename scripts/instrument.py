@@ -0,0 +1,278 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import threading
+import resource
+import json
+import time
+import uuid
+import sys
+import os
+
+import pandas as pd
+
+from panel import Panel
+from options import PROFILERS
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_PATH = os.path.join(BASE_DIR, '..', 'data', 'metrics')
+PROFILE_PATH = os.path.join(METRICS_PATH, 'profiles')
+
+# Spans measured with process-wide counters (RSS, CPU, I/O); calls made from
+# worker threads (http, browser) only record their own wall time and payload
+PROCESS_KINDS = ['phase', 'stage']
+
+# Prometheus gauges written from every record: metric name -> (record field, help)
+PROMETHEUS_METRICS = {
+    'pipeline_span_wall_seconds': ('wall_seconds', "Wall time of a pipeline phase or call"),
+    'pipeline_span_cpu_seconds': ('cpu_seconds', "CPU time of the process during a phase"),
+    'pipeline_span_peak_rss_bytes': ('peak_rss_bytes', "Peak resident set size during a phase"),
+    'pipeline_span_rows_in': ('rows_in', "Rows of the first frame a phase received"),
+    'pipeline_span_rows_out': ('rows_out', "Rows of the first frame a phase returned"),
+    'pipeline_span_bytes_read': ('bytes_read', "Bytes read from files, pipes and sockets"),
+    'pipeline_span_bytes_written': ('bytes_written', "Bytes written to files, pipes and sockets"),
+    'pipeline_span_errors': ('error_count', "1 when the phase or call raised")}
+
+_active = None
+
+# Functions
+def rows_of(obj):
+    """Rows of the first frame (or panel) found in a phase argument or result"""
+    if isinstance(obj, pd.DataFrame):
+        return len(obj)
+    if isinstance(obj, Panel):
+        return len(obj.countries) * len(obj.years)
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (tuple, list)):
+        for value in obj:
+            rows = rows_of(value)
+            if rows is not None:
+                return rows
+    return None
+
+def io_counters():
+    """Bytes read and written by the process so far (Linux /proc/self/io, else None)"""
+    try:
+        with open('/proc/self/io') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS watermark; False when the platform does not allow it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss():
+    """Peak resident set size in bytes since the last reset (or since start)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class Profiler:
+    """cProfile or pyinstrument session around one phase, dumped to ``<path>/<name>``"""
+
+    def __init__(self, kind, name, path = PROFILE_PATH):
+        self.kind = kind
+        self.path = os.path.join(path, name.replace('/', '_'))
+        if kind == 'cprofile':
+            import cProfile
+            self.profiler = cProfile.Profile()
+        elif kind == 'pyinstrument':
+            from pyinstrument import Profiler as PyinstrumentProfiler
+            self.profiler = PyinstrumentProfiler()
+        else:
+            raise ValueError(f"Unknown profiler '{kind}' (expected one of {PROFILERS})")
+
+    def __enter__(self):
+        self.profiler.start() if self.kind == 'pyinstrument' else self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        if self.kind == 'pyinstrument':
+            self.profiler.stop()
+            with open(f"{self.path}.html", 'w', encoding = 'utf-8') as f:
+                f.write(self.profiler.output_html())
+        else:
+            self.profiler.disable()
+            self.profiler.dump_stats(f"{self.path}.prof")
+
+class Instrument:
+    """Structured per-phase metrics of one pipeline run.
+
+    Every span records wall time and, for phases and stages, the CPU time of
+    its thread, peak RSS and bytes read/written by the process, plus rows
+    in/out when known. RSS and I/O are process-wide counters, so spans that
+    overlapped another one record them with 'process' scope.
+    Records are appended to a JSON lines file or rendered as a Prometheus
+    text file (``.prom``) when the run ends. With ``profile`` set, every
+    phase also runs under cProfile or pyinstrument.
+    """
+
+    def __init__(self, pipeline, path = None, profile = None, profile_path = PROFILE_PATH):
+        self.pipeline = pipeline
+        self.path = path
+        self.profile = profile
+        self.profile_path = profile_path
+        self.run = uuid.uuid4().hex[:12]
+        self.records = []
+        self.lock = threading.Lock()
+        self.live = []
+
+    @contextmanager
+    def span(self, name, kind = 'phase', rows_in = None):
+        """Measure the enclosed block; the yielded record can be completed (rows_out, bytes_read, ...)"""
+        record = {'run': self.run, 'pipeline': self.pipeline, 'kind': kind, 'name': name,
+                  'start': datetime.now(timezone.utc).isoformat(timespec = 'milliseconds'),
+                  'rows_in': rows_in, 'rows_out': None}
+        process = kind in PROCESS_KINDS
+        if process:
+            # Spans running at the same time (stages of a graph) share the process counters:
+            # the peak RSS is only reset when no other span is live, and overlapping spans
+            # report I/O and RSS with process scope
+            with self.lock:
+                for other in self.live:
+                    other['overlapped'] = True
+                record['overlapped'] = bool(self.live)
+                rss_reset = not self.live and reset_peak_rss()
+                self.live.append(record)
+            read, written = io_counters()
+            cpu = time.thread_time()
+        profiler = Profiler(self.profile, f"{self.pipeline}.{name}", self.profile_path) \
+            if process and self.profile else None
+        wall = time.perf_counter()
+        try:
+            if profiler is not None:
+                with profiler:
+                    yield record
+            else:
+                yield record
+            record['status'] = 'ok'
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall
+            if process:
+                record['cpu_seconds'] = time.thread_time() - cpu
+                record['peak_rss_bytes'] = peak_rss()
+                end_read, end_written = io_counters()
+                if read is not None:
+                    record.setdefault('bytes_read', end_read - read)
+                    record.setdefault('bytes_written', end_written - written)
+            with self.lock:
+                if process:
+                    self.live.remove(record)
+                    overlapped = record.pop('overlapped')
+                    record['peak_rss_scope'] = 'span' if rss_reset and not overlapped else 'process'
+                    record['io_scope'] = 'process' if overlapped else 'span'
+                self.records.append(record)
+
+    def call(self, name, func, *args, **kwargs):
+        """Run ``func(*args, **kwargs)`` as a phase, with rows in/out taken from its arguments and result"""
+        with self.span(name, 'phase', rows_of(args) or rows_of(kwargs)) as record:
+            result = func(*args, **kwargs)
+            record['rows_out'] = rows_of(result)
+        return result
+
+    def write(self, path = None):
+        """Append the records as JSON lines, or replace a Prometheus text file"""
+        path = path or self.path
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        if path.endswith('.prom'):
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w', encoding = 'utf-8') as f:
+                f.write(prometheus_text(self.records))
+            os.replace(tmp, path)
+        else:
+            with open(path, 'a', encoding = 'utf-8') as f:
+                for record in self.records:
+                    f.write(json.dumps(record) + "\n")
+
+    def __enter__(self):
+        global _active
+        self.previous, _active = _active, self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = self.previous
+        self.write()
+
+def prometheus_text(records):
+    """Prometheus text exposition of the records, one gauge sample per span name and field.
+
+    Repeated spans of the same name (retries, one span per request) are
+    aggregated into one sample: peak RSS is their maximum, every other field
+    their sum, and pipeline_span_calls counts them.
+    """
+    labelled = {}
+    for record in records:
+        labels = ",".join(f'{key}="{str(record[key]).replace(chr(34), chr(39))}"'
+                          for key in ['pipeline', 'kind', 'name'])
+        labelled.setdefault(labels, []).append(record)
+
+    lines = []
+    metrics = {**PROMETHEUS_METRICS, 'pipeline_span_calls': (None, "Number of spans aggregated into the samples")}
+    for metric, (field, help_text) in metrics.items():
+        samples = []
+        for labels, group in labelled.items():
+            if field is None:
+                values = [1 for _ in group]
+            elif field == 'error_count':
+                values = [int(record.get('status') == 'error') for record in group]
+            else:
+                values = [record[field] for record in group if record.get(field) is not None]
+            if values:
+                value = max(values) if field == 'peak_rss_bytes' else sum(values)
+                samples.append(f"{metric}{{{labels}}} {value}")
+        if samples:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"] + samples
+    return "\n".join(lines) + "\n"
+
+def active():
+    """The instrument of the current run, or None"""
+    return _active
+
+@contextmanager
+def span(name, kind = 'phase', rows_in = None):
+    """Span of the active instrument; a no-op yielding a throwaway record when none is active"""
+    if _active is None:
+        yield {}
+    else:
+        with _active.span(name, kind, rows_in) as record:
+            yield record
+
+def call(name, func, *args, **kwargs):
+    """Phase of the active instrument; runs ``func`` plainly when none is active"""
+    if _active is None:
+        return func(*args, **kwargs)
+    return _active.call(name, func, *args, **kwargs)
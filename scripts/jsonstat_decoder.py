@@ -0,0 +1,110 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import pandas as pd
+import numpy as np
+import math
+
+KEY_DIMENSIONS = ['nace_r2', 'geo', 'time']
+
+# Functions
+def dimension_categories(payload, dim):
+    """Category codes of a JSON-stat dimension in cube order"""
+    index = payload['dimension'][dim]['category']['index']
+    if isinstance(index, list):
+        return list(index)
+    codes = [None] * len(index)
+    for code, position in index.items():
+        codes[position] = code
+    return codes
+
+def dense_values(values, n, dtype = np.float64):
+    """Flat NumPy array of a JSON-stat value array, either dense (list) or sparse (dict)"""
+    if isinstance(values, list):
+        return np.array(values, dtype = dtype)
+    cube = np.full(n, np.nan, dtype = dtype)
+    if values:
+        positions = np.fromiter(map(int, values.keys()), dtype = np.int64, count = len(values))
+        cube[positions] = np.array(list(values.values()), dtype = dtype)
+    return cube
+
+def dense_status(status, n):
+    """Flat object array of JSON-stat status flags, empty string where no flag is set"""
+    flags = np.full(n, '', dtype = object)
+    if isinstance(status, list):
+        flags[:] = ['' if s is None else s for s in status]
+    elif isinstance(status, str):
+        flags[:] = status
+    elif status:
+        positions = np.fromiter(map(int, status.keys()), dtype = np.int64, count = len(status))
+        flags[positions] = list(status.values())
+    return flags
+
+def decode_jsonstat_wide(payload, keys = KEY_DIMENSIONS, columns = None, dtype = np.float64, status = False):
+    """Decode a JSON-stat 2.0 cube straight into a wide frame.
+
+    Rows are the cartesian product of the ``keys`` dimensions (categorical
+    columns, codes sorted like ``DataFrame.pivot`` sorts them) and every
+    combination of the ``columns`` dimensions becomes one measure column named
+    after its codes joined with ``_``. Other dimensions must be singletons.
+    With ``status = True`` each measure gets a categorical ``<name>_status``
+    column holding the observation flags.
+    """
+    ids = list(payload['id'])
+    size = [int(s) for s in payload['size']]
+    if columns is None:
+        columns = [d for d, n in zip(ids, size) if d not in keys and n > 1]
+    extra = [d for d, n in zip(ids, size) if d not in keys and d not in columns and n > 1]
+    if extra:
+        raise ValueError(f"Dimensions {extra} have several categories and are neither keys nor columns")
+
+    n = math.prod(size)
+    arrays = [dense_values(payload['value'], n, dtype).reshape(size)]
+    if status:
+        arrays.append(dense_status(payload.get('status'), n).reshape(size))
+
+    # Drop singleton dimensions, move keys to the front and sort every axis by code
+    order = keys + list(columns)
+    categories = {}
+    for i, array in enumerate(arrays):
+        array = array[tuple(slice(None) if d in order else 0 for d in ids)]
+        remaining = [d for d in ids if d in order]
+        array = array.transpose([remaining.index(d) for d in order])
+        for axis, dim in enumerate(order):
+            codes = dimension_categories(payload, dim)
+            sorter = np.argsort(codes, kind = 'stable')
+            categories[dim] = [codes[j] for j in sorter]
+            array = np.take(array, sorter, axis = axis)
+        arrays[i] = array
+
+    key_sizes = [len(categories[d]) for d in keys]
+    n_rows = math.prod(key_sizes)
+    n_cols = math.prod(len(categories[d]) for d in columns)
+    names = pd.MultiIndex.from_product([categories[d] for d in columns]).map(
+        lambda c: "_".join(c) if isinstance(c, tuple) else c) if columns else ['value']
+
+    data = {}
+    block = n_rows
+    for dim, n_dim in zip(keys, key_sizes):
+        block //= n_dim
+        codes = np.tile(np.repeat(np.arange(n_dim, dtype = np.int32), block), n_rows // (block * n_dim))
+        data[dim] = pd.Categorical.from_codes(codes, categories = categories[dim])
+
+    matrix = arrays[0].reshape(n_rows, n_cols)
+    for j, name in enumerate(names):
+        data[name] = matrix[:, j]
+    if status:
+        flags = arrays[1].reshape(n_rows, n_cols)
+        for j, name in enumerate(names):
+            data[f"{name}_status"] = pd.Categorical(flags[:, j])
+
+    return pd.DataFrame(data)
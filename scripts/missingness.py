@@ -0,0 +1,93 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import pandas as pd
+import numpy as np
+
+# Functions
+def missing_cells(df, columns, keys):
+    """Null counts of ``columns`` and row counts per cell of ``keys``, from one null mask"""
+    mask = pd.DataFrame(df[columns].isna().to_numpy(), columns = columns, index = df.index)
+    for key in keys:
+        mask[key] = df[key]
+    mask['rows'] = 1
+    return mask.groupby(keys, sort = True, observed = True, dropna = False)[columns + ['rows']].sum()
+
+def missing_share(cells, keys):
+    """Percentage of missing entries per group, rolled up from the cell counts"""
+    counts = cells.groupby(level = keys, sort = True, observed = True).sum()
+    return counts.drop(columns = 'rows').div(counts['rows'], axis = 0) * 100
+
+def gap_runs(cells, series, time):
+    """Number of gaps and longest gap (in consecutive periods) of every series and column.
+
+    A period is a gap of a column when none of the series' rows in that period
+    holds a value.
+    """
+    columns = [col for col in cells.columns if col != 'rows']
+    series = list(series)
+    cells = cells.sort_index(level = series + [time])
+    groups = cells.groupby(level = series, sort = False, observed = True)
+    series_codes = groups.ngroup().to_numpy()
+    n_series = groups.ngroups
+    first = np.r_[True, series_codes[1:] != series_codes[:-1]]
+
+    result = {}
+    for col in columns:
+        gap = cells[col].to_numpy() == cells['rows'].to_numpy()
+        start = gap & (first | ~np.r_[False, gap[:-1]])
+        run = np.cumsum(start) - 1
+        lengths = np.bincount(run[gap], minlength = start.sum())
+        longest = np.zeros(n_series, dtype = np.int64)
+        np.maximum.at(longest, series_codes[start], lengths)
+        result[(col, 'gaps')] = np.bincount(series_codes[start], minlength = n_series)
+        result[(col, 'longest gap')] = longest
+
+    return pd.DataFrame(result, index = groups.size().index)
+
+def profile_missing(df, columns, groupings, series = ('Country', 'geo'), time = 'Year'):
+    """Missingness profile of ``columns``.
+
+    One null mask is reduced once to the finest cell of all ``groupings``,
+    the series keys and ``time``; every grouping is a roll-up of those cell
+    counts. Returns a dict with the overall missing share per column, the
+    share per group for every named grouping, and the gap runs of each series
+    ('gaps').
+    """
+    keys = list(dict.fromkeys([k for grouping in groupings.values() for k in grouping] + list(series) + [time]))
+    return profile_cells(missing_cells(df, columns, keys), columns, groupings, series, time)
+
+def profile_cells(cells, columns, groupings, series = ('Country', 'geo'), time = 'Year'):
+    """Missingness profile from cell counts already reduced elsewhere (e.g. by a query engine).
+
+    ``cells`` is indexed by the keys of every grouping, the series keys and
+    ``time``, and holds the null count of each of ``columns`` and the cell's
+    row count ('rows'), as returned by ``missing_cells``.
+    """
+    profile = {'overall': cells[columns].sum() * 100 / cells['rows'].sum()}
+    for name, grouping in groupings.items():
+        profile[name] = missing_share(cells, grouping)
+    series = list(series)
+    profile['gaps'] = gap_runs(cells.groupby(level = series + [time], observed = True).sum(), series, time)
+    return profile
+
+def select_groups(profile, grouping, max_missing = None, max_longest_gap = None, columns = None):
+    """Groups whose columns all pass the selection rule: missing share and longest gap limits"""
+    share = profile[grouping]
+    columns = columns or list(share.columns)
+    keep = pd.Series(True, index = share.index)
+    if max_missing is not None:
+        keep &= (share[columns] <= max_missing).all(axis = 1)
+    if max_longest_gap is not None:
+        longest = profile['gaps'].xs('longest gap', axis = 1, level = 1)[columns]
+        keep &= (longest.reindex(share.index) <= max_longest_gap).all(axis = 1)
+    return share.index[keep]
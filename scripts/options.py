@@ -0,0 +1,92 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import argparse
+
+# Command-line options of the pipeline scripts. This module imports nothing
+# heavy, so `python -m pipeline <command> --help` and option errors are
+# answered before pandas or the scripts are loaded; each script's cli() adds
+# its own defaults to the parser built here.
+
+# Choices shared by the options and the modules that validate them: execution
+# backends, ways of combining repeated (country, year) rows, and profilers
+BACKENDS = ['pandas', 'duckdb', 'polars']
+AGGREGATES = ['mean', 'sum']
+PROFILERS = ['cprofile', 'pyinstrument']
+
+# Functions
+def add_instrument_arguments(parser):
+    parser.add_argument('--metrics',
+                        help = "write per-phase metrics to this file (JSON lines, or Prometheus text for .prom)")
+    parser.add_argument('--profile', choices = PROFILERS,
+                        help = "profile every phase into ../data/metrics/profiles/")
+
+def analysis_parser(prog = None):
+    parser = argparse.ArgumentParser(prog = prog, description = "Efficiency and Diversity of R&D data analysis")
+    parser.add_argument('--no-figures', action = 'store_true',
+                        help = "skip rendering the figures and only write the analysis datasets")
+    parser.add_argument('--no-save', action = 'store_true',
+                        help = "render the figures without writing the analysis datasets")
+    parser.add_argument('--figure-workers', type = int,
+                        help = "processes rendering figures (1 renders in-process)")
+    parser.add_argument('--no-cache', action = 'store_true',
+                        help = "run every phase without reading or writing the stage cache")
+    parser.add_argument('--backend', choices = BACKENDS,
+                        help = "engine loading and reducing the scraper data (duckdb and polars run a lazy query plan)")
+    parser.add_argument('--aggregate', choices = AGGREGATES,
+                        help = "combine repeated (country, year) rows of the scraper data (by default they fail the run)")
+    add_instrument_arguments(parser)
+    return parser
+
+def scraper_parser(prog = None):
+    parser = argparse.ArgumentParser(prog = prog, description = "Data Scraping Pipeline")
+    parser.add_argument('--browser-metadata', action = 'store_true',
+                        help = "scrape metadata of datasets without a JSON-stat payload (DBnomics) with Selenium")
+    parser.add_argument('--refresh-countries', action = 'store_true',
+                        help = "scrape the EU + EFTA countries list again")
+    parser.add_argument('--pushdown', action = 'store_true',
+                        help = "download only the NACE sector and EU + EFTA countries used by the analysis")
+    parser.add_argument('--since', type = int, help = "first year to download (with --pushdown)")
+    parser.add_argument('--until', type = int, help = "last year to download (with --pushdown)")
+    parser.add_argument('--incremental', action = 'store_true',
+                        help = "re-download only recent periods and upsert them into scraper_data.csv")
+    parser.add_argument('--revision-window', type = int,
+                        help = "number of latest stored periods re-downloaded per series (with --incremental)")
+    parser.add_argument('--fem2-api', action = 'store_true',
+                        help = "download the female researcher series from the DBnomics API instead of "
+                               "../data/rd_p_bempoccr2.csv")
+    parser.add_argument('--dbnomics-url', help = "DBnomics API base URL (with --fem2-api)")
+    parser.add_argument('--stage', nargs = '+',
+                        help = "re-run only these stages and the stages they depend on")
+    parser.add_argument('--stage-workers', type = int,
+                        help = "threads running independent stages concurrently")
+    add_instrument_arguments(parser)
+    return parser
+
+def service_parser(prog = None):
+    parser = argparse.ArgumentParser(prog = prog, description = "Local read-only query service over the analysis outputs")
+    parser.add_argument('--data', help = "directory holding the analysis outputs")
+    parser.add_argument('--host')
+    parser.add_argument('--port', type = int)
+    parser.add_argument('--reload-interval', type = float,
+                        help = "seconds between checks of the served files for changes")
+    parser.add_argument('--cache-entries', type = int,
+                        help = "responses kept in the cache (0 disables it)")
+    parser.add_argument('--bench', action = 'store_true',
+                        help = "load-test a service (in-process unless --url is given) and print p50/p90/p99 latency")
+    parser.add_argument('--url', help = "running service to load-test, e.g. http://127.0.0.1:8050")
+    parser.add_argument('--clients', type = int, help = "concurrent load-test clients")
+    parser.add_argument('--requests', type = int, help = "load-test requests in total")
+    return parser
+
+# Script module -> builder of its parser
+PARSERS = {'analysis_code': analysis_parser, 'scraper_code': scraper_parser, 'query_service': service_parser}
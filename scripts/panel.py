@@ -0,0 +1,177 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import pandas as pd
+import numpy as np
+
+from options import AGGREGATES
+
+def check_cells(size, key_codes, keys, time_codes, times, key, time, aggregate):
+    """Fail on repeated (key, time) rows unless an aggregation of them was chosen"""
+    if aggregate is not None and aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{aggregate}' (expected one of {AGGREGATES} or None)")
+    repeated = np.flatnonzero(size > 1)
+    if aggregate is None and len(repeated):
+        times = times.year if pd.api.types.is_datetime64_any_dtype(times) else times
+        examples = ", ".join(f"({keys[key_codes[c]]}, {times[time_codes[c]]}): {size[c]} rows" for c in repeated[:3])
+        raise ValueError(f"{len(repeated):,} ({key}, {time}) cells hold repeated rows, e.g. {examples}; "
+                         f"pass aggregate = one of {AGGREGATES} to combine them")
+
+def cell_values(total, count, aggregate):
+    """Value of every cell from the sum and count of its valid rows (NaN when it has none)"""
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        value = total if aggregate == 'sum' else total / count
+    return np.where(count > 0, value, np.nan)
+
+class Panel:
+    """Dense country × year × metric panel with categorical axes.
+
+    ``values[c, y, m]`` holds the value of a cell (NaN when it has none) and
+    ``complete[c, y, m]`` whether every row of the cell was valid. A cell is
+    one row unless repeated rows are combined with an explicit aggregate
+    (their 'mean' or 'sum'). ``attributes`` carries per-country labels (e.g. geo codes) and
+    ``aggregates`` the country-level results, both indexed like the country
+    axis, so scalars per country are stored once rather than per row.
+    """
+
+    def __init__(self, values, complete, countries, years, metrics, attributes = None, aggregates = None,
+                 key = 'Country', time = 'Year'):
+        self.values = values
+        self.complete = complete
+        self.countries = pd.CategoricalIndex(countries, name = key)
+        self.years = pd.Index(years, name = time)
+        self.metrics = pd.Index(metrics)
+        self.attributes = attributes if attributes is not None else pd.DataFrame(index = self.countries)
+        self.aggregates = aggregates if aggregates is not None else pd.DataFrame(index = self.countries)
+        self.key = key
+        self.time = time
+
+    @classmethod
+    def from_frame(cls, df, metrics, key = 'Country', time = 'Year', attributes = (), aggregate = None):
+        """Reduce a long frame to a dense panel.
+
+        Repeated (key, time) rows raise a ValueError unless ``aggregate``
+        names how to combine them (see ``AGGREGATES``).
+        """
+        country_codes, countries = pd.factorize(df[key], sort = True)
+        year_codes, years = pd.factorize(df[time], sort = True)
+        n_countries, n_years = len(countries), len(years)
+        cells = country_codes * n_years + year_codes
+        size = np.bincount(cells, minlength = n_countries * n_years)
+        check_cells(size, np.arange(len(size)) // n_years, countries, np.arange(len(size)) % n_years, years,
+                    key, time, aggregate)
+
+        values = np.full((n_countries * n_years, len(metrics)), np.nan)
+        complete = np.zeros((n_countries * n_years, len(metrics)), dtype = bool)
+        for m, metric in enumerate(metrics):
+            column = df[metric].to_numpy(dtype = np.float64)
+            valid = ~np.isnan(column)
+            count = np.bincount(cells[valid], minlength = len(size))
+            total = np.bincount(cells[valid], weights = column[valid], minlength = len(size))
+            values[:, m] = cell_values(total, count, aggregate)
+            complete[:, m] = (count == size) & (size > 0)
+
+        first_rows = pd.Series(np.arange(len(df))).groupby(country_codes).first().to_numpy()
+        labels = df.iloc[first_rows][list(attributes)].reset_index(drop = True)
+        labels.index = pd.CategoricalIndex(countries, name = key)
+        return cls(values.reshape(n_countries, n_years, len(metrics)),
+                   complete.reshape(n_countries, n_years, len(metrics)),
+                   countries, years, list(metrics), labels, key = key, time = time)
+
+    @classmethod
+    def from_cells(cls, cells, metrics, key = 'Country', time = 'Year', attributes = (), suffix = ' sum',
+                   aggregate = None):
+        """Dense panel from per-cell aggregates, one row per (key, time) cell.
+
+        ``cells`` holds the cell's row count ('rows') and, for every metric,
+        its null count (``<metric>``) and the sum of its valid rows
+        (``<metric><suffix>``), so the panel equals ``from_frame`` on the rows
+        the cells were reduced from (repeated rows raise unless ``aggregate``
+        is given).
+        """
+        country_codes, countries = pd.factorize(cells[key], sort = True)
+        year_codes, years = pd.factorize(cells[time], sort = True)
+        shape = (len(countries), len(years), len(metrics))
+        size = cells['rows'].to_numpy()
+        check_cells(size, country_codes, countries, year_codes, years, key, time, aggregate)
+
+        values = np.full(shape, np.nan)
+        complete = np.zeros(shape, dtype = bool)
+        for m, metric in enumerate(metrics):
+            count = size - cells[metric].to_numpy()
+            total = cells[f"{metric}{suffix}"].to_numpy(dtype = np.float64)
+            values[country_codes, year_codes, m] = cell_values(total, count, aggregate)
+            complete[country_codes, year_codes, m] = (count == size) & (size > 0)
+
+        first_rows = pd.Series(np.arange(len(cells))).groupby(country_codes).first().to_numpy()
+        labels = cells.iloc[first_rows][list(attributes)].reset_index(drop = True)
+        labels.index = pd.CategoricalIndex(countries, name = key)
+        return cls(values, complete, countries, years, list(metrics), labels, key = key, time = time)
+
+    def __getitem__(self, metric):
+        """Country × year array of one metric (a view on the panel)"""
+        return self.values[:, :, self.metrics.get_loc(metric)]
+
+    def valid(self, metric):
+        """Country × year mask of the cells of one metric whose every row held a value"""
+        return self.complete[:, :, self.metrics.get_loc(metric)]
+
+    def __contains__(self, metric):
+        return metric in self.metrics
+
+    def metric(self, metric):
+        """Country × year frame of one metric, sharing memory with the panel"""
+        return pd.DataFrame(self[metric], index = self.countries, columns = self.years, copy = False)
+
+    def add_metrics(self, arrays, complete = None):
+        """Append country × year arrays as new metrics (replacing metrics of the same name)"""
+        for name, array in arrays.items():
+            done = np.isfinite(array) if complete is None else complete[name]
+            if name in self.metrics:
+                m = self.metrics.get_loc(name)
+                self.values[:, :, m], self.complete[:, :, m] = array, done
+            else:
+                self.values = np.concatenate([self.values, array[:, :, None]], axis = 2)
+                self.complete = np.concatenate([self.complete, done[:, :, None]], axis = 2)
+                self.metrics = self.metrics.append(pd.Index([name]))
+        return self
+
+    def to_frame(self, metrics = None):
+        """Long frame with one row per country and year.
+
+        The metric block is a reshaped view of the panel array (no copy when
+        all metrics are selected); country and attribute columns are
+        categorical.
+        """
+        n_countries, n_years = len(self.countries), len(self.years)
+        country_codes = np.repeat(np.arange(n_countries), n_years)
+        frame = pd.DataFrame({self.key: pd.Categorical.from_codes(country_codes, categories = self.countries.categories)})
+        for name in self.attributes.columns:
+            frame[name] = pd.Categorical(self.attributes[name].to_numpy()[country_codes])
+        frame[self.time] = np.tile(self.years.to_numpy(), n_countries)
+
+        if metrics is None:
+            block = pd.DataFrame(self.values.reshape(n_countries * n_years, len(self.metrics)),
+                                 columns = self.metrics, copy = False)
+        else:
+            block = pd.DataFrame({m: self[m].reshape(-1) for m in metrics})
+        return pd.concat([frame, block], axis = 1)
+
+    def year_numbers(self):
+        """Calendar years of the time axis as integers"""
+        if pd.api.types.is_datetime64_any_dtype(self.years):
+            return self.years.year.to_numpy(dtype = np.int64)
+        return self.years.to_numpy(dtype = np.int64)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.complete.nbytes
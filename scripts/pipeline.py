@@ -0,0 +1,50 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from importlib import import_module
+import argparse
+import sys
+
+from options import PARSERS
+
+# Subcommands: name -> (module, arguments prepended to the module's own, help)
+# The module is only imported once its subcommand's options parse, so `--help`
+# and option errors never load pandas, and the lighter subcommands never load
+# the browser, scipy or plotting stacks.
+COMMANDS = {
+    'scrape': ('scraper_code', [], "download and process the Eurostat and DBnomics data"),
+    'analyse': ('analysis_code', [], "run the full analysis: datasets and figures"),
+    'metrics-only': ('analysis_code', ['--no-figures'], "compute and save the analysis datasets, no figures"),
+    'figures-only': ('analysis_code', ['--no-save'], "render the figures without rewriting the datasets"),
+    'serve': ('query_service', [], "serve point, range and top-k queries over the analysis outputs")}
+
+# Functions
+def parser():
+    parser = argparse.ArgumentParser(prog = "python -m pipeline",
+                                     description = "Efficiency and Diversity of R&D data pipeline")
+    commands = parser.add_subparsers(dest = 'command', required = True, metavar = 'command')
+    for name, (module, _, help_text) in COMMANDS.items():
+        commands.add_parser(name, help = help_text, add_help = False,
+                            description = f"{help_text} (options are passed on to {module}; "
+                                          f"see `python -m pipeline {name} --help`)")
+    return parser
+
+def main(argv = None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args, rest = parser().parse_known_args(argv)
+    module, prefix, _ = COMMANDS[args.command]
+    prog = f"python -m pipeline {args.command}"
+    PARSERS[module](prog).parse_args(prefix + rest)
+    return import_module(module).cli(prefix + rest, prog = prog)
+
+if __name__ == "__main__":
+    main()
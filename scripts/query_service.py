@@ -0,0 +1,442 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from urllib.request import urlopen
+from collections import OrderedDict
+import http.client
+import threading
+import random
+import json
+import time
+import os
+
+import pandas as pd
+import numpy as np
+
+from storage import DATA_PATH, read_dataset, dataset_files, dataset_fingerprint
+from http_cache import sha256_bytes
+from panel import Panel
+from options import service_parser
+
+# Datasets served: the outputs of save_preprocessed_datasets()
+DATASETS = ['analysis_data', 'cagr_analysis_data']
+
+# Service
+HOST = '127.0.0.1'
+PORT = 8050
+RELOAD_INTERVAL = 1.0
+CACHE_ENTRIES = 4096
+TOP_K = 5
+
+# Load test
+CLIENTS = 8
+REQUESTS = 5000
+PERCENTILES = [50, 90, 99]
+SEED = 20261017
+
+# Columns of the analysis outputs that are keys or labels rather than metrics
+KEY_COLUMNS = ['Country', 'geo', 'Year', 'geo_nan']
+CAGR_COLUMNS = {'value': 'CAGR value', 'ci_low': 'CAGR CI low', 'ci_high': 'CAGR CI high'}
+
+# Outputs saved before the fem2 series were joined by series code repeat every
+# (country, year) row; the analysis combined those rows by their mean
+CELL_AGGREGATE = 'mean'
+
+# Functions
+class QueryError(ValueError):
+    """A query the index cannot answer; ``status`` is the HTTP status to reply with"""
+
+    def __init__(self, message, status = 400):
+        super().__init__(message)
+        self.status = status
+
+def number(value):
+    """JSON value of a float (None for NaN)"""
+    return None if np.isnan(value) else float(value)
+
+class MetricIndex:
+    """Read-only, indexed view of the saved analysis outputs.
+
+    Yearly metrics are held as a dense country × year × metric ``Panel``, so a
+    point query is one array lookup and a year range one slice. Country rank
+    orders are precomputed per metric and year, and per CAGR type, so top-k
+    queries read the first k positions. Countries are addressed by name or
+    geo code.
+    """
+
+    def __init__(self, df, df_cagr, version):
+        self.version = version
+        cagr = df_cagr.drop_duplicates(['Country', 'CAGR types'])
+        self.cagr_types = list(pd.unique(cagr['CAGR types'].astype(str)))
+
+        # Yearly metrics (the CAGRs and their intervals repeated on every year are served as CAGRs only)
+        df = df.assign(Year = pd.to_datetime(df['Year']))
+        cagr_columns = tuple(self.cagr_types) + tuple(f"{name} " for name in self.cagr_types)
+        metrics = [col for col in df.columns if col not in KEY_COLUMNS and not col.startswith(cagr_columns)
+                   and pd.api.types.is_numeric_dtype(df[col])]
+        repeated = df.duplicated(['Country', 'Year']).sum()
+        if repeated:
+            print(f"• {repeated:,} repeated (Country, Year) rows in the analysis outputs: combined by their {CELL_AGGREGATE}")
+        self.panel = Panel.from_frame(df, metrics, attributes = ['geo'], aggregate = CELL_AGGREGATE)
+        self.years = self.panel.year_numbers()
+        self.countries = list(self.panel.countries.astype(str))
+        self.geos = list(self.panel.attributes['geo'].astype(str))
+        self.order = {metric: self.rank(self.panel[metric], axis = 0) for metric in metrics}
+
+        self.cagr_countries = list(pd.unique(cagr['Country'].astype(str)))
+        self.cagr_geos = list(cagr.drop_duplicates('Country')['geo'].astype(str))
+        self.cagr = {}
+        for field, column in CAGR_COLUMNS.items():
+            table = cagr.pivot(index = 'CAGR types', columns = 'Country', values = column) if column in cagr \
+                else pd.DataFrame(np.nan, index = self.cagr_types, columns = self.cagr_countries)
+            self.cagr[field] = table.reindex(index = self.cagr_types, columns = self.cagr_countries).to_numpy(dtype = np.float64)
+        self.cagr_order = self.rank(self.cagr['value'], axis = 1)
+
+        self.country_pos = {**{name: i for i, name in enumerate(self.countries)},
+                            **{geo: i for i, geo in enumerate(self.geos)}}
+        self.cagr_country_pos = {**{name: i for i, name in enumerate(self.cagr_countries)},
+                                 **{geo: i for i, geo in enumerate(self.cagr_geos)}}
+
+    @staticmethod
+    def rank(values, axis):
+        """Positions sorted by value along ``axis`` (descending, NaN last) and the number of valid values"""
+        order = np.argsort(np.where(np.isnan(values), np.inf, -values), axis = axis, kind = 'stable')
+        return order, (~np.isnan(values)).sum(axis = axis)
+
+    @classmethod
+    def load(cls, path = DATA_PATH):
+        """Index of the datasets stored under ``path``"""
+        version = sha256_bytes("".join(dataset_fingerprint(name, path = path) for name in DATASETS).encode('utf-8'))
+        return cls(read_dataset('analysis_data', path = path), read_dataset('cagr_analysis_data', path = path), version)
+
+    def describe(self):
+        return {'version': self.version, 'countries': self.countries, 'geo': self.geos,
+                'years': self.years.tolist(), 'metrics': list(self.panel.metrics),
+                'cagr_types': self.cagr_types, 'cagr_geo': self.cagr_geos}
+
+    def resolve_metric(self, metric):
+        """('panel' | 'cagr', name) of a metric; a CAGR type may be given by its unique prefix (e.g. 'SpendEff CAGR')"""
+        if metric in self.panel:
+            return 'panel', metric
+        matches = [name for name in self.cagr_types if name == metric or name.startswith(f"{metric} ")]
+        if len(matches) == 1:
+            return 'cagr', matches[0]
+        if matches:
+            raise QueryError(f"Ambiguous metric '{metric}': {matches}")
+        raise QueryError(f"Unknown metric '{metric}'", 404)
+
+    def country(self, country, positions):
+        if country not in positions:
+            raise QueryError(f"Unknown country '{country}'", 404)
+        return positions[country]
+
+    def year(self, year):
+        position = np.searchsorted(self.years, year)
+        if position == len(self.years) or self.years[position] != year:
+            raise QueryError(f"No data for year {year}", 404)
+        return position
+
+    def point(self, country, metric, year = None):
+        kind, metric = self.resolve_metric(metric)
+        if kind == 'cagr':
+            c, t = self.country(country, self.cagr_country_pos), self.cagr_types.index(metric)
+            return {'country': self.cagr_countries[c], 'geo': self.cagr_geos[c], 'metric': metric,
+                    **{field: number(values[t, c]) for field, values in self.cagr.items()}}
+        if year is None:
+            raise QueryError(f"'{metric}' is a yearly metric: give a year")
+        c, y = self.country(country, self.country_pos), self.year(year)
+        return {'country': self.countries[c], 'geo': self.geos[c], 'metric': metric, 'year': int(self.years[y]),
+                'value': number(self.panel[metric][c, y]), 'complete': bool(self.panel.valid(metric)[c, y])}
+
+    def range(self, metric, country = None, first = None, last = None):
+        kind, metric = self.resolve_metric(metric)
+        if kind == 'cagr':
+            raise QueryError(f"'{metric}' is not a yearly metric")
+        start = np.searchsorted(self.years, first, side = 'left') if first is not None else 0
+        end = np.searchsorted(self.years, last, side = 'right') if last is not None else len(self.years)
+        rows = [self.country(country, self.country_pos)] if country is not None else range(len(self.countries))
+        years = self.years[start:end].tolist()
+        values = self.panel[metric][:, start:end]
+        return {'metric': metric, 'years': years,
+                'series': [{'country': self.countries[c], 'geo': self.geos[c],
+                            'values': [number(v) for v in values[c]]} for c in rows]}
+
+    def top(self, metric, k = TOP_K, year = None, ascending = False):
+        kind, metric = self.resolve_metric(metric)
+        if k < 1:
+            raise QueryError("k must be at least 1")
+        if kind == 'cagr':
+            t = self.cagr_types.index(metric)
+            order, valid = self.cagr_order[0][t], self.cagr_order[1][t]
+            values, countries, geos = self.cagr['value'][t], self.cagr_countries, self.cagr_geos
+            result = {'metric': metric}
+        else:
+            if year is None:
+                raise QueryError(f"'{metric}' is a yearly metric: give a year")
+            y = self.year(year)
+            order, valid = self.order[metric][0][:, y], self.order[metric][1][y]
+            values, countries, geos = self.panel[metric][:, y], self.countries, self.geos
+            result = {'metric': metric, 'year': int(self.years[y])}
+        ranked = order[:valid][::-1] if ascending else order[:valid]
+        result['top'] = [{'rank': r + 1, 'country': countries[c], 'geo': geos[c], 'value': number(values[c])}
+                         for r, c in enumerate(ranked[:k])]
+        return result
+
+class QueryCache:
+    """Least-recently-used cache of encoded responses, keyed by index version and normalized query"""
+
+    def __init__(self, max_entries = CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last = False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+def query_param(query, name, convert = str, default = None, required = False):
+    if name not in query:
+        if required:
+            raise QueryError(f"Missing parameter '{name}'")
+        return default
+    try:
+        return convert(query[name])
+    except ValueError:
+        raise QueryError(f"Invalid value for '{name}': {query[name]!r}")
+
+def flag(text):
+    return text.lower() in ('1', 'true', 'yes', 'asc')
+
+# Endpoints: path -> handler(index, query parameters) returning a JSON-able result
+ROUTES = {
+    '/health': lambda index, q: {'status': 'ok', 'version': index.version},
+    '/index': lambda index, q: index.describe(),
+    '/point': lambda index, q: index.point(query_param(q, 'country', required = True),
+                                           query_param(q, 'metric', required = True),
+                                           query_param(q, 'year', int)),
+    '/range': lambda index, q: index.range(query_param(q, 'metric', required = True), query_param(q, 'country'),
+                                           query_param(q, 'from', int), query_param(q, 'to', int)),
+    '/top': lambda index, q: index.top(query_param(q, 'metric', required = True), query_param(q, 'k', int, TOP_K),
+                                       query_param(q, 'year', int), query_param(q, 'ascending', flag, False))}
+
+class QueryService:
+    """Local read-only HTTP service answering point, range and top-k queries from a ``MetricIndex``.
+
+    The index is built once at start and rebuilt in the background when the
+    served files change; requests keep using the index they started with,
+    and a failed reload (e.g. a file caught mid-write) keeps the previous
+    one. Responses are cached per index version and carry its ETag.
+    """
+
+    def __init__(self, path = DATA_PATH, host = HOST, port = PORT, reload_interval = RELOAD_INTERVAL,
+                 cache_entries = CACHE_ENTRIES):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.cache = QueryCache(cache_entries)
+        self.signature = self.file_signature()
+        self.index = MetricIndex.load(path)
+        self.stopped = threading.Event()
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive connections; headers and body leave in separate writes, so Nagle would hold the body back
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                index = service.index
+                url = urlsplit(self.path)
+                query = dict(parse_qsl(url.query))
+                etag = f'"{index.version[:16]}"'
+
+                # Only answered (valid) queries are cached, so a 304 is never sent for an invalid one
+                key = (index.version, url.path, tuple(sorted(query.items())))
+                body, cache = service.cache.get(key), 'hit'
+                if body is None:
+                    try:
+                        if url.path not in ROUTES:
+                            raise QueryError(f"Unknown endpoint '{url.path}' (expected one of {list(ROUTES)})", 404)
+                        result = ROUTES[url.path](index, query)
+                    except QueryError as e:
+                        return self.reply(e.status, json.dumps({'error': str(e)}).encode('utf-8'), None, 'miss')
+                    body, cache = json.dumps(result).encode('utf-8'), 'miss'
+                    service.cache.put(key, body)
+                if self.headers.get('If-None-Match') == etag:
+                    return self.reply(304, b'', etag, cache)
+                self.reply(200, body, etag, cache)
+
+            def reply(self, status, body, etag, cache):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if etag is not None:
+                    self.send_header('ETag', etag)
+                self.send_header('X-Cache', cache)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.threads = [threading.Thread(target = self.server.serve_forever, daemon = True),
+                        threading.Thread(target = self.watch, daemon = True)]
+
+    def file_signature(self):
+        """Size and modification time of the files the index is read from"""
+        signature = []
+        for name in DATASETS:
+            for file in dataset_files(name, path = self.path):
+                stat = os.stat(file)
+                signature.append((file, stat.st_mtime_ns, stat.st_size))
+        return signature
+
+    def reload(self):
+        """Rebuild the index when the served files changed; True when a new index was swapped in"""
+        try:
+            signature = self.file_signature()
+            if signature == self.signature:
+                return False
+            index = MetricIndex.load(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"• Reload skipped: {type(e).__name__}: {e}")
+            return False
+        self.signature = signature
+        if index.version != self.index.version:
+            self.index = index
+            self.cache.clear()
+            print(f"• Reloaded the analysis outputs (version {index.version[:12]})")
+            return True
+        return False
+
+    def watch(self):
+        while not self.stopped.wait(self.reload_interval):
+            self.reload()
+
+    def __enter__(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+def sample_paths(description, n_points = 200, seed = SEED):
+    """Mixed point, range and top-k query paths over an index description (``/index``), for load tests"""
+    rng = random.Random(seed)
+    geos, metrics, years = description['geo'], description['metrics'], description['years']
+    paths = [f"/point?{urlencode({'country': rng.choice(geos), 'metric': rng.choice(metrics), 'year': rng.choice(years)})}"
+             for _ in range(n_points)]
+    paths += [f"/range?{urlencode({'country': geo, 'metric': metric, 'from': years[0], 'to': years[-1]})}"
+              for geo in geos for metric in metrics]
+    paths += [f"/top?{urlencode({'metric': metric, 'year': year, 'k': TOP_K})}" for metric in metrics for year in years]
+    paths += [f"/top?{urlencode({'metric': name, 'k': TOP_K})}" for name in description['cagr_types']]
+    paths += [f"/point?{urlencode({'country': geo, 'metric': name})}"
+              for geo in description['cagr_geo'] for name in description['cagr_types']]
+    return paths
+
+def load_test(url, paths, clients = CLIENTS, requests = REQUESTS, seed = SEED):
+    """Latency percentiles [ms] and throughput of ``requests`` GETs spread over ``clients`` keep-alive connections"""
+    rng = random.Random(seed)
+    plan = [rng.choice(paths) for _ in range(requests)]
+    address = urlsplit(url)
+
+    def client(batch):
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout = 30)
+        latencies, errors = [], 0
+        for path in batch:
+            start = time.perf_counter()
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            errors += response.status != 200
+        connection.close()
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = clients) as pool:
+        results = list(pool.map(client, [plan[i::clients] for i in range(clients)]))
+    wall = time.perf_counter() - start
+
+    latencies = np.concatenate([np.asarray(latencies) for latencies, _ in results]) * 1000
+    report = {f"p{p}_ms": float(np.percentile(latencies, p)) for p in PERCENTILES}
+    report.update({'max_ms': float(latencies.max()), 'requests': len(latencies), 'clients': clients,
+                   'errors': sum(errors for _, errors in results), 'requests_per_second': len(latencies) / wall})
+    return report
+
+def print_report(report):
+    percentiles = ", ".join(f"p{p} {report[f'p{p}_ms']:.2f} ms" for p in PERCENTILES)
+    print(f"✓ {report['requests']:,} requests over {report['clients']} clients: {percentiles}, "
+          f"max {report['max_ms']:.2f} ms, {report['requests_per_second']:,.0f} req/s, {report['errors']} errors")
+
+def main(path = DATA_PATH, host = HOST, port = PORT, reload_interval = RELOAD_INTERVAL, cache_entries = CACHE_ENTRIES,
+         bench = False, url = None, clients = CLIENTS, requests = REQUESTS):
+    if bench and url:
+        with urlopen(f"{url}/index", timeout = 30) as response:
+            description = json.loads(response.read())
+        print(f"---- Load test of {url}")
+        print_report(load_test(url, sample_paths(description), clients, requests))
+        return
+
+    with QueryService(path, host, 0 if bench else port, reload_interval, cache_entries) as service:
+        index = service.index
+        print(f"✓ Indexed {len(index.countries)} countries × {len(index.years)} years × "
+              f"{len(index.panel.metrics)} metrics and {len(index.cagr_types)} CAGR types")
+        if bench:
+            print(f"---- Load test ({'cached' if cache_entries else 'uncached'} responses, in-process server)")
+            print_report(load_test(service.url, sample_paths(index.describe()), clients, requests))
+            return
+        print(f"✓ Serving {', '.join(ROUTES)} at {service.url} (Ctrl+C to stop)")
+        try:
+            service.stopped.wait()
+        except KeyboardInterrupt:
+            print()
+
+def cli(argv = None, prog = None):
+    parser = service_parser(prog)
+    parser.set_defaults(data = DATA_PATH, host = HOST, port = PORT, reload_interval = RELOAD_INTERVAL,
+                        cache_entries = CACHE_ENTRIES, clients = CLIENTS, requests = REQUESTS)
+    args = parser.parse_args(argv)
+    main(args.data, args.host, args.port, args.reload_interval, args.cache_entries,
+         args.bench, args.url, args.clients, args.requests)
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,183 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+import os
+
+from correlations import padded_groups, pearson
+
+RESAMPLES = 10000
+SEED = 20261017
+CONFIDENCE = 0.95
+CHUNK_SIZE = 500
+WORKERS = os.cpu_count() or 1
+
+# Functions
+def chunk_seeds(seed, iterations, chunk_size = CHUNK_SIZE):
+    """Independent seed sequences and iteration counts of fixed-size chunks.
+
+    Chunks do not depend on the number of workers, so a seed always yields
+    the same resamples.
+    """
+    sizes = [chunk_size] * (iterations // chunk_size)
+    if iterations % chunk_size:
+        sizes.append(iterations % chunk_size)
+    return list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+def run_chunks(func, payload, seed, iterations, workers = WORKERS):
+    """Evaluate ``func(payload, seed_sequence, size)`` over all chunks and stack the results"""
+    chunks = chunk_seeds(seed, iterations)
+    if workers <= 1 or len(chunks) == 1:
+        results = [func(payload, seq, size) for seq, size in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers = min(workers, len(chunks))) as executor:
+            results = list(executor.map(func, [payload] * len(chunks), *zip(*chunks)))
+    return np.concatenate(results, axis = 0)
+
+def left_align(values):
+    """Move the non-NaN entries of every row to its front, keeping their order"""
+    order = np.argsort(np.isnan(values), axis = 1, kind = 'stable')
+    return np.take_along_axis(values, order, axis = 1)
+
+def bootstrap_indices(rng, counts, width, size):
+    """size × group × width matrix of positions drawn with replacement below each group count"""
+    draws = rng.random((size, len(counts), width))
+    return (draws * counts[None, :, None]).astype(np.int64)
+
+def permutation_indices(rng, counts, width, size):
+    """size × group × width matrix of random permutations of each group's first ``count`` positions"""
+    keys = rng.random((size, len(counts), width))
+    keys[:, np.arange(width)[None, :] >= counts[:, None]] = np.inf
+    return np.argsort(keys, axis = 2)
+
+def gather(values, idx, counts):
+    """Values of a group × width array at resampled positions, NaN beyond each group count"""
+    rows = np.arange(values.shape[0])[None, :, None]
+    inside = np.arange(values.shape[1])[None, None, :] < counts[None, :, None]
+    return np.where(inside, values[rows, idx], np.nan)
+
+def correlation_stat(x, y, spearman, ranks = None):
+    """Pearson or Spearman (rank) correlation of size × group × width samples.
+
+    ``ranks`` holds the already ranked (x, y) samples when resampling keeps
+    ranks valid (permutations), so only bootstrap samples are re-ranked.
+    """
+    from scipy import stats
+    size, groups, width = x.shape
+    x, y = x.reshape(-1, width), y.reshape(-1, width)
+    r, _ = pearson(x, y)
+    if spearman.any():
+        if ranks is None:
+            ranks = (stats.rankdata(x, axis = 1, nan_policy = 'omit'),
+                     stats.rankdata(y, axis = 1, nan_policy = 'omit'))
+        rho, _ = pearson(ranks[0].reshape(-1, width), ranks[1].reshape(-1, width))
+        r = np.where(np.tile(spearman, size), rho, r)
+    return r.reshape(size, groups)
+
+def bootstrap_correlation_chunk(payload, seed, size):
+    x, y, counts, spearman = payload
+    idx = bootstrap_indices(np.random.default_rng(seed), counts, x.shape[1], size)
+    return correlation_stat(gather(x, idx, counts), gather(y, idx, counts), spearman)
+
+def permutation_correlation_chunk(payload, seed, size):
+    from scipy import stats
+    x, y, counts, spearman = payload
+    idx = permutation_indices(np.random.default_rng(seed), counts, x.shape[1], size)
+    rank_x = stats.rankdata(x, axis = 1, nan_policy = 'omit')
+    rank_y = stats.rankdata(y, axis = 1, nan_policy = 'omit')
+    shape = (size,) + x.shape
+    ranks = (np.broadcast_to(rank_x, shape), gather(rank_y, idx, counts))
+    return correlation_stat(np.broadcast_to(x, shape), gather(y, idx, counts), spearman, ranks)
+
+def bootstrap_cagr_chunk(payload, seed, size):
+    steps, counts, periods = payload
+    idx = bootstrap_indices(np.random.default_rng(seed), counts, steps.shape[1], size)
+    total = np.nansum(gather(steps, idx, counts), axis = 2)
+    with np.errstate(over = 'ignore'):
+        return np.expm1(total / periods)
+
+def percentile_interval(samples, confidence = CONFIDENCE):
+    """Lower and upper percentile bounds over the first axis, ignoring NaN resamples"""
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.full(samples.shape[1], np.nan), np.full(samples.shape[1], np.nan)
+    defined = (~np.isnan(samples)).any(axis = 0)
+    low[defined], high[defined] = np.nanpercentile(samples[:, defined], [tail, 100 - tail], axis = 0)
+    return low, high
+
+def correlation_intervals(df, corr, key = 'Country', iterations = RESAMPLES, seed = SEED,
+                          confidence = CONFIDENCE, workers = WORKERS):
+    """Bootstrap CIs and permutation p-values of the correlations in a ``correlate()`` table.
+
+    Observations are resampled within each group: bootstrap draws pairs with
+    replacement, the permutation test shuffles y against x. Each row uses the
+    statistic named in its ``test`` column. Returns ``corr`` with ``ci_low``,
+    ``ci_high`` and ``p_perm`` inserted after ``p``.
+    """
+    corr = corr.reset_index(drop = True)
+    ci_low, ci_high, p_perm = (np.full(len(corr), np.nan) for _ in range(3))
+    for (x_name, y_name), rows in corr.groupby(['x', 'y'], sort = False).groups.items():
+        groups, cube = padded_groups(df, key, [x_name, y_name])
+        x, y = cube[:, :, 0], cube[:, :, 1]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x = left_align(np.where(valid, x, np.nan))
+        y = left_align(np.where(valid, y, np.nan))
+        counts = valid.sum(axis = 1)
+
+        table = corr.loc[rows].set_index(key)
+        spearman = (pd.Series(groups).map(table['test']) == 'spearman').to_numpy()
+        payload = (x, y, counts, spearman)
+        boot = run_chunks(bootstrap_correlation_chunk, payload, seed, iterations, workers)
+        perm = run_chunks(permutation_correlation_chunk, payload, seed + 1, iterations, workers)
+
+        observed = pd.Series(groups).map(table['stat']).to_numpy(dtype = np.float64)
+        low, high = percentile_interval(boot, confidence)
+        extreme = (np.abs(perm) >= np.abs(observed)[None, :] - 1e-12).sum(axis = 0)
+        position = pd.Index(groups).get_indexer(corr.loc[rows, key])
+        ci_low[rows], ci_high[rows] = low[position], high[position]
+        p_perm[rows] = ((extreme + 1) / (iterations + 1))[position]
+
+    at = corr.columns.get_loc('p') + 1
+    for offset, (name, values) in enumerate([('ci_low', ci_low), ('ci_high', ci_high), ('p_perm', p_perm)]):
+        corr.insert(at + offset, name, values)
+    return corr
+
+def cagr_steps(head, tail, i, j, ok):
+    """Log growth between consecutive valid years from position i to j, left-aligned per group.
+
+    The last step ends at the last valid observation of year j, so the steps
+    of a group add up to the log growth behind its point CAGR.
+    """
+    values = head.copy()
+    rows = np.arange(len(values))
+    values[rows, j] = tail[rows, j]
+    positions = np.arange(values.shape[1])[None, :]
+    values[(positions < i[:, None]) | (positions > j[:, None]) | ~ok[:, None]] = np.nan
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        logs = left_align(np.where(values > 0, np.log(values), np.nan))
+    counts = np.maximum((~np.isnan(logs)).sum(axis = 1) - 1, 0)
+    steps = np.diff(logs, axis = 1)
+    return steps, counts
+
+def cagr_intervals(head, tail, i, j, ok, periods = None, iterations = RESAMPLES, seed = SEED,
+                   confidence = CONFIDENCE, workers = WORKERS):
+    """Bootstrap CI of CAGRs by resampling the yearly log growth steps of each group.
+
+    ``periods`` is the number of yearly intervals each growth is compounded
+    over (defaults to the positions spanned, for grids with one column per year).
+    """
+    steps, counts = cagr_steps(head, tail, i, j, ok)
+    periods = np.where(ok, j - i if periods is None else periods, np.nan)
+    boot = run_chunks(bootstrap_cagr_chunk, (steps, counts, periods), seed, iterations, workers)
+    boot[:, counts == 0] = np.nan
+    return percentile_interval(boot, confidence)
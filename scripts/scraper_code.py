@@ -11,170 +11,440 @@
 # __date__ = 30/09/2025
 
 # Required libraries:
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup as bs
-from pyjstat import pyjstat
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
 import pandas as pd
-import requests
-import time
+from urllib.parse import urlencode
+import json
 import re
 import os
 
+from http_cache import ResponseCache, sha256_bytes, sha256_file
+from jsonstat_decoder import decode_jsonstat_wide, KEY_DIMENSIONS
+from dbnomics import read_wide_csv, fetch_series_pages, decode_series_pages, DBNOMICS_API_URL
+from storage import write_dataset, read_dataset, default_format
+from instrument import Instrument, span
+from stages import run_graph, STAGE_WORKERS
+from options import scraper_parser
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(BASE_DIR, '..', 'data')
 
+# Eurostat API
+EUROSTAT_API_URL = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data"
+EUROSTAT_DATASETS = ['htec_sti_exp2', 'htec_sti_pers2']
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = (10, 120)
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 1.0
+SCRAPER_DATA_FILE = 'scraper_data.csv'
+SOURCE_NAMES = {'ESTAT': 'Eurostat'}
+METADATA_COLUMNS = ['dataset_id', 'dataset_source', 'dataset_title', 'dataset_last_updated', 'dataset_filter']
+ANALYSIS_NACE = ['G-N']
+REVISION_WINDOW = 2
+
+# DBnomics female researcher series: dimensions of the series codes and the series used
+FEM2_PATH = os.path.join(DATA_PATH, 'rd_p_bempoccr2.csv')
+FEM2_DATASET = ('Eurostat', 'rd_p_bempoccr2')
+FEM2_DIMENSIONS = ['freq', 'sex', 'nace_r2', 'prof_pos', 'unit', 'geo']
+FEM2_SERIES = {'freq': 'A', 'sex': 'F', 'nace_r2': 'G-N', 'prof_pos': 'RSE', 'unit': 'FTE'}
+
+# Dimensions spread into measure columns, outermost first (others default to payload order)
+WIDE_COLUMNS = {'htec_sti_exp2': ['unit'],
+                'htec_sti_pers2': ['unit', 'prof_pos']}
+
+# Web pages scraped with a browser
+METADATA_PAGES = {
+    'htec_sti_exp2': ('https://ec.europa.eu/eurostat/databrowser/view/htec_sti_exp2/default/table', 'eurostat'),
+    'htec_sti_pers2': ('https://ec.europa.eu/eurostat/databrowser/view/htec_sti_pers2/default/table', 'eurostat'),
+    'rd_p_bempoccr2': ('https://db.nomics.world/Eurostat/rd_p_bempoccr2?dimensions=%7B%22freq%22%3A%5B%22A%22%5D%2C%22nace_r2%22%3A%5B%22G-N%22%5D%7D&tab=table', 'dbnomics')}
+COUNTRIES_URL = 'https://ec.europa.eu/eurostat/statistics-explained/index.php?title=Glossary:Country_codes'
+PAGE_TIMEOUT = 60
+
+# Pipeline stages waiting on the network or a browser: timeout [s], which fails the run, and retries after errors
+STAGE_TIMEOUTS = {'download_fem2': 600, 'download_data': 1800, 'extract_metadata': 600, 'extract_countries_list': 600}
+STAGE_RETRIES = {'download_fem2': 2, 'download_data': 1, 'extract_metadata': 2, 'extract_countries_list': 2}
+
+# Elements the BeautifulSoup parsers read, per page kind, as Selenium (By, value)
+# locators; the By strings are spelled out so selenium loads only with a browser
+BY_XPATH = 'xpath'
+BY_CSS_SELECTOR = 'css selector'
+PAGE_READY = {
+    'eurostat': [(BY_XPATH, "//span[text()='last update']/following::b[contains(@class, 'infobox-text-data')]"),
+                 (BY_XPATH, "//span[text()='Source of data:']/following::span"),
+                 (BY_XPATH, "//span[text()='Online data code:']/following::b[contains(@class, 'infobox-text-data')]"),
+                 (BY_CSS_SELECTOR, "h1.ecl-page-header__title")],
+    'dbnomics': [(BY_CSS_SELECTOR, "p.text-sm"),
+                 (BY_CSS_SELECTOR, "div.grow.p-4 a.text-muted-foreground.link"),
+                 (BY_CSS_SELECTOR, "div.grow.p-4 h1 span.text-muted-foreground")],
+    'countries': [(BY_CSS_SELECTOR, "div#mw-content-text table")]}
+
 # Functions
-def extract_data():
+def create_session(pool_size = FETCH_WORKERS, retries = FETCH_RETRIES, backoff = FETCH_BACKOFF):
+    """Create a pooled HTTP session retrying transient errors with exponential backoff"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    import requests
+
+    retry = Retry(total = retries, backoff_factor = backoff, 
+                  status_forcelist = [429, 500, 502, 503, 504], allowed_methods = ['GET'])
+    adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size, max_retries = retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def query_filters(nace = None, geo = None, since = None, until = None):
+    """Dimension filters pushed down to the Eurostat API (None keeps a dimension whole)"""
+    filters = {}
+    if nace is not None:
+        filters['nace_r2'] = sorted(nace)
+    if geo is not None:
+        filters['geo'] = sorted(geo)
+    if since is not None:
+        filters['since'] = int(since)
+    if until is not None:
+        filters['until'] = int(until)
+    return filters
+
+def filter_params(filters = None):
+    """Eurostat API query parameters of a filter; time bounds map to since/untilTimePeriod"""
+    params = []
+    for dim, values in sorted((filters or {}).items()):
+        if dim == 'since':
+            params.append(('sinceTimePeriod', str(values)))
+        elif dim == 'until':
+            params.append(('untilTimePeriod', str(values)))
+        else:
+            params.extend((dim, value) for value in values)
+    return params
+
+def describe_filters(filters = None):
+    if isinstance(filters, list):
+        return " | ".join(describe_filters(f) for f in filters)
+    return urlencode(filter_params(filters))
+
+def dataset_url(code, base_url = EUROSTAT_API_URL, filters = None):
+    return f"{base_url}/{code}?{urlencode([('lang', 'en')] + filter_params(filters))}"
+
+def fetch_dataset(session, code, base_url = EUROSTAT_API_URL, timeout = FETCH_TIMEOUT, cache = None, 
+                  filters = None):
+    """Download the raw JSON-stat body of one Eurostat dataset, revalidating cached copies"""
+    url = dataset_url(code, base_url, filters)
+    headers = cache.validators(url) if cache is not None else {}
+    with span(code, 'http') as record:
+        response = session.get(url, headers = headers, timeout = timeout)
+        record.update(status_code = response.status_code, bytes_read = len(response.content))
+    if response.status_code == 304:
+        body = cache.get(url)
+        if body is not None:
+            return body
+        with span(code, 'http') as record:
+            response = session.get(url, timeout = timeout)
+            record.update(status_code = response.status_code, bytes_read = len(response.content))
+    response.raise_for_status()
+    if cache is not None:
+        cache.put(url, response.content, 
+                  etag = response.headers.get('ETag'), 
+                  last_modified = response.headers.get('Last-Modified'))
+    return response.content
+
+def decode_dataset(code, body):
+    """Decode a raw JSON-stat body into a wide nace_r2 × geo × time frame"""
+    return decode_jsonstat_wide(json.loads(body), keys = KEY_DIMENSIONS, columns = WIDE_COLUMNS.get(code))
+
+def fetch_datasets(codes = EUROSTAT_DATASETS, base_url = EUROSTAT_API_URL, 
+                   workers = FETCH_WORKERS, timeout = FETCH_TIMEOUT, cache = None, filters = None):
+    """Download several Eurostat datasets in parallel over one pooled session"""
+    workers = max(1, min(workers, len(codes)))
+    with create_session(pool_size = workers) as session:
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            bodies = list(pool.map(lambda code: fetch_dataset(session, code, base_url, timeout, cache, filters), 
+                                  codes))
+    if cache is not None:
+        cache.save()
+    return dict(zip(codes, bodies))
+
+def decode_bodies(pairs, workers = FETCH_WORKERS):
+    """Decode (code, body) pairs in a worker pool"""
+    workers = max(1, min(workers, len(pairs)))
+    codes = [code for code, _ in pairs]
+    bodies = [body for _, body in pairs]
+    if workers == 1:
+        return [decode_dataset(code, body) for code, body in pairs]
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(decode_dataset, codes, bodies))
+
+def decode_datasets(bodies, workers = FETCH_WORKERS):
+    """Decode downloaded JSON-stat bodies in a worker pool"""
+    return dict(zip(bodies, decode_bodies(list(bodies.items()), workers)))
+
+def data_fingerprint(bodies, fem2 = FEM2_PATH, filters = None):
+    """Hash of every input that scraper_data.csv is built from"""
+    parts = [f"{code}:{sha256_bytes(body)}" for code, body in sorted(bodies.items())]
+    parts.append(f"filters:{describe_filters(filters)}")
+    parts.append(f"fem2:{sha256_file(fem2) if isinstance(fem2, str) else sha256_bytes(b''.join(fem2))}")
+    return sha256_bytes("|".join(parts).encode('utf-8'))
+
+def download_data(codes = EUROSTAT_DATASETS, base_url = EUROSTAT_API_URL, cache = None, filters = None):
     print("---- O1.1 Extracting Eurostat datasets:")
     
-    print("• Extracting expenditure data (htec_sti_exp2)")
-    url_exp2 = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/htec_sti_exp2?lang=en"
-    response_exp2 = requests.get(url_exp2)
-    response_exp2.raise_for_status()
-    data_exp2 = response_exp2.json()
-    data_exp2 = pyjstat.from_json_stat(data_exp2, naming = 'id')[0]
-    print(f"✓ Expenditure data extracted: {len(data_exp2):,} records")
-    print(f"  Sample data: {data_exp2.shape}")
-
-    print("• Extracting personnel data (htec_sti_pers2)")
-    url_pers2 = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/htec_sti_pers2?lang=en"
-    response_pers2 = requests.get(url_pers2)
-    response_pers2.raise_for_status()
-    data_pers2 = response_pers2.json()
-    data_pers2 = pyjstat.from_json_stat(data_pers2, naming = 'id')[0]
-    print(f"✓ Personnel data extracted: {len(data_pers2):,} records")
-    print(f"  Sample data: {data_pers2.shape}")
+    print(f"• Downloading {len(codes)} Eurostat datasets in parallel")
+    print(f"  Source: {base_url}")
+    if filters:
+        print(f"  Filter: {describe_filters(filters)}")
+    bodies = fetch_datasets(codes, base_url, cache = cache, filters = filters)
+    for code, body in bodies.items():
+        print(f"✓ {code} downloaded: {len(body) / 1024:,.0f} kB")
+    
+    return bodies
 
-    print("• Extracting female researcher data")
-    url_fem2 = "https://db.nomics.world/Eurostat/rd_p_bempoccr2?dimensions=%7B%22freq%22%3A%5B%22A%22%5D%2C%22nace_r2%22%3A%5B%22G-N%22%5D%7D&tab=table"
-    file_name = 'rd_p_bempoccr2.csv'
-    fem2_path = os.path.join(DATA_PATH, file_name)
-    data_fem2 = pd.read_csv(fem2_path)
+def download_fem2(base_url = DBNOMICS_API_URL, timeout = FETCH_TIMEOUT):
+    """Download the female researcher series from the DBnomics API as raw JSON pages"""
+    print("• Downloading female researcher series from DBnomics")
+    print(f"  Source: {base_url}")
+    with create_session(pool_size = 1) as session:
+        with span(FEM2_DATASET[1], 'http') as record:
+            pages = fetch_series_pages(session, *FEM2_DATASET, select = FEM2_SERIES, base_url = base_url, 
+                                       timeout = timeout)
+            record['bytes_read'] = sum(len(page) for page in pages)
+    print(f"✓ {FEM2_DATASET[1]} downloaded: {sum(len(page) for page in pages) / 1024:,.0f} kB "
+          f"in {len(pages)} pages")
+    print()
     
-    # Process column names
-    for col in data_fem2.columns:
-        if col.startswith('Annual'):
-            match = re.search(r'\.([A-Z]{2,3})\)$', col)
-            if match and match.group(1):
-              geo = match.group(1)
-            else:
-              geo = 'UU'
-            data_fem2 = data_fem2.rename(columns={col: geo})
+    return pages
+
+def extract_data(bodies, cache = None, filters = None, fem2 = FEM2_PATH):
+    if cache is not None:
+        fingerprint = data_fingerprint(bodies, fem2, filters)
+        if (cache.marker(SCRAPER_DATA_FILE) == fingerprint 
+                and os.path.exists(os.path.join(DATA_PATH, SCRAPER_DATA_FILE))):
+            print("✓ Source datasets unchanged since the last run: decoding skipped")
+            print()
+            return None
+        cache.stage_marker(SCRAPER_DATA_FILE, fingerprint)
+
+    print("• Decoding JSON-stat datasets")
+    datasets = decode_datasets(bodies)
+    for code, data in datasets.items():
+        print(f"✓ {code} extracted: {len(data):,} rows × {data.shape[1]} columns")
+        print(f"  Sample data: {data.shape}")
+    data_exp2 = datasets['htec_sti_exp2']
+    data_pers2 = datasets['htec_sti_pers2']
+    data_fem2 = extract_fem2_data(fem2)
     
-    # Reshape data
-    data_fem2 = data_fem2.melt(id_vars = ['period'], 
-                               value_vars = data_fem2.columns[1:274], 
-                               var_name = 'geo', 
-                               value_name = 'fem2_FTE_RSE')
-    data_fem2 = data_fem2[data_fem2['geo'] != "UU"]
-    data_fem2 = data_fem2.rename(columns={'period': 'time'})
-    data_fem2['time'] = data_fem2['time'].map(str)
-    data_fem2['nace_r2'] = 'G-N'
-    print(f"✓ Female researcher data processed: {len(data_fem2):,} records")
+    return data_exp2, data_pers2, data_fem2
+
+def extract_fem2_data(fem2 = FEM2_PATH, chunksize = None):
+    """Female researcher FTEs from a DBnomics wide CSV export (path) or DBnomics API pages (list of bodies)"""
+    print("• Extracting female researcher data")
+    if isinstance(fem2, str):
+        data = read_wide_csv(fem2, FEM2_DIMENSIONS, select = FEM2_SERIES, chunksize = chunksize)
+    else:
+        data = decode_series_pages(fem2, FEM2_DIMENSIONS)
+    series = pd.Series(True, index = data.index)
+    for dim, code in FEM2_SERIES.items():
+        series &= data[dim] == code
+
+    data_fem2 = data.loc[series, ['nace_r2', 'geo', 'time', 'value']].astype({'nace_r2': str, 'geo': str})
+    data_fem2 = data_fem2.rename(columns = {'value': 'fem2_FTE_RSE'}).reset_index(drop = True)
+    print(f"✓ Female researcher data processed: {len(data_fem2):,} records "
+          f"({data_fem2['geo'].nunique()} countries)")
     print(f"  Sample data: {data_fem2.shape}")
     print()
     
-    return data_exp2, data_pers2, data_fem2
+    return data_fem2
 
-def extract_metadata():
-    print("---- O1.2 Extracting dataset metadata:")
-    
-    print("• Extracting expenditure dataset metadata")
-    url_exp2_meta = 'https://ec.europa.eu/eurostat/databrowser/view/htec_sti_exp2/default/table'
-    print(f"  Source: {url_exp2_meta}")
-    
-    chrome_options = Options()
-    driver_exp2 = webdriver.Chrome(options = chrome_options)
-    driver_exp2.get(url_exp2_meta)
-    print("  • Webpage opened")
-    time.sleep(20) 
-    r = driver_exp2.page_source
-    print("  • Page source extracted")
-    soup_exp2 = bs(r, "html.parser")
-    driver_exp2.close()
-    print("  • Browser closed")
-
-    print("  • Parsing metadata fields")
-    body = soup_exp2.find('body')
-    marker = body.find('span', string = "last update")
-    tag = marker.find_next("b", class_ = "infobox-text-data")
-    exp2_date = tag.get_text(strip = True)
-    print(f"    - Last updated: {exp2_date}")
-    
-    marker = body.find('span', string = "Source of data:")
-    tag = marker.find_next("span")
-    exp2_source = tag.get_text(strip = True)
-    print(f"    - Source: {exp2_source}")
-    
-    exp2_title = soup_exp2.find('h1', class_ = "ecl-page-header__title").get_text()
-    print(f"    - Title: {exp2_title}")
-    
-    marker = body.find('span', string = "Online data code:")
-    tag = marker.find_next("b", class_ = "infobox-text-data")
-    exp2_id = tag.get_text(strip = True)
-    print(f"    - Dataset ID: {exp2_id}")
-    
-    exp2_meta = [exp2_id, exp2_source, exp2_title, exp2_date]
+def time_watermarks(store, filters = None):
+    """Latest period with any observation per (nace_r2, geo) series of the stored dataset.
+
+    With nace_r2 / geo ``filters`` only the series they select are kept,
+    including pairs not in the store yet. Series without any observation
+    get a missing watermark.
+    """
+    measures = [c for c in store.columns if c not in KEY_DIMENSIONS]
+    keys = store[['nace_r2', 'geo']].astype(str)
+    observed = store[store[measures].notna().any(axis = 1)].assign(nace_r2 = keys['nace_r2'], geo = keys['geo'])
+    latest = observed.groupby(['nace_r2', 'geo'])['time'].max().astype('Int64')
+
+    series = pd.MultiIndex.from_frame(keys).unique()
+    filters = filters or {}
+    if 'nace_r2' in filters or 'geo' in filters:
+        series = pd.MultiIndex.from_product([filters.get('nace_r2', series.get_level_values('nace_r2').unique()),
+                                             filters.get('geo', series.get_level_values('geo').unique())],
+                                            names = ['nace_r2', 'geo'])
+    return latest.reindex(series.sort_values())
+
+def increment_filters(watermarks, revision_window = REVISION_WINDOW, filters = None):
+    """API filters re-requesting the last ``revision_window`` periods of each series and anything newer.
+
+    Series without a watermark are requested from the configured start
+    period (the ``since`` filter, else their whole history). Series sharing
+    the same first period are batched into one request, so a typical refresh
+    needs one or two small downloads per dataset.
+    """
+    filters = filters or {}
+    first = filters.get('since')
+    since = watermarks - revision_window + 1
+    batches = []
+    for start, group in since.groupby(since, dropna = False):
+        nace = group.index.get_level_values('nace_r2').unique()
+        geo = group.index.get_level_values('geo').unique()
+        start = first if pd.isna(start) else max(start, first if first is not None else start)
+        batch = query_filters(nace = nace, geo = geo, since = start, until = filters.get('until'))
+        batches.append(batch)
+    return batches
+
+def download_increment(store, codes = EUROSTAT_DATASETS, base_url = EUROSTAT_API_URL, cache = None, 
+                       revision_window = REVISION_WINDOW, filters = None):
+    print("---- O1.1 Extracting new Eurostat periods:")
+
+    watermarks = time_watermarks(store, filters)
+    print(f"• Latest stored periods: {watermarks.min()}–{watermarks.max()} "
+          f"across {len(watermarks):,} series (revision window: {revision_window} periods)")
+    if watermarks.isna().any():
+        first = (filters or {}).get('since', 'their first period')
+        print(f"• {watermarks.isna().sum():,} series without stored observations: requested from {first}")
+    batches = increment_filters(watermarks, revision_window, filters)
+    
+    bodies = {code: [] for code in codes}
+    for batch in batches:
+        print(f"• Downloading periods since {batch.get('since', 'the first period')} for {len(batch['geo'])} countries")
+        print(f"  Filter: {describe_filters(batch)}")
+        for code, body in fetch_datasets(codes, base_url, cache = cache, filters = batch).items():
+            bodies[code].append(body)
+            print(f"✓ {code} downloaded: {len(body) / 1024:,.0f} kB")
     print()
+    
+    return bodies, batches
+
+def extract_increment(bodies, fem2 = FEM2_PATH):
+    print("• Decoding JSON-stat increments")
+    pairs = [(code, body) for code, batch_bodies in bodies.items() for body in batch_bodies]
+    frames = {code: [] for code in bodies}
+    for (code, _), frame in zip(pairs, decode_bodies(pairs)):
+        frames[code].append(frame.astype({key: str for key in KEY_DIMENSIONS}))
+    datasets = {}
+    for code, code_frames in frames.items():
+        data = pd.concat(code_frames, ignore_index = True).drop_duplicates(KEY_DIMENSIONS, keep = 'last')
+        datasets[code] = data.sort_values(KEY_DIMENSIONS, kind = 'stable', ignore_index = True)
+        print(f"✓ {code} extracted: {len(data):,} rows × {data.shape[1]} columns")
+    data_exp2 = datasets['htec_sti_exp2']
+    data_pers2 = datasets['htec_sti_pers2']
+    data_fem2 = extract_fem2_data(fem2)
+
+    return data_exp2, data_pers2, data_fem2
+
+def upsert_datasets(store, delta):
+    """Replace the stored rows of every (nace_r2, geo, time) key present in ``delta``.
+
+    Keys are compared as whole row groups, so stores holding several rows per key
+    are upserted consistently. Returns the new dataset and the number of rows
+    inserted, updated and unchanged.
+    """
+    print("---- O4 Upserting increment:")
+
+    store = store.astype({key: str for key in KEY_DIMENSIONS})
+    delta = delta[store.columns].astype({key: str for key in KEY_DIMENSIONS})
+    measures = [c for c in store.columns if c not in KEY_DIMENSIONS]
+
+    def key_digest(data):
+        hashes = pd.util.hash_pandas_object(data[measures].astype('float64'), index = False)
+        frame = data[KEY_DIMENSIONS].assign(hash = hashes.values)
+        return frame.groupby(KEY_DIMENSIONS)['hash'].agg(['sum', 'size'])
 
-    print("• Extracting personnel dataset metadata")
-    url_pers2_meta = 'https://ec.europa.eu/eurostat/databrowser/view/htec_sti_pers2/default/table'
-    print(f"  Source: {url_pers2_meta}")
+    old = key_digest(store)
+    new = key_digest(delta)
+    both = new.index.intersection(old.index)
+    same = (old.loc[both] == new.loc[both]).all(axis = 1)
+    counts = {'inserted': int(new.loc[new.index.difference(old.index), 'size'].sum()),
+              'updated': int(new.loc[same.index[~same], 'size'].sum()),
+              'unchanged': int(new.loc[same.index[same], 'size'].sum())}
+
+    replaced = pd.MultiIndex.from_frame(store[KEY_DIMENSIONS]).isin(new.index)
+    data = pd.concat([store[~replaced], delta], ignore_index = True)
+    data = data.sort_values(KEY_DIMENSIONS, kind = 'stable', ignore_index = True)
+    print(f"✓ Rows inserted: {counts['inserted']:,}, updated: {counts['updated']:,}, "
+          f"unchanged: {counts['unchanged']:,}")
+
+    data = save_scraper_data(data)
     
+    return data, counts
+
+def open_browser(headless = True):
+    """Start one Chrome session whose tabs are navigated without blocking on page load"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     chrome_options = Options()
-    driver_pers2 = webdriver.Chrome(options = chrome_options)
-    driver_pers2.get(url_pers2_meta)
-    print("  • Webpage opened")
-    time.sleep(20) 
-    r = driver_pers2.page_source
-    print("  • Page source extracted")
-    soup_pers2 = bs(r, "html.parser")
-    driver_pers2.close()
-    print("  • Browser closed")
-
-    print("  • Parsing metadata fields")
-    body = soup_pers2.find('body')
+    if headless:
+        chrome_options.add_argument('--headless=new')
+    chrome_options.page_load_strategy = 'none'
+    return webdriver.Chrome(options = chrome_options)
+
+def elements_present(locators):
+    """Wait condition satisfied once every locator matches at least one element"""
+    def condition(driver):
+        return all(driver.find_elements(*locator) for locator in locators)
+    return condition
+
+def load_pages(driver, pages, timeout = PAGE_TIMEOUT):
+    """Load pages concurrently in browser tabs and return their sources once ready.
+
+    ``pages`` maps a name to ``(url, locators)``; each tab is read as soon as
+    all of its locators are present instead of after a fixed sleep.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    handles = {}
+    for i, (name, (url, locators)) in enumerate(pages.items()):
+        if i > 0:
+            driver.switch_to.new_window('tab')
+        driver.get(url)
+        handles[name] = driver.current_window_handle
+        print(f"  • Webpage opened: {url}")
+
+    sources = {}
+    for name, (url, locators) in pages.items():
+        driver.switch_to.window(handles[name])
+        with span(name, 'browser') as record:
+            WebDriverWait(driver, timeout).until(elements_present(locators))
+            sources[name] = driver.page_source
+            record['bytes_read'] = len(sources[name])
+        print(f"  • Page source extracted: {name}")
+
+    for handle in list(handles.values())[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(next(iter(handles.values())))
+    return sources
+
+def parse_eurostat_metadata(soup):
+    body = soup.find('body')
     marker = body.find('span', string = "last update")
     tag = marker.find_next("b", class_ = "infobox-text-data")
-    pers2_date = tag.get_text(strip = True)
-    print(f"    - Last updated: {pers2_date}")
+    date = tag.get_text(strip = True)
+    print(f"    - Last updated: {date}")
     
     marker = body.find('span', string = "Source of data:")
     tag = marker.find_next("span")
-    pers2_source = tag.get_text(strip = True)
-    print(f"    - Source: {pers2_source}")
+    source = tag.get_text(strip = True)
+    print(f"    - Source: {source}")
     
-    pers2_title = soup_pers2.find('h1', class_ = "ecl-page-header__title").get_text()
-    print(f"    - Title: {pers2_title}")
+    title = soup.find('h1', class_ = "ecl-page-header__title").get_text()
+    print(f"    - Title: {title}")
     
     marker = body.find('span', string = "Online data code:")
     tag = marker.find_next("b", class_ = "infobox-text-data")
-    pers2_id = tag.get_text(strip = True)
-    print(f"    - Dataset ID: {pers2_id}")
+    dataset_id = tag.get_text(strip = True)
+    print(f"    - Dataset ID: {dataset_id}")
     
-    pers2_meta = [pers2_id, pers2_source, pers2_title, pers2_date]
-    print()
+    return [dataset_id, source, title, date]
 
-    print("• Extracting female researcher dataset metadata")
-    url_fem2_meta = 'https://db.nomics.world/Eurostat/rd_p_bempoccr2?dimensions=%7B%22freq%22%3A%5B%22A%22%5D%2C%22nace_r2%22%3A%5B%22G-N%22%5D%7D&tab=table'
-    print(f"  Source: {url_fem2_meta}")
-    
-    chrome_options = Options()
-    driver_fem2 = webdriver.Chrome(options = chrome_options)
-    driver_fem2.get(url_fem2_meta)
-    print("  • Webpage opened")
-    time.sleep(20) 
-    r = driver_fem2.page_source
-    print("  • Page source extracted")
-    soup_fem2 = bs(r, "html.parser")
-    driver_fem2.close()
-    print("  • Browser closed")
-
-    print("  • Parsing metadata fields")
-    body = soup_fem2.find('body')
+def parse_dbnomics_metadata(soup):
+    body = soup.find('body')
     marker = body.find("p", class_ = "text-sm")
     text = marker.get_text(strip = True)
     match = re.search(r'on(\w+\s+\d+,\s+\d+)\s+\((\d+:\d+\s+[AP]M)\)', text)
@@ -182,33 +452,92 @@ def extract_metadata():
         date_str = match.group(1)
         time_str = match.group(2)
         dt = datetime.strptime(f"{date_str} {time_str}", "%B %d, %Y %I:%M %p")
-        fem2_date = dt.strftime("%d/%m/%Y %H:%M")
-        print(f"    - Last updated: {fem2_date}")
+        date = dt.strftime("%d/%m/%Y %H:%M")
+        print(f"    - Last updated: {date}")
     else: 
-        fem2_date = 'None'
-        print(f"    - Last updated: {fem2_date}")
+        date = 'None'
+        print(f"    - Last updated: {date}")
     
     div = body.find('div', class_ = "grow p-4")
     a = div.find_next('a', class_ = "text-muted-foreground link")
-    fem2_source = a.get_text(strip = True)[1:-1]
-    print(f"    - Source: {fem2_source}")
+    source = a.get_text(strip = True)[1:-1]
+    print(f"    - Source: {source}")
     
-    div = body.find('div', class_ = "grow p-4")
     h1 = div.find('h1', class_ = "text-4xl font-medium tracking-tight mb-8 mt-0")
     spans = h1.find_all('span')
-    fem2_title = spans[3].get_text(strip = True)
-    print(f"    - Title: {fem2_title}")
+    title = spans[3].get_text(strip = True)
+    print(f"    - Title: {title}")
     
     marker = h1.find('span', class_ = "text-muted-foreground")
-    fem2_id = marker.get_text(strip = True)[1:-1]
-    print(f"    - Dataset ID: {fem2_id}")
+    dataset_id = marker.get_text(strip = True)[1:-1]
+    print(f"    - Dataset ID: {dataset_id}")
     
-    fem2_meta = [fem2_id, fem2_source, fem2_title, fem2_date]
-    print()
+    return [dataset_id, source, title, date]
+
+def jsonstat_metadata(code, body):
+    """Read the metadata fields of a JSON-stat payload: id, source, title and last update"""
+    payload = json.loads(body)
+    extension = payload.get('extension', {})
+    dataset_id = (extension.get('datasetId') or extension.get('id') or code).lower()
+    source = SOURCE_NAMES.get(payload.get('source'), payload.get('source'))
+    title = payload.get('label')
+    if payload.get('updated'):
+        date = datetime.fromisoformat(payload['updated']).strftime("%d/%m/%Y %H:%M")
+    else:
+        date = 'None'
+    print(f"    - Last updated: {date}")
+    print(f"    - Source: {source}")
+    print(f"    - Title: {title}")
+    print(f"    - Dataset ID: {dataset_id}")
+    
+    return [dataset_id, source, title, date]
+
+def load_saved_metadata(name):
+    """Last saved metadata row of a dataset, or placeholders when it was never scraped"""
+    save_path = os.path.join(DATA_PATH, 'scraper_metadata.csv')
+    if os.path.exists(save_path):
+        saved = pd.read_csv(save_path, dtype = str)
+        saved = saved[saved['dataset_id'].str.replace('\u200b', '') == name]
+        if len(saved):
+            return saved.iloc[0][METADATA_COLUMNS[:4]].tolist()
+    return [name, 'None', 'None', 'None']
+
+def extract_metadata(bodies, driver = None, pages = METADATA_PAGES, filters = None):
+    """Build the metadata table from JSON-stat payloads.
+
+    Datasets without a JSON-stat payload (DBnomics) are scraped with the browser
+    only when a ``driver`` is passed; otherwise their last saved row is kept.
+    The API filter the payloads were downloaded with is recorded per dataset.
+    """
+    print("---- O1.2 Extracting dataset metadata:")
+
+    rows = []
+    for name, body in bodies.items():
+        print(f"• Reading {name} metadata from the JSON-stat payload")
+        rows.append(jsonstat_metadata(name, body) + [describe_filters(filters)])
+        print()
+
+    fallback = {name: page for name, page in pages.items() if name not in bodies}
+    if fallback and driver is not None:
+        from bs4 import BeautifulSoup as bs
+        print("• Loading remaining dataset pages in browser tabs")
+        sources = load_pages(driver, {name: (url, PAGE_READY[kind]) for name, (url, kind) in fallback.items()})
+        print()
+
+        parsers = {'eurostat': parse_eurostat_metadata, 'dbnomics': parse_dbnomics_metadata}
+        for name, (url, kind) in fallback.items():
+            print(f"• Parsing {name} metadata fields")
+            print(f"  Source: {url}")
+            rows.append(parsers[kind](bs(sources[name], "html.parser")) + [''])
+            print()
+    else:
+        for name in fallback:
+            print(f"• {name}: no JSON-stat payload, keeping the last saved metadata")
+            rows.append(load_saved_metadata(name) + [''])
+        print()
 
     print("• Creating metadata dataset")
-    meta = pd.DataFrame([exp2_meta, pers2_meta, fem2_meta], 
-                       columns = ['dataset_id', 'dataset_source', 'dataset_title', 'dataset_last_updated'])
+    meta = pd.DataFrame(rows, columns = METADATA_COLUMNS)
     print(f"✓ Metadata dataset created: {meta.shape[0]} datasets")
     print(meta)
 
@@ -221,23 +550,8 @@ def extract_metadata():
     
     return meta
 
-def extract_countries_list():
-    print("---- O1.3 Extracting EU + EFTA countries list:")
-    
-    url_countries_meta = 'https://ec.europa.eu/eurostat/statistics-explained/index.php?title=Glossary:Country_codes'
-    print(f"• Source: {url_countries_meta}")
-    
-    chrome_options = Options()
-    driver_co = webdriver.Chrome(options = chrome_options)
-    driver_co.get(url_countries_meta)
-    print("  • Webpage opened")
-    time.sleep(20) 
-    r = driver_co.page_source
-    print("  • Page source extracted")
-    soup_co = bs(r, "html.parser")
-    driver_co.close()
-    print("  • Browser closed")
-
+def parse_countries_list(soup_co):
+    """EU and EFTA countries (name and geo code) from the first two tables of the country codes glossary"""
     print("  • Parsing country data from tables")
     content_div = soup_co.find('div', {'id': 'mw-content-text'})
     tables = content_div.find_all('table')
@@ -262,6 +576,24 @@ def extract_countries_list():
     
     eu_efta_countries_df = pd.DataFrame.from_dict(eu_efta_countries)
     print(f"✓ Countries extracted: {len(eu_efta_countries_df)} countries")
+    
+    return eu_efta_countries_df
+
+def extract_countries_list(driver = None, url_countries_meta = COUNTRIES_URL):
+    print("---- O1.3 Extracting EU + EFTA countries list:")
+    
+    print(f"• Source: {url_countries_meta}")
+    own_driver = driver is None
+    if own_driver:
+        driver = open_browser()
+    try:
+        r = load_pages(driver, {'countries': (url_countries_meta, PAGE_READY['countries'])})['countries']
+    finally:
+        if own_driver:
+            driver.quit()
+            print("  • Browser closed")
+    from bs4 import BeautifulSoup as bs
+    eu_efta_countries_df = parse_countries_list(bs(r, "html.parser"))
 
     print("• Saving countries list")
     file_name = 'eu_efta_countries.csv'
@@ -274,30 +606,20 @@ def extract_countries_list():
 
 def process_datasets(data_exp2, data_pers2):
     print("---- O2 Preprocessing datasets:")
-    
-    print("• Cleaning datasets")
-    data_exp2.drop(columns = ['freq'], inplace = True)
-    data_pers2.drop(columns = ['freq'], inplace = True) 
-    print("  ✓ Unused columns removed")
-
-    print("• Transforming expenditure data to wide format")
-    data_exp2_wide = data_exp2.pivot(index = ['nace_r2', 'geo', 'time'], columns = 'unit', values = 'value').reset_index()
-    data_exp2_wide = data_exp2_wide.rename(columns=lambda x: f"exp2_{x}" if x not in ['nace_r2', 'geo', 'time'] else x)
+
+    print("• Labelling expenditure measures")
+    data_exp2_wide = data_exp2.rename(columns=lambda x: f"exp2_{x}" if x not in KEY_DIMENSIONS else x)
     print(f"  ✓ Expenditure data: {data_exp2_wide.shape[0]:,} rows × {data_exp2_wide.shape[1]} columns")
     print(f"    Sample: {data_exp2_wide.shape}")
 
-    print("• Transforming personnel data to wide format")
-    data_pers2_wide = data_pers2.pivot(index = ['nace_r2', 'geo', 'time', 'prof_pos'], columns = ['unit'], values = 'value').reset_index()
-    data_pers2_wide = data_pers2_wide.pivot(index = ['nace_r2', 'geo', 'time'], columns = ['prof_pos'], values = ['FTE','HC']).reset_index()
-    data_pers2_wide.columns = ["_".join([str(c) for c in col if c != ""])
-                                for col in data_pers2_wide.columns.to_flat_index()]
-    data_pers2_wide = data_pers2_wide.rename(columns=lambda x: f"pers2_{x}" if x not in ['nace_r2', 'geo', 'time'] else x)
+    print("• Labelling personnel measures")
+    data_pers2_wide = data_pers2.rename(columns=lambda x: f"pers2_{x}" if x not in KEY_DIMENSIONS else x)
     print(f"  ✓ Personnel data: {data_pers2_wide.shape[0]:,} rows × {data_pers2_wide.shape[1]} columns")
     print(f"    Sample: {data_pers2_wide.shape}")
     
     return data_exp2_wide, data_pers2_wide
 
-def merge_datasets(data_exp2_wide, data_pers2_wide, data_fem2):
+def merge_datasets(data_exp2_wide, data_pers2_wide, data_fem2, save = True):
     print("---- O3 Merging datasets:")
 
     print("• Merging all datasets")
@@ -311,34 +633,140 @@ def merge_datasets(data_exp2_wide, data_pers2_wide, data_fem2):
     print(f"  - Geographic levels: {len(data['geo'].unique())} countries")
     print(f"  - Time levels: {len(data['time'].unique())} years")
 
+    if save:
+        data = save_scraper_data(data)
+    else:
+        print()
+    
+    return data
+
+def save_scraper_data(data, fmt = None):
     print("• Saving merged dataset")
-    file_name = 'scraper_data.csv'
-    save_path = os.path.join(DATA_PATH, file_name)
-    data.to_csv(save_path, encoding='utf-8', index = False)
+    fmt = fmt or default_format()
+    data = write_dataset(data, 'scraper_data', fmt = fmt)
+    if fmt == 'parquet':
+        print("✓ Merged dataset saved: ../data/scraper_data/ (Parquet, partitioned by nace_r2)")
     print("✓ Merged dataset saved: ../data/scraper_data.csv")
     print()
     
     return data
 
-def main():
+def download_stage(cache, filters = None, incremental = False, revision_window = REVISION_WINDOW):
+    """Full download, or the recent periods of the stored dataset with ``incremental``"""
+    if not incremental:
+        return None, None, download_data(cache = cache, filters = filters), filters
+    store = read_dataset('scraper_data')
+    batch_bodies, batches = download_increment(store, cache = cache, revision_window = revision_window, 
+                                               filters = filters)
+    cache.save()
+    bodies = {code: code_bodies[-1] for code, code_bodies in batch_bodies.items() if code_bodies}
+    return store, batch_bodies, bodies, batches
+
+def extract_stage(batch_bodies, bodies, filters, fem2, cache):
+    if batch_bodies is not None:
+        if not any(batch_bodies.values()):
+            print("✓ No series to refresh: decoding skipped")
+            print()
+            return None
+        return extract_increment(batch_bodies, fem2 = fem2)
+    return extract_data(bodies, cache = cache, filters = filters, fem2 = fem2)
+
+def metadata_stage(bodies, filters, browser_metadata = False):
+    """Metadata table, scraping the DBnomics page in a browser of its own with ``browser_metadata``"""
+    driver = open_browser() if browser_metadata else None
+    try:
+        return extract_metadata(bodies, driver = driver, filters = filters)
+    finally:
+        if driver is not None:
+            driver.quit()
+
+def countries_stage(refresh = False, path = os.path.join(DATA_PATH, 'eu_efta_countries.csv')):
+    if refresh or not os.path.exists(path):
+        return extract_countries_list()
+    countries_df = pd.read_csv(path)
+    print(f"---- O1.3 EU + EFTA countries list loaded: {len(countries_df)} countries")
+    print()
+    return countries_df
+
+def process_stage(extracted):
+    if extracted is None:
+        return None
+    data_exp2, data_pers2, _ = extracted
+    return process_datasets(data_exp2, data_pers2)
+
+def merge_stage(extracted, wide, store, cache):
+    if extracted is None:
+        print("Final dataset: ../data/scraper_data.csv is up to date")
+        return None
+    data_fem2 = extracted[2]
+    if store is not None:
+        delta = merge_datasets(*wide, data_fem2, save = False)
+        merged_data, counts = upsert_datasets(store, delta)
+    else:
+        merged_data = merge_datasets(*wide, data_fem2)
+        cache.commit_marker(SCRAPER_DATA_FILE)
+        cache.save()
+    print(f"Final dataset: {merged_data.shape[0]:,} rows × {merged_data.shape[1]} columns")
+    return merged_data
+
+def scraper_stages(cache, filters = None, browser_metadata = False, refresh_countries = False, incremental = False, 
+                   revision_window = REVISION_WINDOW, fem2_api = False, dbnomics_url = DBNOMICS_API_URL):
+    """Stages of the scraping pipeline with the state they read and write.
+
+    The download, metadata and countries branches only meet at the merge, so
+    they run concurrently.
+    """
+    stages = [
+        {'name': 'download_fem2', 'inputs': [], 'outputs': ['fem2'],
+         'func': partial(download_fem2, dbnomics_url) if fem2_api else lambda: FEM2_PATH},
+        {'name': 'download_data', 'inputs': [], 'outputs': ['store', 'batch_bodies', 'bodies', 'filters'],
+         'func': partial(download_stage, cache, filters, incremental, revision_window)},
+        {'name': 'extract_data', 'inputs': ['batch_bodies', 'bodies', 'filters', 'fem2'], 'outputs': ['extracted'],
+         'func': partial(extract_stage, cache = cache)},
+        {'name': 'extract_metadata', 'inputs': ['bodies', 'filters'], 'outputs': ['meta'],
+         'func': partial(metadata_stage, browser_metadata = browser_metadata)},
+        {'name': 'extract_countries_list', 'inputs': [], 'outputs': ['countries'],
+         'func': partial(countries_stage, refresh_countries)},
+        {'name': 'process_datasets', 'inputs': ['extracted'], 'outputs': ['wide'], 'func': process_stage},
+        {'name': 'merge_datasets', 'inputs': ['extracted', 'wide', 'store'], 'outputs': ['merged'],
+         'func': partial(merge_stage, cache = cache)}]
+    for stage in stages:
+        stage['timeout'] = STAGE_TIMEOUTS.get(stage['name'])
+        stage['retries'] = STAGE_RETRIES.get(stage['name'], 0)
+    return stages
+
+def main(browser_metadata = False, refresh_countries = False, pushdown = False, since = None, until = None, 
+         incremental = False, revision_window = REVISION_WINDOW, fem2_api = False, dbnomics_url = DBNOMICS_API_URL,
+         metrics = None, profile = None, only = None, workers = STAGE_WORKERS):
     print("=" * 60)
     print("Efficiency and Diversity of R&D in Knowledge‑Intensive Services (2005‑2023)")
     print("Data Scraping Pipeline")
     print("=" * 60)
     print()
     
-    data_exp2, data_pers2, data_fem2 = extract_data()
-    
-    meta = extract_metadata()
-    
-    countries_df = extract_countries_list()
-    
-    data_exp2_wide, data_pers2_wide = process_datasets(data_exp2, data_pers2)
+    countries_path = os.path.join(DATA_PATH, 'eu_efta_countries.csv')
+    filters = None
+    if pushdown:
+        geo = pd.read_csv(countries_path)['geo'] if os.path.exists(countries_path) else None
+        filters = query_filters(nace = ANALYSIS_NACE, geo = geo, since = since, until = until)
+    incremental = incremental and os.path.exists(os.path.join(DATA_PATH, SCRAPER_DATA_FILE))
 
-    merged_data = merge_datasets(data_exp2_wide, data_pers2_wide, data_fem2)
+    cache = ResponseCache()
+    stages = scraper_stages(cache, filters, browser_metadata, refresh_countries, incremental, revision_window, 
+                            fem2_api, dbnomics_url)
+    with Instrument('scraper', metrics, profile):
+        # Profilers hook the whole interpreter, so profiled stages run one at a time
+        run_graph(stages, workers = 1 if profile else workers, only = only)
 
-    print(f"Final dataset: {merged_data.shape[0]:,} rows × {merged_data.shape[1]} columns")
+def cli(argv = None, prog = None):
+    parser = scraper_parser(prog)
+    parser.set_defaults(revision_window = REVISION_WINDOW, dbnomics_url = DBNOMICS_API_URL, stage_workers = STAGE_WORKERS)
+    args = parser.parse_args(argv)
+    main(browser_metadata = args.browser_metadata, refresh_countries = args.refresh_countries, 
+         pushdown = args.pushdown, since = args.since, until = args.until, 
+         incremental = args.incremental, revision_window = args.revision_window, 
+         fem2_api = args.fem2_api, dbnomics_url = args.dbnomics_url, metrics = args.metrics, profile = args.profile, 
+         only = args.stage, workers = args.stage_workers)
 
 if __name__ == "__main__":
-    main()
-
+    cli()
@@ -0,0 +1,319 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from functools import partial
+import threading
+import inspect
+import pickle
+import time
+import sys
+import io
+import os
+
+from http_cache import ResponseCache, sha256_bytes
+from instrument import span, rows_of
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGE_CACHE_PATH = os.path.join(BASE_DIR, '..', 'data', 'stage_cache')
+STAGE_CACHE_MAX_BYTES = 1024 ** 3
+
+STAGE_WORKERS = 4
+STAGE_RETRY_BACKOFF = 2.0
+STAGE_DRAIN_TIMEOUT = 60.0
+
+# Functions
+def code_version(*objects):
+    """Hash of the source code of functions (or partials of them), classes or modules"""
+    objects = [obj.func if isinstance(obj, partial) else obj for obj in objects]
+    return sha256_bytes("\n".join(inspect.getsource(obj) for obj in objects).encode('utf-8'))
+
+def plain(value):
+    """Whether a value is plain data, whose repr is stable across runs"""
+    if value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(plain(k) and plain(v) for k, v in value.items())
+    return False
+
+def config_constants(*objects):
+    """Module-level constants (UPPER_CASE plain-data globals) that functions, partials or modules read.
+
+    Functions contribute their defaults and the globals named in their code
+    (nested code such as comprehensions included), partials their bound
+    arguments, and modules all their constants.
+    """
+    constants = {}
+    for obj in objects:
+        if isinstance(obj, partial):
+            constants[f"{obj.func.__name__}()"] = (obj.args, sorted(obj.keywords.items()))
+            obj = obj.func
+        if inspect.ismodule(obj):
+            names, namespace = list(vars(obj)), vars(obj)
+        elif inspect.isfunction(obj):
+            # Defaults (e.g. ``nace = NACE_CODE``) were bound when the function was defined
+            defaults = (obj.__defaults__ or (), sorted((obj.__kwdefaults__ or {}).items()))
+            if plain(defaults):
+                constants[f"{obj.__name__}.__defaults__"] = defaults
+            names, codes, namespace = [], [obj.__code__], obj.__globals__
+            while codes:
+                code = codes.pop()
+                names += code.co_names
+                codes += [const for const in code.co_consts if inspect.iscode(const)]
+        else:
+            continue
+        for name in names:
+            if name.isupper() and name in namespace and plain(namespace[name]):
+                constants[f"{getattr(obj, '__name__', '')}.{name}"] = namespace[name]
+    return constants
+
+def stage_key(previous, stage):
+    """Key of a stage result: its input key, name, code version, parameters and the constants its code reads"""
+    code = code_version(stage['func'], *stage.get('deps', []))
+    params = repr(sorted(stage.get('params', {}).items()))
+    config = repr(sorted(config_constants(stage['func'], *stage.get('deps', [])).items()))
+    return sha256_bytes("|".join([previous, stage['name'], code, params, config]).encode('utf-8'))
+
+def stage_keys(input_key, stages):
+    """Chained keys: every stage is keyed on the key of the stage feeding it"""
+    keys = []
+    for stage in stages:
+        input_key = stage_key(input_key, stage)
+        keys.append(input_key)
+    return keys
+
+class SpecRecorder:
+    """Collects the figure specs a stage emits, so they can be cached with its result"""
+
+    def __init__(self):
+        self.specs = []
+
+    def submit(self, spec):
+        self.specs.append(spec)
+
+def run_stages(stages, input_key, renderer, cache = None):
+    """Run a linear pipeline of stages, resuming after the longest cached prefix.
+
+    Each stage reads ``inputs`` from and writes ``outputs`` to a shared state.
+    After a stage runs, the whole state and its figure specs are pickled into
+    ``cache`` under the stage key; a re-run restores the state of the last
+    stage before the first invalidated one and only re-runs from there. The
+    specs of restored stages are still handed to ``renderer``.
+    """
+    keys = stage_keys(input_key, stages)
+    resume = 0
+    if cache is not None:
+        while resume < len(stages) and all(cache.entry(f"{keys[resume]}/{part}") for part in ['state', 'specs']):
+            resume += 1
+
+    state = {}
+    if resume:
+        with span('cache_restore', 'stage'):
+            blobs = [cache.get(f"{key}/specs") for key in keys[:resume]] + [cache.get(f"{keys[resume - 1]}/state")]
+            if any(blob is None for blob in blobs):
+                resume = 0
+            else:
+                for stage, blob in zip(stages, blobs[:-1]):
+                    for spec in pickle.loads(blob):
+                        renderer.submit(spec)
+                    print(f"• Stage '{stage['name']}' restored from cache")
+                state = pickle.loads(blobs[-1])
+                print()
+
+    for key, stage in list(zip(keys, stages))[resume:]:
+        recorder = SpecRecorder()
+        args = [state[name] for name in stage['inputs']]
+        with span(stage['name'], 'stage', rows_of(args)) as record:
+            result = stage['func'](*args, recorder) if stage.get('figures') else stage['func'](*args)
+            record['rows_out'] = rows_of(result)
+        if len(stage['outputs']) == 1:
+            result = (result,)
+        state.update(zip(stage['outputs'], result))
+        for spec in recorder.specs:
+            renderer.submit(spec)
+        if cache is not None:
+            cache.put(f"{key}/state", pickle.dumps(state, protocol = pickle.HIGHEST_PROTOCOL))
+            cache.put(f"{key}/specs", pickle.dumps(recorder.specs, protocol = pickle.HIGHEST_PROTOCOL))
+            cache.save()
+    if cache is not None:
+        cache.save()
+    return state
+
+def open_stage_cache(path = STAGE_CACHE_PATH, max_bytes = STAGE_CACHE_MAX_BYTES):
+    """Size-bounded, least-recently-used on-disk store of pickled stage results"""
+    return ResponseCache(path, max_bytes)
+
+class StageTimeout(TimeoutError):
+    """A stage ran longer than its ``timeout``"""
+
+class StageOutput(io.TextIOBase):
+    """Stand-in for sys.stdout that keeps the printouts of each running stage apart.
+
+    Writes from a thread that has begun a stage are buffered and handed back
+    when the stage ends, so concurrent stages print whole blocks; writes from
+    any other thread go straight to the wrapped stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def begin(self):
+        self.buffers[threading.get_ident()] = []
+
+    def end(self):
+        return "".join(self.buffers.pop(threading.get_ident(), []))
+
+    def write(self, text):
+        buffer = self.buffers.get(threading.get_ident())
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def stage_closure(stages, targets):
+    """Names of the ``targets`` and every stage they depend on"""
+    producers = {output: stage['name'] for stage in stages for output in stage['outputs']}
+    by_name = {stage['name']: stage for stage in stages}
+    needed, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in by_name:
+            raise KeyError(f"Unknown stage '{name}' (stages: {', '.join(by_name)})")
+        if name not in needed:
+            needed.add(name)
+            todo += [producers[i] for i in by_name[name]['inputs'] if i in producers]
+    return needed
+
+def start_attempt(func, stage):
+    """Run one stage attempt on a daemon thread.
+
+    Unlike a pool worker, the thread is not joined at interpreter exit, so an
+    attempt abandoned after its timeout cannot keep the process alive.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(stage))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target = run, name = f"stage-{stage['name']}", daemon = True).start()
+    return future
+
+def run_graph(stages, state = None, workers = STAGE_WORKERS, only = None, backoff = STAGE_RETRY_BACKOFF,
+              drain_timeout = STAGE_DRAIN_TIMEOUT):
+    """Run stages as a dependency graph, at most ``workers`` at a time.
+
+    A stage starts as soon as every stage producing its ``inputs`` has
+    finished, so independent branches run concurrently. A failing stage is
+    retried up to ``retries`` times, each retry becoming ready after an
+    exponential backoff while other stages keep running. A stage exceeding
+    its ``timeout`` (seconds) fails the run at once and is not retried: its
+    attempt cannot be killed, so it is abandoned on its daemon thread rather
+    than raced by a second attempt writing the same outputs. ``only`` re-runs
+    the named stages together with the stages they depend on. The printouts
+    of every stage are shown as one block when it ends. Returns the state
+    holding all outputs; the first failure is raised once the other running
+    stages have finished, or after ``drain_timeout`` seconds.
+    """
+    state = dict(state or {})
+    needed = stage_closure(stages, only) if only else {stage['name'] for stage in stages}
+    stages = [stage for stage in stages if stage['name'] in needed]
+    producers = {output: stage['name'] for stage in stages for output in stage['outputs']}
+    waiting = {stage['name']: {producers[i] for i in stage['inputs'] if i in producers} for stage in stages}
+    by_name = {stage['name']: stage for stage in stages}
+    output = StageOutput(sys.stdout)
+
+    def attempt(stage):
+        output.begin()
+        try:
+            args = [state[name] for name in stage['inputs']]
+            with span(stage['name'], 'stage', rows_of(args)) as record:
+                result = stage['func'](*args)
+                record['rows_out'] = rows_of(result)
+            return result
+        finally:
+            text = output.end()
+            if text:
+                output.stream.write(text)
+
+    running, ready, retry_at, tries, done, error = {}, [], {}, {}, set(), None
+    sys.stdout = output
+    try:
+        while (waiting or ready or retry_at or running) and error is None:
+            now = time.monotonic()
+            for name in [n for n, deps in waiting.items() if deps <= done]:
+                del waiting[name]
+                tries[name] = 0
+                ready.append(name)
+            for name in [n for n, at in retry_at.items() if at <= now]:
+                del retry_at[name]
+                ready.append(name)
+            while ready and len(running) < workers:
+                name = ready.pop(0)
+                running[start_attempt(attempt, by_name[name])] = (name, time.monotonic())
+
+            # Sleep until a stage ends, a timeout expires or a retry becomes ready
+            now = time.monotonic()
+            timers = [start + by_name[name]['timeout'] - now
+                      for name, start in running.values() if by_name[name].get('timeout')]
+            timers += [at - now for at in retry_at.values()]
+            if not running and not timers:
+                raise RuntimeError(f"Stages waiting on inputs no stage produces: {sorted(waiting)}")
+            timeout = max(0, min(timers)) if timers else None
+            if running:
+                finished, _ = wait(running, timeout = timeout, return_when = FIRST_COMPLETED)
+            else:
+                finished = set()
+                time.sleep(timeout)
+
+            now = time.monotonic()
+            for future in list(running):
+                name, start = running[future]
+                stage = by_name[name]
+                timed_out = future not in finished and stage.get('timeout') and now - start >= stage['timeout']
+                if future not in finished and not timed_out:
+                    continue
+                del running[future]
+                if timed_out:
+                    error = error or StageTimeout(f"Stage '{name}' exceeded {stage['timeout']} s (abandoned, not retried)")
+                    continue
+                failure = future.exception()
+                if failure is None:
+                    result = future.result()
+                    state.update(zip(stage['outputs'], (result,) if len(stage['outputs']) == 1 else result))
+                    done.add(name)
+                elif tries[name] < stage.get('retries', 0):
+                    tries[name] += 1
+                    delay = backoff ** tries[name]
+                    print(f"• Stage '{name}' failed ({type(failure).__name__}: {failure}), "
+                          f"retry {tries[name]}/{stage['retries']} in {delay:g} s")
+                    retry_at[name] = time.monotonic() + delay
+                elif error is None:
+                    error = failure
+
+        if error is not None:
+            wait(running, timeout = drain_timeout)
+            raise error
+    finally:
+        sys.stdout = output.stream
+    return state
@@ -0,0 +1,133 @@
+# coding: utf-8
+
+# __author__ = Dominika Drazyk
+# __maintainer__ = Dominika Drazyk
+# __email__ = dominika.a.drazyk@gmail.com
+# __copyright__ = Dominika Drazyk
+# __license__ = Apache License 2.0
+# __version__ = 1.0.0
+# __status__ = Production
+# __date__ = 17/10/2026
+
+# Required libraries:
+import pandas as pd
+import operator
+import shutil
+import os
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, '..', 'data')
+
+# Typed schemas and partitioning of the stored datasets
+SCHEMAS = {
+    'scraper_data': {'nace_r2': 'category', 'geo': 'category', 'time': 'int32',
+                     'pers2_FTE_RSE': 'float64', 'pers2_FTE_TOTAL': 'float64',
+                     'pers2_HC_RSE': 'float64', 'pers2_HC_TOTAL': 'float64',
+                     'exp2_MIO_EUR': 'float64', 'exp2_PC_TOT': 'float64',
+                     'fem2_FTE_RSE': 'float64'},
+    'analysis_data': {'Country': 'category', 'geo': 'category'},
+    'cagr_analysis_data': {'Country': 'category', 'geo': 'category', 'CAGR types': 'category'},
+    'correlation_data': {'Country': 'category', 'x': 'category', 'y': 'category', 'test': 'category'}}
+PARTITIONS = {'scraper_data': ['nace_r2']}
+
+OPERATORS = {'==': operator.eq, '=': operator.eq, '!=': operator.ne,
+             '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+             'in': lambda s, v: s.isin(v), 'not in': lambda s, v: ~s.isin(v)}
+
+# Functions
+def parquet_available():
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+    return True
+
+def default_format():
+    return 'parquet' if parquet_available() else 'csv'
+
+def dataset_path(name, fmt, path = DATA_PATH):
+    if fmt == 'parquet':
+        return os.path.join(path, name)
+    return os.path.join(path, f"{name}.csv")
+
+def dataset_files(name, fmt = None, path = DATA_PATH):
+    """Files ``read_dataset`` reads for a dataset: the columnar store when present, else the CSV export"""
+    fmt = fmt or default_format()
+    store = dataset_path(name, 'parquet', path)
+    if fmt != 'parquet' or not os.path.exists(store):
+        return [dataset_path(name, 'csv', path)]
+    return sorted(os.path.join(root, f) for root, _, names in os.walk(store) for f in names)
+
+def dataset_fingerprint(name, fmt = None, path = DATA_PATH):
+    """Hash of the stored files of a dataset (the CSV export when no columnar store exists)"""
+    from http_cache import sha256_bytes, sha256_file
+
+    files = dataset_files(name, fmt, path)
+    if files == [dataset_path(name, 'csv', path)]:
+        return sha256_file(files[0])
+    store = dataset_path(name, 'parquet', path)
+    return sha256_bytes("".join(os.path.relpath(f, store) + sha256_file(f) for f in files).encode('utf-8'))
+
+def apply_schema(data, name):
+    """Cast columns to the stored schema of a dataset (unknown columns are left as they are)"""
+    schema = SCHEMAS.get(name, {})
+    return data.astype({col: dtype for col, dtype in schema.items() if col in data.columns})
+
+def apply_filters(data, filters):
+    """Evaluate (column, op, value) predicates on a frame, as pyarrow does for stored files"""
+    if not filters:
+        return data
+    mask = pd.Series(True, index = data.index)
+    for col, op, value in filters:
+        mask &= OPERATORS[op](data[col], value)
+    return data[mask]
+
+def write_dataset(data, name, fmt = None, export_csv = True, path = DATA_PATH):
+    """Store a dataset, optionally exporting a CSV copy next to the columnar store.
+
+    The Parquet backend writes a directory partitioned by ``PARTITIONS[name]``
+    and replaces the previous version in one rename. File names are fixed, so
+    rewriting the same data leaves the dataset fingerprint unchanged.
+    """
+    fmt = fmt or default_format()
+    data = apply_schema(data, name)
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        store_path = dataset_path(name, 'parquet', path)
+        tmp_path = f"{store_path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors = True)
+        table = pa.Table.from_pandas(data, preserve_index = False)
+        pq.write_to_dataset(table, tmp_path, partition_cols = PARTITIONS.get(name),
+                            basename_template = 'part-{i}.parquet')
+        shutil.rmtree(store_path, ignore_errors = True)
+        os.replace(tmp_path, store_path)
+    if fmt == 'csv' or export_csv:
+        data.to_csv(dataset_path(name, 'csv', path), encoding = 'utf-8', index = False)
+    return data
+
+def read_dataset(name, columns = None, filters = None, fmt = None, path = DATA_PATH):
+    """Read a stored dataset with column projection and (column, op, value) predicates.
+
+    Parquet reads skip non-matching partitions and row groups; the CSV backend
+    reads only the projected columns and filters in memory. Falls back to the
+    CSV export when no columnar store exists.
+    """
+    fmt = fmt or default_format()
+    if fmt == 'parquet' and not os.path.exists(dataset_path(name, 'parquet', path)):
+        fmt = 'csv'
+    if fmt == 'parquet':
+        data = pd.read_parquet(dataset_path(name, 'parquet', path), columns = columns, filters = filters or None)
+        data = apply_schema(data, name)
+        if columns is None:
+            ordered = [col for col in SCHEMAS.get(name, {}) if col in data.columns]
+            data = data[ordered + [col for col in data.columns if col not in ordered]]
+    else:
+        needed = None if columns is None else list(dict.fromkeys(list(columns) + [f[0] for f in filters or []]))
+        data = pd.read_csv(dataset_path(name, 'csv', path), usecols = needed)
+        data = apply_filters(apply_schema(data, name), filters)
+        if columns is not None:
+            data = data[list(columns)]
+    return data.reset_index(drop = True)
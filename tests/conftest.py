@@ -0,0 +1,7 @@
+# coding: utf-8
+
+# The scripts import each other as flat siblings: make them importable from the tests
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
@@ -0,0 +1,49 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import read_dataset, write_dataset, parquet_available
+from stages import run_stages, SpecRecorder
+from backends import BACKENDS, backend_available, cell_aggregates
+import analysis_code as analysis
+
+def panel_of(backend):
+    stages = analysis.analysis_stages(backend)
+    last = [stage['name'] for stage in stages].index('panel')
+    return run_stages(stages[:last + 1], backend, SpecRecorder())['panel']
+
+@pytest.fixture(scope = 'module')
+def reference():
+    return panel_of('pandas')
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backends_build_the_same_panel(backend, reference):
+    if not backend_available(backend):
+        pytest.skip(f"{backend} is not installed")
+    panel = panel_of(backend)
+
+    assert list(panel.countries) == list(reference.countries)
+    assert list(panel.year_numbers()) == list(reference.year_numbers())
+    assert list(panel.metrics) == list(reference.metrics)
+    assert panel.attributes.astype(str).equals(reference.attributes.astype(str))
+    np.testing.assert_allclose(panel.values, reference.values, rtol = 1e-12)
+    np.testing.assert_array_equal(panel.complete, reference.complete)
+
+@pytest.mark.skipif(not parquet_available(), reason = "pyarrow is not installed")
+@pytest.mark.parametrize('backend', [b for b in BACKENDS if b != 'pandas'])
+def test_plans_reduce_parquet_and_csv_alike(backend, tmp_path):
+    if not backend_available(backend):
+        pytest.skip(f"{backend} is not installed")
+    data = read_dataset('scraper_data', fmt = 'csv')
+    for fmt in ['parquet', 'csv']:
+        (tmp_path / fmt).mkdir()
+    write_dataset(data, 'scraper_data', fmt = 'parquet', export_csv = False, path = str(tmp_path / 'parquet'))
+    write_dataset(data, 'scraper_data', fmt = 'csv', path = str(tmp_path / 'csv'))
+    euefta = pd.DataFrame({'Country': ['Austria', 'Belgium', 'Norway'], 'geo': ['AT', 'BE', 'NO']})
+
+    parquet, csv = (cell_aggregates(backend, ['G-N', 'C'], euefta, analysis.RENAME, path = str(tmp_path / fmt))
+                    for fmt in ['parquet', 'csv'])
+    assert len(parquet) and set(parquet['geo']) == {'AT', 'BE', 'NO'}
+    pd.testing.assert_frame_equal(parquet, csv, rtol = 1e-12)
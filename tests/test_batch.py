@@ -0,0 +1,31 @@
+# coding: utf-8
+
+import os
+
+import pandas as pd
+
+from storage import DATA_PATH, read_dataset
+import analysis_code as analysis
+import batch
+
+def test_scenario_grid_names_every_combination():
+    grid = batch.scenario_grid(['G-N', 'C'], ['eu_efta', 'AT,BE'], [20, 40], [(2009, 2021)])
+    assert len(grid) == 8
+    assert grid[0] == {'id': 'G-N_eu_efta_nan20_2009_2021', 'nace': 'G-N', 'countries': 'eu_efta',
+                       'nan_threshold': 20, 'window': (2009, 2021)}
+
+def test_default_scenario_reproduces_the_analysis(tmp_path):
+    scenarios = batch.scenario_grid([analysis.NACE_CODE], ['eu_efta', 'XX'], [analysis.NAN_THRESHOLD],
+                                    [analysis.CAGR_WINDOW])
+    summary = batch.run_batch(scenarios, workers = 1, path = str(tmp_path)).set_index('Scenario')
+    default, empty = (scenario['id'] for scenario in scenarios)
+
+    assert summary.loc[default, 'Status'] == 'ok'
+    assert summary.loc[empty, 'Status'] == 'no countries selected'
+    assert pd.read_csv(tmp_path / 'scenario_summary.csv')['Scenario'].tolist() == [default, empty]
+    assert os.path.exists(tmp_path / empty / 'analysis_log.txt')
+
+    for name in ['analysis_data', 'cagr_analysis_data']:
+        scenario = read_dataset(name, fmt = 'csv', path = str(tmp_path / default))
+        shipped = read_dataset(name, fmt = 'csv', path = DATA_PATH)
+        pd.testing.assert_frame_equal(scenario, shipped)
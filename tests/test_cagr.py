@@ -0,0 +1,46 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+from panel import Panel
+from analysis_code import compute_cagr
+
+YEARS = [2009, 2010, 2011, 2012]
+
+# Country -> yearly values
+VALUES = {'A': [1.0, 1.5, 3.0, 8.0],
+          'B': [np.nan, 2.0, 4.0, np.nan],
+          'C': [np.nan, 5.0, np.nan, np.nan],
+          'D': [1.0, 2.0, 4.0, 8.0]}
+
+def panel():
+    df = pd.DataFrame([{'Country': country, 'geo': country * 2, 'Year': year, 'x': value}
+                       for country, values in VALUES.items() for year, value in zip(YEARS, values)])
+    return Panel.from_frame(df, ['x'], attributes = ['geo'])
+
+def cagr(window, **kwargs):
+    return compute_cagr(panel(), {'X': 'x'}, windows = (window,), **kwargs)
+
+def test_growth_is_compounded_over_the_yearly_intervals():
+    # 2010 -> 2011 is a single interval: the CAGR is the growth itself
+    np.testing.assert_allclose(cagr((2010, 2011))['X CAGR 2010_2011'], [1.0, 1.0, np.nan, 1.0])
+    # A grows eightfold over three intervals
+    np.testing.assert_allclose(cagr((2009, 2012))['X CAGR 2009_2012'], [1.0, 1.0, np.nan, 1.0])
+
+def test_nan_endpoints_fall_back_to_the_nearest_valid_years():
+    # B has no 2009 or 2012 value: its growth runs 2010 -> 2011, C has a single observation
+    result = cagr((2009, 2012))['X CAGR 2009_2012']
+    assert result['B'] == 1.0
+    assert np.isnan(result['C'])
+
+def test_windows_outside_the_data_are_nan():
+    for window in [(2000, 2005), (2015, 2020), (2011, 2011)]:
+        assert cagr(window).isna().all().all()
+
+def test_intervals_share_the_exponent():
+    result = cagr((2009, 2012), intervals = True, iterations = 200, seed = 1, workers = 1)
+    # D doubles every year: every resample of its steps gives the point CAGR
+    np.testing.assert_allclose(result.loc['D'], [1.0, 1.0, 1.0])
+    assert result.loc['A', 'X CAGR 2009_2012 CI low'] <= 1.0 <= result.loc['A', 'X CAGR 2009_2012 CI high']
+    assert result.loc['C'].isna().all()
@@ -0,0 +1,45 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from correlations import correlate
+
+def observations():
+    """Groups of different sizes, with ties, missing values and too few points for some tests"""
+    rng = np.random.default_rng(7)
+    frames = []
+    for group, n in [('A', 14), ('B', 9), ('C', 4), ('D', 2)]:
+        x = rng.normal(size = n)
+        y = 0.6 * x + rng.normal(scale = 0.5, size = n)
+        frames.append(pd.DataFrame({'Country': group, 'x': x, 'y': y}))
+    df = pd.concat(frames, ignore_index = True)
+    df.loc[[2, 5], 'y'] = np.nan
+    df.loc[[15, 16, 17], 'x'] = 1.0
+    df.loc[20, 'x'] = np.nan
+    return df
+
+def test_correlate_matches_scipy():
+    df = observations()
+    corr = correlate(df, [('x', 'y')]).set_index('Country')
+
+    for group, rows in df.dropna().groupby('Country'):
+        x, y = rows['x'].to_numpy(), rows['y'].to_numpy()
+        result = corr.loc[group]
+        assert result['n'] == len(x)
+        if len(x) < 3:
+            assert np.isnan(result['pearson_p']) and np.isnan(result['normality_x_p'])
+            continue
+        pearson, spearman, fit = stats.pearsonr(x, y), stats.spearmanr(x, y), stats.linregress(x, y)
+        assert result['pearson_r'] == pytest.approx(pearson.statistic)
+        assert result['pearson_p'] == pytest.approx(pearson.pvalue)
+        assert result['spearman_rho'] == pytest.approx(spearman.statistic)
+        assert result['spearman_p'] == pytest.approx(spearman.pvalue)
+        assert result['slope'] == pytest.approx(fit.slope)
+        assert result['intercept'] == pytest.approx(fit.intercept)
+        assert result['normality_x_p'] == pytest.approx(stats.shapiro(x).pvalue)
+        assert result['normality_y_p'] == pytest.approx(stats.shapiro(y).pvalue)
+        normal = min(stats.shapiro(x).pvalue, stats.shapiro(y).pvalue) > 0.05
+        assert result['test'] == ('pearson' if normal else 'spearman')
@@ -0,0 +1,108 @@
+# coding: utf-8
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+import threading
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dbnomics import read_wide_csv, fetch_series_pages, decode_series_pages
+from scraper_code import create_session, download_fem2, extract_fem2_data, FEM2_DIMENSIONS, FEM2_SERIES
+
+PERIODS = ['2019', '2020', '2021']
+
+# Series code -> yearly values (None = no observation)
+SERIES = {'A.F.G-N.RSE.FTE.AT': [10.0, None, 12.5],
+          'A.T.G-N.RSE.FTE.AT': [30.0, 31.0, 32.0],
+          'A.F.G-N.RSE.FTE.BE': [None, 7.0, 8.0],
+          'A.F.G-N.RSE.HC.BE': [9.0, 9.5, 10.0],
+          'A.F.G-N.RSE.FTE.CZ': [None, None, None]}
+
+def write_export(path, codes):
+    columns = {'period': PERIODS}
+    for code in codes:
+        columns[f"Annual – {code} (Eurostat/rd_p_bempoccr2/{code})"] = SERIES[code]
+    pd.DataFrame(columns).to_csv(path, index = False, na_rep = 'NA')
+    return str(path)
+
+class StubHandler(BaseHTTPRequestHandler):
+    """DBnomics v22 /series endpoint over SERIES, with dimension filters and limit/offset paging"""
+    requests = []
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = dict(parse_qsl(url.query))
+        self.requests.append((url.path, query))
+        if url.path != '/series/Eurostat/rd_p_bempoccr2':
+            self.send_error(404)
+            return
+        select = json.loads(query.get('dimensions', '{}'))
+        docs = []
+        for code, values in SERIES.items():
+            dims = dict(zip(FEM2_DIMENSIONS, code.split('.')))
+            if all(dims[dim] in codes for dim, codes in select.items()):
+                docs.append({'series_code': code, 'dimensions': dims, 'period': PERIODS,
+                             'value': ['NA' if v is None else v for v in values]})
+        offset, limit = int(query['offset']), int(query['limit'])
+        body = json.dumps({'series': {'num_found': len(docs), 'docs': docs[offset:offset + limit]}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    StubHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def ordered(data):
+    data = data.astype({dim: str for dim in data.columns if dim not in ('time', 'value')})
+    return data.sort_values(list(data.columns), ignore_index = True)
+
+def test_wide_export_is_read_by_series_code(tmp_path):
+    path = write_export(tmp_path / 'export.csv', list(SERIES))
+    data = read_wide_csv(path, FEM2_DIMENSIONS, select = FEM2_SERIES)
+    assert data[['geo', 'time', 'value']].astype({'geo': str}).values.tolist() == [
+        ['AT', '2019', 10.0], ['BE', '2020', 7.0], ['AT', '2021', 12.5], ['BE', '2021', 8.0]]
+
+    # Reordered and added columns are picked up by code, chunked reads match the single pass
+    reordered = write_export(tmp_path / 'reordered.csv', list(SERIES)[::-1])
+    pd.testing.assert_frame_equal(ordered(read_wide_csv(reordered, FEM2_DIMENSIONS, select = FEM2_SERIES, chunksize = 2)),
+                                  ordered(data))
+
+def test_api_pages_decode_like_the_wide_export(tmp_path, stub):
+    with create_session(pool_size = 1) as session:
+        pages = fetch_series_pages(session, 'Eurostat', 'rd_p_bempoccr2', select = FEM2_SERIES, base_url = stub,
+                                   limit = 1)
+    assert len(pages) == 3
+    assert [int(query['offset']) for _, query in StubHandler.requests] == [0, 1, 2]
+    assert json.loads(StubHandler.requests[0][1]['dimensions'])['sex'] == ['F']
+
+    path = write_export(tmp_path / 'export.csv', list(SERIES))
+    pd.testing.assert_frame_equal(ordered(decode_series_pages(pages, FEM2_DIMENSIONS)),
+                                  ordered(read_wide_csv(path, FEM2_DIMENSIONS, select = FEM2_SERIES)))
+
+def test_fem2_from_the_api_matches_the_export(tmp_path, stub):
+    pages = download_fem2(base_url = stub)
+    from_api = extract_fem2_data(pages)
+    from_csv = extract_fem2_data(write_export(tmp_path / 'export.csv', list(SERIES)))
+    pd.testing.assert_frame_equal(from_api.sort_values(['geo', 'time'], ignore_index = True),
+                                  from_csv.sort_values(['geo', 'time'], ignore_index = True))
+    assert not from_api.duplicated(['nace_r2', 'geo', 'time']).any()
+    assert np.isclose(from_api['fem2_FTE_RSE'].sum(), 37.5)
+
+def test_missing_dataset_raises(stub):
+    with create_session(pool_size = 1, retries = 0) as session:
+        with pytest.raises(Exception, match = '404'):
+            fetch_series_pages(session, 'Eurostat', 'unknown', base_url = stub)
@@ -0,0 +1,91 @@
+# coding: utf-8
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+import threading
+import time
+
+import pytest
+import requests
+
+from http_cache import ResponseCache
+from scraper_code import fetch_datasets
+
+# Dataset code -> JSON-stat body served by the stub
+BODIES = {'htec_sti_exp2': b'{"id": ["time"], "value": {"0": 1.0}}',
+          'htec_sti_pers2': b'{"id": ["time"], "value": {"0": 2.0}}'}
+# Served after a first 503
+FLAKY_BODY = b'{"id": ["time"], "value": {"0": 3.0}}'
+
+class EurostatHandler(BaseHTTPRequestHandler):
+    """Stub of the Eurostat dissemination API: ETags, conditional GETs, one flaky and one unknown dataset"""
+    statuses = []
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(0.2)
+            self.reply(urlsplit(self.path).path.strip('/'))
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def reply(self, code):
+        if code == 'flaky' and ('flaky', 503) not in self.statuses:
+            return self.send(code, 503)
+        body = FLAKY_BODY if code == 'flaky' else BODIES.get(code)
+        if body is None:
+            return self.send(code, 404)
+        etag = f'"{len(body)}-{code}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(code, 304)
+        self.send(code, 200, body, etag)
+
+    def send(self, code, status, body = b'', etag = None):
+        self.statuses.append((code, status))
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def eurostat():
+    EurostatHandler.statuses, EurostatHandler.max_in_flight = [], 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EurostatHandler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_datasets_are_fetched_concurrently(eurostat):
+    bodies = fetch_datasets(list(BODIES), eurostat)
+    assert bodies == BODIES
+    assert EurostatHandler.max_in_flight == len(BODIES)
+
+def test_unchanged_datasets_are_revalidated(tmp_path, eurostat):
+    cache = ResponseCache(str(tmp_path / 'http_cache'))
+    assert fetch_datasets(list(BODIES), eurostat, cache = cache) == BODIES
+    assert sorted(status for _, status in EurostatHandler.statuses) == [200, 200]
+
+    EurostatHandler.statuses.clear()
+    reopened = ResponseCache(str(tmp_path / 'http_cache'))
+    assert fetch_datasets(list(BODIES), eurostat, cache = reopened) == BODIES
+    assert sorted(status for _, status in EurostatHandler.statuses) == [304, 304]
+
+def test_transient_errors_are_retried_and_others_raised(eurostat):
+    assert fetch_datasets(['flaky'], eurostat) == {'flaky': FLAKY_BODY}
+    assert EurostatHandler.statuses == [('flaky', 503), ('flaky', 200)]
+
+    with pytest.raises(requests.HTTPError, match = '404'):
+        fetch_datasets(['htec_sti_exp2', 'unknown'], eurostat)
@@ -0,0 +1,52 @@
+# coding: utf-8
+
+from itertools import count
+import os
+
+import http_cache
+from http_cache import ResponseCache, sha256_bytes
+
+URL = 'http://example.org/data/htec_sti_exp2?lang=en'
+
+def test_stored_bodies_are_hits_across_reopens(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get(URL) is None and cache.validators(URL) == {}
+
+    assert cache.put(URL, b'body', etag = '"v1"')
+    assert not cache.put(URL, b'body', etag = '"v1"')
+    assert cache.put(URL, b'changed', etag = '"v2"')
+    cache.save()
+
+    reopened = ResponseCache(str(tmp_path))
+    assert reopened.get(URL) == b'changed'
+    assert sha256_bytes(b'changed') in os.listdir(tmp_path / 'objects')
+
+def test_validators_revalidate_with_etag_and_last_modified(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put(URL, b'body', etag = '"v1"', last_modified = 'Wed, 14 Jan 2026 23:00:00 GMT')
+    assert cache.validators(URL) == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 14 Jan 2026 23:00:00 GMT'}
+
+    cache.put(URL, b'body', last_modified = 'Thu, 15 Jan 2026 23:00:00 GMT')
+    assert cache.validators(URL) == {'If-Modified-Since': 'Thu, 15 Jan 2026 23:00:00 GMT'}
+
+    # Without the stored body a conditional GET could not be answered from the cache
+    os.remove(tmp_path / 'objects' / sha256_bytes(b'body'))
+    assert cache.validators(URL) == {}
+
+def test_least_recently_used_entries_are_evicted_at_the_cap(tmp_path, monkeypatch):
+    clock = count()
+    monkeypatch.setattr(http_cache.time, 'time', lambda: next(clock))
+    cache = ResponseCache(str(tmp_path), max_bytes = 10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    cache.get('a')
+    cache.put('c', b'cccc')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa' and cache.get('c') == b'cccc'
+    assert sorted(os.listdir(tmp_path / 'objects')) == sorted(sha256_bytes(body) for body in [b'aaaa', b'cccc'])
+
+    # A body larger than the cap is kept while it is the newest entry
+    cache.put('d', b'd' * 20)
+    assert cache.get('d') == b'd' * 20
+    assert cache.get('a') is None and cache.get('c') is None
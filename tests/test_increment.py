@@ -0,0 +1,29 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+from scraper_code import time_watermarks, increment_filters, query_filters
+
+def store():
+    return pd.DataFrame({'nace_r2': ['A', 'A', 'A', 'B', 'B'], 'geo': ['X', 'X', 'Y', 'X', 'X'],
+                         'time': [2020, 2021, 2020, 2020, 2021], 'value': [1.0, 2.0, np.nan, 3.0, np.nan]})
+
+def test_series_without_observations_are_requested_from_the_start():
+    watermarks = time_watermarks(store())
+    assert watermarks.to_dict() == {('A', 'X'): 2021, ('A', 'Y'): None, ('B', 'X'): 2020}
+    assert increment_filters(watermarks, revision_window = 2) == [
+        {'nace_r2': ['B'], 'geo': ['X'], 'since': 2019},
+        {'nace_r2': ['A'], 'geo': ['X'], 'since': 2020},
+        {'nace_r2': ['A'], 'geo': ['Y']}]
+
+def test_batches_keep_to_the_pushdown_filters():
+    filters = query_filters(nace = ['A'], geo = ['X', 'Z'], since = 2015, until = 2022)
+    watermarks = time_watermarks(store(), filters)
+    assert list(watermarks.index) == [('A', 'X'), ('A', 'Z')]
+    assert increment_filters(watermarks, revision_window = 2, filters = filters) == [
+        {'nace_r2': ['A'], 'geo': ['X'], 'since': 2020, 'until': 2022},
+        {'nace_r2': ['A'], 'geo': ['Z'], 'since': 2015, 'until': 2022}]
+
+def test_empty_store_needs_no_batches():
+    assert increment_filters(time_watermarks(store().iloc[:0])) == []
@@ -0,0 +1,39 @@
+# coding: utf-8
+
+import threading
+
+from instrument import Instrument, prometheus_text
+
+def test_overlapping_spans_report_process_scope():
+    run = Instrument('test')
+    both_live = threading.Barrier(2)
+
+    def stage(name):
+        with run.span(name, 'stage'):
+            both_live.wait(5)
+
+    with run.span('alone', 'stage'):
+        pass
+    threads = [threading.Thread(target = stage, args = (name,)) for name in ['a', 'b']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records = {record['name']: record for record in run.records}
+    assert records['alone']['io_scope'] == 'span'
+    assert all(records[name]['io_scope'] == 'process' for name in ['a', 'b'])
+    assert all(records[name]['peak_rss_scope'] == 'process' for name in ['a', 'b'])
+    assert not run.live
+
+def test_prometheus_samples_are_unique_for_repeated_spans():
+    run = Instrument('test')
+    for _ in range(3):
+        with run.span('fetch', 'http') as record:
+            record['bytes_read'] = 10
+
+    samples = [line for line in prometheus_text(run.records).splitlines() if not line.startswith('#')]
+    series = [line.rsplit(' ', 1)[0] for line in samples]
+    assert len(series) == len(set(series))
+    assert 'pipeline_span_bytes_read{pipeline="test",kind="http",name="fetch"} 30' in samples
+    assert 'pipeline_span_calls{pipeline="test",kind="http",name="fetch"} 3' in samples
@@ -0,0 +1,37 @@
+# coding: utf-8
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from jsonstat_decoder import KEY_DIMENSIONS
+from scraper_code import decode_dataset, WIDE_COLUMNS
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def fixture_body(code):
+    with open(os.path.join(FIXTURES_PATH, f"{code}.json"), 'rb') as f:
+        return f.read()
+
+def pyjstat_wide(code, body):
+    """Long pyjstat frame pivoted to measure columns, as process_datasets() did before the decoder"""
+    pyjstat = pytest.importorskip('pyjstat.pyjstat')
+    data = pyjstat.from_json_stat(json.loads(body), naming = 'id')[0]
+    wide = data.pivot(index = KEY_DIMENSIONS, columns = WIDE_COLUMNS[code], values = 'value')
+    wide.columns = ["_".join(col) if isinstance(col, tuple) else col for col in wide.columns.to_flat_index()]
+    return wide.reset_index().astype({col: float for col in wide.columns})
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+@pytest.mark.parametrize('code', ['htec_sti_exp2', 'htec_sti_pers2'])
+def test_decoder_matches_pyjstat(code):
+    body = fixture_body(code)
+    expected = pyjstat_wide(code, body)
+    decoded = decode_dataset(code, body)
+
+    # pyjstat keeps the payload order of the measure codes, the decoder sorts them
+    assert sorted(decoded.columns) == sorted(expected.columns)
+    decoded = decoded.astype({key: str for key in KEY_DIMENSIONS})
+    expected = expected[decoded.columns].astype({key: str for key in KEY_DIMENSIONS})
+    pd.testing.assert_frame_equal(decoded, expected, check_column_type = False)
@@ -0,0 +1,62 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+from missingness import missing_cells, profile_missing, profile_cells, select_groups
+
+COLUMNS = ['a', 'b']
+GROUPINGS = {'country': ['Country', 'geo'], 'year': ['Year']}
+
+def rows():
+    """Three countries over six years; the second 2011 row of AT holds the only 'b' value that year"""
+    years = list(range(2009, 2015))
+    df = pd.DataFrame([{'Country': country, 'geo': geo, 'Year': year}
+                       for country, geo in [('Austria', 'AT'), ('Belgium', 'BE'), ('Czechia', 'CZ')] for year in years])
+    df['a'] = 1.0
+    df['b'] = 2.0
+    df.loc[(df['geo'] == 'AT') & df['Year'].isin([2010, 2011, 2013]), 'b'] = np.nan
+    df.loc[(df['geo'] == 'BE') & (df['Year'] >= 2011), 'a'] = np.nan
+    return pd.concat([df, pd.DataFrame([{'Country': 'Austria', 'geo': 'AT', 'Year': 2011, 'a': 1.0, 'b': 3.0}])],
+                     ignore_index = True)
+
+def longest_run(flags):
+    longest = run = 0
+    for flag in flags:
+        run = run + 1 if flag else 0
+        longest = max(longest, run)
+    return longest
+
+def test_profile_matches_direct_counts():
+    df = rows()
+    profile = profile_missing(df, COLUMNS, GROUPINGS)
+
+    pd.testing.assert_series_equal(profile['overall'], df[COLUMNS].isna().mean() * 100, check_names = False)
+    for name, grouping in GROUPINGS.items():
+        expected = df[COLUMNS].isna().groupby([df[key] for key in grouping]).mean() * 100
+        pd.testing.assert_frame_equal(profile[name], expected, check_names = False)
+
+    # A year is a gap of a series when none of its rows holds a value
+    for (country, geo), group in df.groupby(['Country', 'geo']):
+        empty = group[COLUMNS].notna().groupby(group['Year']).any().eq(False)
+        for col in COLUMNS:
+            starts = (empty[col] & ~empty[col].shift(fill_value = False)).sum()
+            assert profile['gaps'].loc[(country, geo), (col, 'gaps')] == starts
+            assert profile['gaps'].loc[(country, geo), (col, 'longest gap')] == longest_run(empty[col])
+    assert profile['gaps'].loc[('Austria', 'AT'), ('b', 'longest gap')] == 1
+    assert profile['gaps'].loc[('Belgium', 'BE'), ('a', 'longest gap')] == 4
+
+def test_cells_reduced_elsewhere_give_the_same_profile():
+    df = rows()
+    keys = ['Country', 'geo', 'Year']
+    profile = profile_missing(df, COLUMNS, GROUPINGS, series = ('Country', 'geo'))
+    from_cells = profile_cells(missing_cells(df, COLUMNS, keys), COLUMNS, GROUPINGS)
+    for name in profile:
+        pd.testing.assert_frame_equal(pd.DataFrame(from_cells[name]), pd.DataFrame(profile[name]))
+
+def test_select_groups_applies_share_and_gap_limits():
+    profile = profile_missing(rows(), COLUMNS, GROUPINGS)
+    assert list(select_groups(profile, 'country', max_missing = 50)) == [('Austria', 'AT'), ('Czechia', 'CZ')]
+    assert list(select_groups(profile, 'country', max_longest_gap = 0)) == [('Czechia', 'CZ')]
+    assert list(select_groups(profile, 'country', max_missing = 30, columns = ['a'])) == [('Austria', 'AT'),
+                                                                                      ('Czechia', 'CZ')]
@@ -0,0 +1,108 @@
+# coding: utf-8
+
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.request import urlopen
+from functools import partial
+import threading
+import re
+import os
+
+from bs4 import BeautifulSoup as bs
+import pytest
+
+from scraper_code import (load_pages, open_browser, parse_eurostat_metadata, parse_dbnomics_metadata,
+                          parse_countries_list, PAGE_READY, BY_XPATH)
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Fixture page -> (file, PAGE_READY kind)
+PAGES = {'htec_sti_exp2': ('eurostat_htec_sti_exp2.html', 'eurostat'),
+         'rd_p_bempoccr2': ('dbnomics_rd_p_bempoccr2.html', 'dbnomics'),
+         'countries': ('country_codes.html', 'countries')}
+PARSERS = {'eurostat': parse_eurostat_metadata, 'dbnomics': parse_dbnomics_metadata, 'countries': parse_countries_list}
+
+# The XPath shape of the PAGE_READY locators: //tag[text()='...']/following::tag[contains(@class, '...')]
+FOLLOWING = re.compile(r"//(\w+)\[text\(\)='([^']*)'\]/following::(\w+)(?:\[contains\(@class, '([^']*)'\)\])?$")
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class FixtureDriver:
+    """Stand-in for the WebDriver calls ``load_pages`` makes: tabs that fetch pages over HTTP"""
+
+    def __init__(self):
+        self.tabs = {'tab-0': None}
+        self.current_window_handle = 'tab-0'
+        self.switch_to = self
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    def get(self, url):
+        with urlopen(url, timeout = 10) as response:
+            self.tabs[self.current_window_handle] = response.read().decode('utf-8')
+
+    def new_window(self, kind):
+        self.current_window_handle = f"tab-{len(self.tabs)}"
+        self.tabs[self.current_window_handle] = None
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def close(self):
+        del self.tabs[self.current_window_handle]
+
+    @property
+    def page_source(self):
+        return self.tabs[self.current_window_handle]
+
+    def find_elements(self, by, value):
+        soup = bs(self.page_source, 'html.parser')
+        if by != BY_XPATH:
+            return soup.select(value)
+        tag, text, following, class_ = FOLLOWING.match(value).groups()
+        marker = soup.find(tag, string = text)
+        if marker is None:
+            return []
+        found = marker.find_next(following, class_ = class_) if class_ else marker.find_next(following)
+        return [found] if found else []
+
+@pytest.fixture(scope = 'module')
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory = FIXTURES_PATH))
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def browser():
+    pytest.importorskip('selenium')
+    try:
+        driver = open_browser()
+    except Exception as e:
+        pytest.skip(f"no headless Chrome available: {type(e).__name__}")
+    yield driver
+    driver.quit()
+
+def load_and_parse(driver, site):
+    sources = load_pages(driver, {name: (f"{site}/{file}", PAGE_READY[kind]) for name, (file, kind) in PAGES.items()},
+                         timeout = 30)
+    assert len(driver.window_handles) == 1
+    parsed = {name: PARSERS[kind](bs(sources[name], 'html.parser')) for name, (_, kind) in PAGES.items()}
+
+    assert parsed['htec_sti_exp2'] == ['htec_sti_exp2', 'Eurostat',
+                                       'Business enterprise R&D expenditure in high-tech sectors by NACE Rev. 2',
+                                       '18/03/2026 23:00']
+    assert parsed['rd_p_bempoccr2'] == ['rd_p_bempoccr2', 'Eurostat',
+                                        'R&D personnel and researchers in business enterprise sector by NACE Rev. 2 '
+                                        'activity and sex', '14/01/2026 23:00']
+    assert parsed['countries']['geo'].tolist() == ['BE', 'EL', 'LT', 'BG', 'ES', 'LU', 'IS', 'NO', 'LI', 'CH']
+
+def test_load_pages_with_a_stand_in_driver(site):
+    load_and_parse(FixtureDriver(), site)
+
+def test_load_pages_in_browser(site, browser):
+    load_and_parse(browser, site)
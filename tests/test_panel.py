@@ -0,0 +1,59 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from panel import Panel
+from stages import SpecRecorder
+import analysis_code
+
+def rows():
+    return pd.DataFrame({'Country': ['A', 'A', 'A', 'B', 'B'], 'geo': ['AA', 'AA', 'AA', 'BB', 'BB'],
+                         'Year': [2009, 2009, 2021, 2009, 2021], 'x': [1.0, 3.0, 4.0, np.nan, 2.0]})
+
+def cells(df):
+    grouped = df.groupby(['Country', 'geo', 'Year'])['x']
+    return pd.DataFrame({'rows': grouped.size(), 'x': grouped.size() - grouped.count(),
+                         'x sum': grouped.sum()}).reset_index()
+
+def test_repeated_rows_fail_without_an_aggregate():
+    with pytest.raises(ValueError, match = r"1 \(Country, Year\) cells hold repeated rows, e\.g\. \(A, 2009\): 2 rows"):
+        Panel.from_frame(rows(), ['x'])
+    with pytest.raises(ValueError, match = "repeated rows"):
+        Panel.from_cells(cells(rows()), ['x'])
+    with pytest.raises(ValueError, match = "Unknown aggregate"):
+        Panel.from_frame(rows(), ['x'], aggregate = 'median')
+
+@pytest.mark.parametrize('aggregate, a_2009', [('mean', 2.0), ('sum', 4.0)])
+def test_explicit_aggregate_combines_repeated_rows(aggregate, a_2009):
+    for panel in [Panel.from_frame(rows(), ['x'], attributes = ['geo'], aggregate = aggregate),
+                  Panel.from_cells(cells(rows()), ['x'], attributes = ['geo'], aggregate = aggregate)]:
+        np.testing.assert_array_equal(panel['x'], [[a_2009, 4.0], [np.nan, 2.0]])
+        np.testing.assert_array_equal(panel.valid('x'), [[True, True], [False, True]])
+
+def test_outputs_keep_the_published_columns(monkeypatch):
+    df = rows().drop_duplicates(['Country', 'Year']).assign(geo_nan = 'in')
+    panel = Panel.from_frame(df, ['x'], attributes = ['geo', 'geo_nan'])
+    panel.aggregates = pd.DataFrame({'X CAGR 2009_2021': [0.1, 0.2], 'X CAGR 2009_2021 CI low': [0.0, 0.1],
+                                     'X CAGR 2009_2021 CI high': [0.2, 0.3]}, index = panel.countries)
+
+    table = analysis_code.cagr_table(panel, ['X CAGR 2009_2021'])
+    assert list(table.columns) == ['Country', 'geo', 'Year', 'CAGR types', 'CAGR value', 'CAGR CI low', 'CAGR CI high']
+    assert table[['Country', 'Year', 'CAGR value']].values.tolist() == [['A', 2009, 0.1], ['A', 2021, 0.1],
+                                                                        ['B', 2009, 0.2], ['B', 2021, 0.2]]
+
+    monkeypatch.setattr(analysis_code, 'MISSING_COLUMNS', ['x'])
+    frame = analysis_code.analysis_frame(panel)
+    assert list(frame.columns) == ['Country', 'geo', 'Year', 'x', 'geo_nan'] + list(panel.aggregates.columns)
+    assert frame['X CAGR 2009_2021 CI high'].tolist() == [0.2, 0.2, 0.3, 0.3]
+
+def test_shipped_data_builds_without_an_aggregate():
+    df, _, euefta = analysis_code.load_datasets()
+    df = analysis_code.filter_and_rename_variables(df, euefta)
+    assert not df.duplicated(['Country', 'Year']).any()
+
+    df = analysis_code.review_missing_data(df, SpecRecorder())
+    panel = analysis_code.build_panel(df)
+    assert panel.values.shape[0] == df['Country'].nunique()
+    assert np.isfinite(analysis_code.compute_metrics(panel)['FemShare']).any()
@@ -0,0 +1,48 @@
+# coding: utf-8
+
+import subprocess
+import sys
+import os
+
+import pytest
+
+import analysis_code
+import scraper_code
+import query_service
+
+SCRIPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+HELP_IMPORTS = """
+import sys
+import pipeline
+try:
+    pipeline.main(sys.argv[1:])
+except SystemExit:
+    pass
+print(sorted(name for name in ['pandas', 'numpy', 'analysis_code', 'scraper_code', 'query_service']
+             if name in sys.modules))
+"""
+
+@pytest.mark.parametrize('argv', [['metrics-only', '--help'], ['scrape', '--help'], ['serve', '--help'],
+                                  ['analyse', '--backend', 'unknown']])
+def test_help_and_option_errors_skip_the_heavy_imports(argv):
+    result = subprocess.run([sys.executable, '-c', HELP_IMPORTS] + argv, cwd = SCRIPTS_PATH,
+                            capture_output = True, text = True, timeout = 60)
+    assert result.stdout.strip().endswith('[]')
+    assert 'usage: python -m pipeline' in result.stdout + result.stderr
+
+@pytest.mark.parametrize('module, defaults', [
+    (analysis_code, {'figure_workers': analysis_code.FIGURE_WORKERS, 'backend': analysis_code.BACKEND,
+                     'aggregate': analysis_code.CELL_AGGREGATE, 'figures': True}),
+    (scraper_code, {'revision_window': scraper_code.REVISION_WINDOW, 'dbnomics_url': scraper_code.DBNOMICS_API_URL,
+                    'workers': scraper_code.STAGE_WORKERS}),
+    (query_service, {'port': query_service.PORT, 'requests': query_service.REQUESTS})])
+def test_scripts_fill_in_their_defaults(module, defaults, monkeypatch):
+    calls = []
+    monkeypatch.setattr(module, 'main', lambda *args, **kwargs: calls.append((args, kwargs)))
+    module.cli([])
+    args, kwargs = calls[0]
+    if module is query_service:
+        kwargs = dict(zip(['data', 'host', 'port', 'reload_interval', 'cache_entries', 'bench', 'url', 'clients',
+                           'requests'], args))
+    assert {name: kwargs[name] for name in defaults} == defaults
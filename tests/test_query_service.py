@@ -0,0 +1,69 @@
+# coding: utf-8
+
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from storage import DATA_PATH, read_dataset, write_dataset, parquet_available
+from query_service import QueryService
+
+LEGACY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'legacy_outputs')
+
+def outputs(path, spend_eff = 1.0, fmt = 'csv'):
+    df = pd.DataFrame({'Country': ['Austria', 'Austria'], 'geo': ['AT', 'AT'], 'Year': ['2020-01-01', '2021-01-01'],
+                       'geo_nan': ['in', 'in'], 'SpendEff': [spend_eff, 2.0]})
+    df_cagr = pd.DataFrame({'Country': ['Austria'], 'geo': ['AT'], 'CAGR types': ['SpendEff CAGR 2020_2021'],
+                            'CAGR value': [0.5]})
+    write_dataset(df, 'analysis_data', fmt = fmt, path = str(path))
+    write_dataset(df_cagr, 'cagr_analysis_data', fmt = fmt, path = str(path))
+
+def get(url, etag = None):
+    request = Request(url, headers = {'If-None-Match': etag} if etag else {})
+    try:
+        with urlopen(request, timeout = 10) as response:
+            return response.status, response.headers.get('ETag')
+    except HTTPError as e:
+        return e.code, e.headers.get('ETag')
+
+def test_conditional_get_validates_the_query(tmp_path):
+    outputs(tmp_path)
+    with QueryService(str(tmp_path), port = 0, reload_interval = 60) as service:
+        status, etag = get(f"{service.url}/point?country=AT&metric=SpendEff&year=2020")
+        assert status == 200 and etag
+        assert get(f"{service.url}/point?country=AT&metric=SpendEff&year=2020", etag)[0] == 304
+        assert get(f"{service.url}/point?country=AT&metric=Nope&year=2020", etag) == (404, None)
+        assert get(f"{service.url}/point?country=AT&metric=SpendEff&year=x", etag) == (400, None)
+
+@pytest.mark.skipif(not parquet_available(), reason = "pyarrow is not installed")
+def test_version_follows_the_files_read(tmp_path):
+    outputs(tmp_path, fmt = 'parquet')
+    with QueryService(str(tmp_path), port = 0, reload_interval = 60) as service:
+        version = service.index.version
+        csv_copy = (tmp_path / 'analysis_data.csv').read_bytes()
+        outputs(tmp_path, spend_eff = 3.0, fmt = 'parquet')
+        (tmp_path / 'analysis_data.csv').write_bytes(csv_copy)
+
+        assert service.reload()
+        assert service.index.version != version
+        assert service.index.point('AT', 'SpendEff', 2020)['value'] == 3.0
+
+def test_serves_the_shipped_outputs():
+    df = read_dataset('analysis_data')
+    row = df.dropna(subset = ['SpendEff']).iloc[0]
+    with QueryService(DATA_PATH, port = 0, reload_interval = 60) as service:
+        point = service.index.point(row['geo'], 'SpendEff', pd.Timestamp(row['Year']).year)
+        assert point['value'] == pytest.approx(row['SpendEff'])
+        with urlopen(f"{service.url}/top?metric=SpendEff+CAGR&k=3", timeout = 10) as response:
+            assert len(json.load(response)['top']) == 3
+
+def test_serves_outputs_with_repeated_rows():
+    # Outputs saved before the fem2 join by series code: seven rows per (Country, Year)
+    with QueryService(LEGACY_PATH, port = 0, reload_interval = 60) as service:
+        assert service.index.countries == ['Bulgaria', 'Czechia']
+        assert service.index.point('CZ', 'SpendEff', 2015)['value'] == pytest.approx(0.0801061672796927)
+        assert service.index.point('CZ', 'SpendEff CAGR')['value'] == pytest.approx(0.011791038739517035)
+        assert service.index.point('CZ', 'SpendEff CAGR')['ci_low'] is None
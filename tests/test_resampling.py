@@ -0,0 +1,45 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlations import correlate
+from resampling import correlation_intervals, cagr_intervals, CHUNK_SIZE
+
+ITERATIONS = 3 * CHUNK_SIZE + 10
+
+def observations():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'Country': np.repeat(['A', 'B', 'C'], 10), 'x': rng.normal(size = 30)})
+    df['y'] = df['x'] + rng.normal(size = 30)
+    df.loc[[4, 13], 'y'] = np.nan
+    return df
+
+def series():
+    rng = np.random.default_rng(5)
+    values = np.cumprod(1 + rng.normal(0.05, 0.1, size = (4, 12)), axis = 1)
+    values[1, :3] = np.nan
+    values[2, 6] = np.nan
+    i, j = np.array([0, 3, 0, 0]), np.array([11, 11, 11, 0])
+    return values, i, j, j > i
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_a_seed_gives_the_same_resamples_for_any_worker_count(workers):
+    df = observations()
+    corr = correlate(df, [('x', 'y')])
+    single = correlation_intervals(df, corr, iterations = ITERATIONS, seed = 11, workers = 1)
+    pd.testing.assert_frame_equal(correlation_intervals(df, corr, iterations = ITERATIONS, seed = 11, workers = workers),
+                                  single)
+
+    values, i, j, ok = series()
+    single = cagr_intervals(values, values, i, j, ok, iterations = ITERATIONS, seed = 11, workers = 1)
+    np.testing.assert_array_equal(cagr_intervals(values, values, i, j, ok, iterations = ITERATIONS, seed = 11,
+                                                 workers = workers), single)
+
+def test_another_seed_gives_other_resamples():
+    df = observations()
+    corr = correlate(df, [('x', 'y')])
+    first = correlation_intervals(df, corr, iterations = ITERATIONS, seed = 11, workers = 1)
+    other = correlation_intervals(df, corr, iterations = ITERATIONS, seed = 12, workers = 1)
+    assert not np.array_equal(first['ci_low'], other['ci_low'])
@@ -0,0 +1,80 @@
+# coding: utf-8
+
+import subprocess
+import threading
+import time
+import sys
+import os
+
+import pytest
+
+from stages import run_graph, StageTimeout
+
+def test_retry_waits_without_blocking_other_stages():
+    calls, events = {'flaky': 0}, []
+
+    def flaky():
+        calls['flaky'] += 1
+        events.append(('flaky', time.monotonic()))
+        if calls['flaky'] == 1:
+            raise ConnectionError("first attempt fails")
+        return 'ok'
+
+    def slow_start(gate):
+        time.sleep(0.1)
+        events.append(('other', time.monotonic()))
+        return 'other'
+
+    stages = [{'name': 'flaky', 'func': flaky, 'inputs': [], 'outputs': ['a'], 'retries': 1},
+              {'name': 'gate', 'func': lambda: time.sleep(0.05), 'inputs': [], 'outputs': ['g']},
+              {'name': 'other', 'func': slow_start, 'inputs': ['g'], 'outputs': ['b']}]
+    state = run_graph(stages, workers = 2, backoff = 0.5)
+
+    assert state['a'] == 'ok' and state['b'] == 'other' and calls['flaky'] == 2
+    # 'other' became ready and ran during flaky's backoff
+    first, retry = [t for name, t in events if name == 'flaky']
+    other = [t for name, t in events if name == 'other'][0]
+    assert first < other < retry
+
+def test_timeout_fails_fast_without_retry():
+    attempts, release = [], threading.Event()
+
+    def hang():
+        attempts.append(1)
+        release.wait(5)
+
+    stages = [{'name': 'hang', 'func': hang, 'inputs': [], 'outputs': ['x'], 'timeout': 0.2, 'retries': 3}]
+    start = time.monotonic()
+    with pytest.raises(StageTimeout):
+        run_graph(stages, backoff = 0.01)
+    assert time.monotonic() - start < 2
+    assert len(attempts) == 1
+    release.set()
+
+def test_failure_drain_is_bounded():
+    release = threading.Event()
+
+    def fail():
+        raise ValueError("broken")
+
+    stages = [{'name': 'fail', 'func': fail, 'inputs': [], 'outputs': ['x']},
+              {'name': 'hang', 'func': lambda: release.wait(5), 'inputs': [], 'outputs': ['y']}]
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        run_graph(stages, workers = 2, drain_timeout = 0.2)
+    assert time.monotonic() - start < 2
+    release.set()
+
+def test_abandoned_attempt_does_not_block_exit():
+    script = ("import time\n"
+              "from stages import run_graph, StageTimeout\n"
+              "stages = [{'name': 'hang', 'func': lambda: time.sleep(60), 'inputs': [], 'outputs': ['x'], 'timeout': 0.2}]\n"
+              "try:\n"
+              "    run_graph(stages)\n"
+              "except StageTimeout:\n"
+              "    print('timed out')\n")
+    scripts = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, '-c', script], cwd = scripts, capture_output = True, text = True, timeout = 30)
+    assert result.stdout.strip() == 'timed out'
+    assert time.monotonic() - start < 10
@@ -0,0 +1,43 @@
+# coding: utf-8
+
+from stages import run_stages, stage_keys, open_stage_cache, SpecRecorder
+import analysis_code
+
+SCALE = 2
+
+def scaled(values):
+    return [value * SCALE for value in values]
+
+TOY_STAGES = [{'name': 'scaled', 'func': scaled, 'inputs': ['values'], 'outputs': ['scaled']}]
+
+def run_toy(cache):
+    return run_stages([{'name': 'load', 'func': lambda: [1, 2, 3], 'inputs': [], 'outputs': ['values']}] + TOY_STAGES,
+                      'input', SpecRecorder(), cache)
+
+def test_config_change_invalidates_cached_stage(tmp_path, monkeypatch):
+    cache = open_stage_cache(str(tmp_path / 'cache'))
+    assert run_toy(cache)['scaled'] == [2, 4, 6]
+
+    monkeypatch.setitem(globals(), 'SCALE', 10)
+    assert run_toy(cache)['scaled'] == [10, 20, 30]
+
+def test_config_change_rekeys_analysis_stages(monkeypatch):
+    keys = stage_keys('input', analysis_code.STAGES)
+
+    rename = dict(analysis_code.RENAME)
+    rename['pers2_FTE_RSE'], rename['fem2_FTE_RSE'] = rename['fem2_FTE_RSE'], rename['pers2_FTE_RSE']
+    monkeypatch.setattr(analysis_code, 'RENAME', rename)
+    renamed = stage_keys('input', analysis_code.STAGES)
+    assert renamed[0] == keys[0]
+    assert all(a != b for a, b in zip(renamed[1:], keys[1:]))
+
+    monkeypatch.undo()
+    monkeypatch.setattr(analysis_code, 'MISSING_GROUPINGS', {'country': ['Country', 'geo']})
+    regrouped = stage_keys('input', analysis_code.STAGES)
+    assert regrouped[:2] == keys[:2]
+    assert regrouped[2] != keys[2]
+
+def test_default_arguments_are_part_of_the_key(monkeypatch):
+    keys = stage_keys('input', analysis_code.STAGES)
+    monkeypatch.setattr(analysis_code.review_missing_data, '__defaults__', (5, None))
+    assert stage_keys('input', analysis_code.STAGES)[2] != keys[2]
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import write_dataset, read_dataset, dataset_files, dataset_fingerprint, parquet_available
+
+FILTERS = [('nace_r2', 'in', ['C', 'G-N']), ('time', '>=', 2010)]
+
+def scraper_data():
+    rows = [(nace, geo, time) for nace in ['C', 'G-N', 'M'] for geo in ['AT', 'BE'] for time in [2009, 2010, 2011]]
+    data = pd.DataFrame(rows, columns = ['nace_r2', 'geo', 'time'])
+    data['pers2_FTE_RSE'] = np.arange(len(data), dtype = np.float64)
+    data['exp2_MIO_EUR'] = np.where(data['time'] == 2010, np.nan, data['pers2_FTE_RSE'] / 4)
+    return data
+
+def plain(data):
+    """Frame with categories as strings, so stores with different category sets compare equal"""
+    return data.astype({col: str for col in data.columns if isinstance(data[col].dtype, pd.CategoricalDtype)})
+
+@pytest.mark.skipif(not parquet_available(), reason = "pyarrow is not installed")
+def test_parquet_round_trip_matches_the_csv_export(tmp_path):
+    data = write_dataset(scraper_data(), 'scraper_data', path = str(tmp_path))
+    assert sorted(os.listdir(tmp_path / 'scraper_data')) == ['nace_r2=C', 'nace_r2=G-N', 'nace_r2=M']
+
+    stored = read_dataset('scraper_data', fmt = 'parquet', path = str(tmp_path))
+    assert stored.dtypes.to_dict() == data.dtypes.to_dict()
+    pd.testing.assert_frame_equal(plain(stored), plain(data))
+
+    # Projection and predicates give the same rows from the store and from the CSV export
+    columns = ['geo', 'time', 'exp2_MIO_EUR']
+    parquet = read_dataset('scraper_data', columns = columns, filters = FILTERS, fmt = 'parquet', path = str(tmp_path))
+    csv = read_dataset('scraper_data', columns = columns, filters = FILTERS, fmt = 'csv', path = str(tmp_path))
+    assert list(parquet.columns) == columns and len(parquet) == 8
+    pd.testing.assert_frame_equal(plain(parquet), plain(csv))
+
+@pytest.mark.skipif(not parquet_available(), reason = "pyarrow is not installed")
+def test_fingerprint_follows_the_store(tmp_path):
+    write_dataset(scraper_data(), 'scraper_data', path = str(tmp_path))
+    assert len(dataset_files('scraper_data', path = str(tmp_path))) == 3
+    fingerprint = dataset_fingerprint('scraper_data', path = str(tmp_path))
+
+    write_dataset(scraper_data(), 'scraper_data', path = str(tmp_path))
+    assert dataset_fingerprint('scraper_data', path = str(tmp_path)) == fingerprint
+    write_dataset(scraper_data().assign(pers2_FTE_RSE = 1.0), 'scraper_data', path = str(tmp_path))
+    assert dataset_fingerprint('scraper_data', path = str(tmp_path)) != fingerprint
+    assert dataset_fingerprint('scraper_data', fmt = 'csv', path = str(tmp_path)) != fingerprint
+
+def test_csv_store_without_pyarrow(tmp_path):
+    write_dataset(scraper_data(), 'scraper_data', fmt = 'csv', path = str(tmp_path))
+    assert os.listdir(tmp_path) == ['scraper_data.csv']
+    # A Parquet read falls back to the CSV export when no columnar store exists
+    data = read_dataset('scraper_data', filters = FILTERS, fmt = 'parquet', path = str(tmp_path))
+    assert data['time'].dtype == 'int32' and set(data['nace_r2']) == {'C', 'G-N'}